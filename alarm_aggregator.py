@@ -0,0 +1,122 @@
+"""
+Agrégation des alarmes avant journalisation
+Lors d'une tempête (même scénario sur des centaines d'appareils), chaque
+nouvelle alarme n'est plus écrite individuellement : les alarmes de même
+identifiant sont regroupées en une ligne de synthèse (« 37 sources: Batterie
+critique »), le même état (levée ou fin) d'une même alarme d'une même source
+n'est signalé qu'une fois par fenêtre de déduplication, et chaque type
+d'alarme produit au plus une ligne par intervalle de limitation. Le nombre
+d'écritures ne dépend donc que du nombre de règles, pas de la taille du parc.
+Un changement d'état n'est jamais perdu : une alarme qui oscille est signalée
+à chaque levée et à chaque fin, au rythme de la limitation, et un changement
+annulé avant d'avoir été écrit (levée puis fin en attente) n'est pas écrit.
+"""
+
+from clock import WALL_CLOCK
+from config import ALARM_AGGREGATION_CONFIG
+
+# Type d'événement des lignes signalant la fin d'une alarme
+CLEARED_EVENT_TYPE = 'SUCCESS'
+
+
+class AlarmAggregator:
+    def __init__(self, clock=None, dedup_window=None, rate_limit=None, max_sources_listed=None):
+        self.clock = clock if clock is not None else WALL_CLOCK
+        self.dedup_window = ALARM_AGGREGATION_CONFIG['dedup_window'] if dedup_window is None else dedup_window
+        self.rate_limit = ALARM_AGGREGATION_CONFIG['rate_limit'] if rate_limit is None else rate_limit
+        self.max_sources_listed = (ALARM_AGGREGATION_CONFIG['max_sources_listed']
+                                   if max_sources_listed is None else max_sources_listed)
+
+        self._last_seen = {}        # (identifiant, source) -> (fin, dernier signalement)
+        self._last_pruned = self.clock.time()
+        self._pending = {}          # (identifiant, fin) -> [alarme exemple, sources]
+        self._last_emitted = {}     # (identifiant, fin) -> dernière ligne écrite
+
+        # Statistiques
+        self.submitted = 0
+        self.deduplicated = 0
+        self.rolled_up = 0
+        self.emitted = 0
+
+    def submit(self, alarms, source=None, cleared=False):
+        """Enregistre des alarmes nouvellement levées (ou disparues si cleared) par une source"""
+        now = self.clock.time()
+        last_seen = self._last_seen
+        for alarm in alarms:
+            self.submitted += 1
+            key = (alarm.id, source)
+            last = last_seen.get(key)
+            if last is not None and last[0] == cleared and now - last[1] < self.dedup_window:
+                # Simple répétition de l'état déjà signalé par cette source
+                self.deduplicated += 1
+                continue
+            last_seen[key] = (cleared, now)
+
+            # Changement inverse encore en attente : les deux s'annulent, rien n'a été écrit
+            opposite = self._pending.get((alarm.id, not cleared))
+            if opposite is not None and source in opposite[1]:
+                opposite[1].remove(source)
+                if not opposite[1]:
+                    del self._pending[(alarm.id, not cleared)]
+                continue
+
+            bucket = self._pending.get((alarm.id, cleared))
+            if bucket is None:
+                self._pending[(alarm.id, cleared)] = [alarm, [source]]
+            else:
+                bucket[1].append(source)
+
+    @property
+    def pending(self):
+        """Nombre d'alarmes en attente de la prochaine ligne de leur type"""
+        return sum(len(sources) for _, sources in self._pending.values())
+
+    def flush(self):
+        """Retourne les lignes à journaliser [(message, type d'événement)]
+
+        Un type d'alarme écrit moins de rate_limit secondes plus tôt reste en
+        attente et continue d'accumuler ses sources.
+        """
+        return [(self.format_line(alarm, sources, cleared), CLEARED_EVENT_TYPE if cleared else alarm.event_type)
+                for alarm, sources, cleared in self.drain()]
+
+    def drain(self):
+        """Comme flush(), sans formatage : [(alarme exemple, sources, fin d'alarme)]"""
+        now = self.clock.time()
+        groups = []
+        for key in list(self._pending):
+            if now - self._last_emitted.get(key, now - self.rate_limit) < self.rate_limit:
+                continue
+            alarm, sources = self._pending.pop(key)
+            self._last_emitted[key] = now
+            groups.append((alarm, sources, key[1]))
+            if len(sources) > 1:
+                self.rolled_up += len(sources)
+        self.emitted += len(groups)
+
+        # Oublier les signalements sortis de la fenêtre de déduplication
+        if now - self._last_pruned >= self.dedup_window:
+            self._last_seen = {key: seen for key, seen in self._last_seen.items()
+                               if now - seen[1] < self.dedup_window}
+            self._last_pruned = now
+        return groups
+
+    def format_line(self, alarm, sources, cleared=False):
+        """Texte d'un regroupement retourné par drain()"""
+        if len(sources) == 1:
+            text = alarm.summary if cleared else alarm.display()
+            return text if sources[0] is None else f"{text} ({sources[0]})"
+        listed = ", ".join(str(source) for source in sources[:self.max_sources_listed])
+        if len(sources) > self.max_sources_listed:
+            listed += ", …"
+        prefix = f"{alarm.icon} " if alarm.icon and not cleared else ""
+        return f"{prefix}{len(sources)} sources: {alarm.summary} ({listed})"
+
+    def as_dict(self):
+        return {
+            'submitted': self.submitted,
+            'deduplicated': self.deduplicated,
+            'rolled_up': self.rolled_up,
+            'emitted': self.emitted,
+            'pending': self.pending,
+        }
@@ -0,0 +1,195 @@
+"""
+Règles d'alarme déclaratives (config.ALARM_RULES)
+Chaque règle décrit une condition sur un attribut du module :
+
+    'climate.high_co2': {'module': 'climate', 'when': 'co2 > CLIMATE_CONFIG.co2_forced_ventilation',
+                         'hysteresis': 50, 'min_duration': 4, 'severity': 'WARNING',
+                         'message': "CO₂ élevé: {co2} ppm", 'icon': '💨'},
+
+La condition s'écrit « attribut », ou « attribut op valeur » avec op parmi
+> >= < <= == != ; la valeur est un nombre, une chaîne entre guillemets,
+True / False ou une référence NOM_CONFIG.clé vers config.py. Les règles sont
+compilées une fois en fonctions de comparaison (operator.gt...) qui acceptent
+indifféremment un scalaire ou un tableau NumPy : le même jeu de règles sert aux
+modules et, sous forme de masques, aux parcs de pièces.
+
+Hystérésis : une alarme active ne disparaît qu'une fois la valeur revenue de
+l'autre côté du seuil décalé (seuil - hystérésis pour > et >=, seuil +
+hystérésis pour < et <=). Durée minimale : la condition doit être vraie
+depuis min_duration secondes (horloge du module) avant que l'alarme soit levée.
+Les évaluateurs sont avancés à chaque échantillon (cycles capteurs et contrôle
+du module) : les lecteurs ne font que consulter le dernier résultat.
+"""
+
+import operator
+import re
+import string
+from collections import namedtuple
+import config
+from alarms import Alarm
+
+OPERATORS = {
+    '>': operator.gt,
+    '>=': operator.ge,
+    '<': operator.lt,
+    '<=': operator.le,
+    '==': operator.eq,
+    '!=': operator.ne,
+}
+
+# Sens du décalage de seuil appliqué par l'hystérésis
+HYSTERESIS_SIGN = {'>': -1, '>=': -1, '<': 1, '<=': 1}
+
+CONDITION_PATTERN = re.compile(r'^(?P<field>\w+)(?:\s*(?P<op>[<>]=?|==|!=)\s*(?P<value>.+?))?\s*$')
+CONFIG_REFERENCE = re.compile(r'^(?P<table>[A-Z_]+)\.(?P<key>\w+)$')
+
+SEVERITIES = ('WARNING', 'ERROR', 'CRITICAL')
+
+AlarmRule = namedtuple('AlarmRule', ['id', 'module', 'field', 'severity', 'template', 'icon', 'fields',
+                                     'min_duration', 'trigger', 'hold'])
+
+
+def _parse_value(rule_id, text):
+    """Valeur littérale ou référence à une table de config.py"""
+    if text in ('True', 'False'):
+        return text == 'True'
+    if len(text) >= 2 and text[0] == text[-1] and text[0] in '"\'':
+        return text[1:-1]
+    reference = CONFIG_REFERENCE.match(text)
+    if reference:
+        table = getattr(config, reference['table'], None)
+        if not isinstance(table, dict) or reference['key'] not in table:
+            raise ValueError(f"Règle {rule_id}: référence de configuration inconnue {text!r}")
+        return table[reference['key']]
+    try:
+        return int(text)
+    except ValueError:
+        try:
+            return float(text)
+        except ValueError:
+            raise ValueError(f"Règle {rule_id}: valeur invalide {text!r}") from None
+
+
+def _comparison(compare, threshold):
+    def test(value):
+        return compare(value, threshold)
+    return test
+
+
+def _truthy(value):
+    return value
+
+
+def compile_rule(rule_id, rule):
+    """Valide une règle et la traduit en fonctions de déclenchement / maintien"""
+    match = CONDITION_PATTERN.match(rule.get('when', ''))
+    if match is None:
+        raise ValueError(f"Règle {rule_id}: condition invalide {rule.get('when')!r}")
+    severity = rule.get('severity', 'WARNING')
+    if severity not in SEVERITIES:
+        raise ValueError(f"Règle {rule_id}: sévérité inconnue {severity!r}")
+    if 'module' not in rule or 'message' not in rule:
+        raise ValueError(f"Règle {rule_id}: module et message obligatoires")
+
+    hysteresis = rule.get('hysteresis', 0)
+    op = match['op']
+    if hysteresis and op not in HYSTERESIS_SIGN:
+        raise ValueError(f"Règle {rule_id}: hystérésis sans seuil ordonné ({op or 'booléen'})")
+    if op is None:
+        trigger = hold = _truthy
+    else:
+        threshold = _parse_value(rule_id, match['value'])
+        trigger = _comparison(OPERATORS[op], threshold)
+        hold = trigger
+        if hysteresis:
+            hold = _comparison(OPERATORS[op], threshold + HYSTERESIS_SIGN[op] * hysteresis)
+
+    # Attributs lus pour formater le message (à l'affichage seulement)
+    fields = tuple(dict.fromkeys(name for _, name, _, _ in string.Formatter().parse(rule['message']) if name))
+    return AlarmRule(rule_id, rule['module'], match['field'], severity, rule['message'], rule.get('icon'),
+                     fields, rule.get('min_duration', 0), trigger, hold)
+
+
+class AlarmRuleSet:
+    def __init__(self, rules=None):
+        self.rules = tuple(compile_rule(rule_id, rule)
+                           for rule_id, rule in (config.ALARM_RULES if rules is None else rules).items())
+        self._by_module = {}
+        for rule in self.rules:
+            self._by_module[rule.module] = self._by_module.get(rule.module, ()) + (rule,)
+
+    def for_module(self, module):
+        """Règles compilées d'un module, dans l'ordre de déclaration"""
+        return self._by_module.get(module, ())
+
+
+class AlarmEvaluator:
+    """État des règles d'un module (alarmes actives, conditions en attente)"""
+
+    def __init__(self, rules, clock):
+        self.rules = rules
+        self.clock = clock
+        self.active = set()
+        self.pending_since = {}
+
+    def evaluate(self, target):
+        """Évalue toutes les règles sur les attributs de target ; retourne les alarmes actives
+
+        À appeler à chaque nouvel échantillon : l'hystérésis et la durée minimale
+        avancent à chaque appel.
+        """
+        now = self.clock.time()
+        active = self.active
+        pending_since = self.pending_since
+        alarms = []
+        for rule in self.rules:
+            value = getattr(target, rule.field)
+            if not (rule.hold(value) if rule.id in active else rule.trigger(value)):
+                active.discard(rule.id)
+                pending_since.pop(rule.id, None)
+                continue
+            if rule.min_duration and now - pending_since.setdefault(rule.id, now) < rule.min_duration:
+                continue
+
+            active.add(rule.id)
+            alarms.append(Alarm(rule.id, rule.module, rule.severity, rule.template, rule.icon,
+                                **{name: getattr(target, name) for name in rule.fields}))
+        return alarms
+
+
+class MaskEvaluator:
+    """Mêmes règles évaluées sur des tableaux (une entrée par pièce d'un parc)"""
+
+    def __init__(self, rules, size, clock):
+        import numpy as np
+        self.rules = rules
+        self.clock = clock
+        self.active = {rule.id: np.zeros(size, dtype=bool) for rule in rules}
+        self.pending_since = {rule.id: np.full(size, np.nan) for rule in rules}
+
+    def evaluate(self, target):
+        """Retourne le masque booléen des alarmes actives par règle"""
+        import numpy as np
+        now = self.clock.time()
+        masks = {}
+        for rule in self.rules:
+            values = getattr(target, rule.field)
+            active = self.active[rule.id]
+            condition = np.where(active, rule.hold(values), rule.trigger(values))
+            if rule.min_duration:
+                since = self.pending_since[rule.id]
+                since = np.where(condition, np.where(np.isnan(since), now, since), np.nan)
+                self.pending_since[rule.id] = since
+                condition = condition & (now - np.nan_to_num(since, nan=now) >= rule.min_duration)
+            self.active[rule.id] = masks[rule.id] = condition
+        return masks
+
+    def alarms(self, target, index):
+        """Alarmes actives (objets Alarm) d'une entrée, d'après la dernière évaluation"""
+        return [Alarm(rule.id, rule.module, rule.severity, rule.template, rule.icon,
+                      **{name: getattr(target, name)[index].item() for name in rule.fields})
+                for rule in self.rules if self.active[rule.id][index]]
+
+
+# Règles partagées, compilées une fois au chargement de la configuration
+RULES = AlarmRuleSet()
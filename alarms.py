@@ -0,0 +1,62 @@
+"""
+Alarmes structurées
+Une alarme a un identifiant stable (ex. 'climate.high_co2'), un module source,
+une sévérité et un modèle de message. Les valeurs mesurées sont conservées à
+part : le texte n'est formaté que lorsqu'il est affiché, et deux alarmes de
+même identifiant sont la même alarme même si la valeur a changé entre-temps.
+"""
+
+# Type d'événement du journal de l'HMI associé à chaque sévérité
+SEVERITY_EVENT_TYPES = {
+    'WARNING': 'WARNING',
+    'ERROR': 'ERROR',
+    'CRITICAL': 'ERROR',
+}
+
+
+class Alarm:
+    __slots__ = ('id', 'module', 'severity', 'template', 'icon', 'values')
+
+    def __init__(self, alarm_id, module, severity, template, icon=None, **values):
+        self.id = alarm_id
+        self.module = module
+        self.severity = severity
+        self.template = template
+        self.icon = icon
+        self.values = values
+
+    @property
+    def message(self):
+        """Texte de l'alarme (formaté à la demande)"""
+        return self.template.format(**self.values)
+
+    @property
+    def summary(self):
+        """Libellé sans valeur mesurée (texte du modèle avant le premier champ)"""
+        return self.template.split('{', 1)[0].rstrip(' :-') or self.id
+
+    @property
+    def event_type(self):
+        return SEVERITY_EVENT_TYPES.get(self.severity, 'WARNING')
+
+    def display(self):
+        """Texte du journal, précédé de l'icône de l'alarme"""
+        return f"{self.icon} {self.message}" if self.icon else self.message
+
+    def __str__(self):
+        return self.message
+
+    def __repr__(self):
+        return f"Alarm({self.id!r}, {self.severity}, {self.values})"
+
+
+def diff_alarms(previous_ids, alarms):
+    """Compare les alarmes actives aux identifiants précédents
+
+    Retourne (nouvelles alarmes, identifiants disparus, identifiants actifs).
+    """
+    active = {alarm.id: alarm for alarm in alarms}
+    current_ids = active.keys()
+    raised = [active[alarm_id] for alarm_id in current_ids - previous_ids]
+    cleared = previous_ids - current_ids
+    return raised, cleared, set(current_ids)
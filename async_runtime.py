@@ -0,0 +1,149 @@
+"""
+Runtime asyncio de la simulation
+Les cycles des modules, la planification des scénarios et les sinks sont des
+coroutines d'une seule boucle d'événements. TkAsyncBridge fait tourner cette
+boucle par tranches depuis la boucle principale tkinter : tout reste dans un
+seul thread, sans passage de relais entre threads.
+"""
+
+import asyncio
+import inspect
+from collections import defaultdict
+from config import UPDATE_INTERVAL
+from sim_logging import get_logger
+
+log = get_logger('runtime')
+
+
+class AsyncSimulationRuntime:
+    def __init__(self, sites, sinks=(), publish_interval=UPDATE_INTERVAL):
+        # Un site expose .modules (nom -> module) et .scenario_manager
+        self.sites = list(sites)
+        self.sinks = list(sinks)
+        self.publish_interval = publish_interval
+        self.running = False
+        self.tasks = []
+        self.overruns = 0
+
+    def _tick_groups(self):
+        """Regroupe les appels par (phase, cadence) : une coroutine par groupe"""
+        groups = defaultdict(list)
+        for site in self.sites:
+            for module in site.modules.values():
+                groups[(0, module.sensor_interval)].append(module.update_sensors)
+                groups[(1, module.control_interval)].append(module.update_control_logic)
+        return groups
+
+    async def _periodic(self, interval, phase, callbacks):
+        """Exécute un groupe d'appels à échéances absolues (sans dérive)"""
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        cycle = 0
+
+        while self.running:
+            # Phase contrôle : laisser passer d'abord les capteurs dus au même instant
+            if phase:
+                await asyncio.sleep(0)
+
+            for callback in callbacks:
+                try:
+                    callback()
+                except Exception as e:
+                    log.error("❌ Erreur dans la boucle de simulation: %s", e)
+
+            # Prochaine échéance ; en cas de dépassement, sauter les échéances manquées
+            cycle += 1
+            delay = start + cycle * interval - loop.time()
+            if delay < 0:
+                self.overruns += 1
+                cycle += int(-delay // interval) + 1
+                delay = start + cycle * interval - loop.time()
+            await asyncio.sleep(delay)
+
+    async def _scenarios(self, manager):
+        """Attend l'échéance du prochain scénario automatique d'un site"""
+        while self.running:
+            await asyncio.sleep(max(0, manager.next_scenario_time - manager.clock.time()))
+            manager.check_scenarios()
+
+    async def _publish(self):
+        """Publie un instantané de chaque site et l'envoie aux sinks"""
+        while self.running:
+            for site in self.sites:
+                snapshots = getattr(site, 'snapshots', None)
+                if snapshots is not None:
+                    # Un instantané cohérent par cycle, partagé avec l'HMI
+                    snapshot = snapshots.publish()
+                    statuses, active_alarms = snapshot.plain_status(), snapshot.active_alarms
+                else:
+                    statuses = {name: module.get_status() for name, module in site.modules.items()}
+                    active_alarms = [alarm for module in site.modules.values() for alarm in module.get_alarms()]
+
+                # Le sink compare les alarmes de chaque site séparément puis les agrège :
+                # une ligne par type d'alarme au plus, quel que soit le nombre de sites
+                source = getattr(site, 'name', None)
+                for sink in self.sinks:
+                    # Les sinks peuvent être synchrones ou des coroutines
+                    for result in (sink.write_status(statuses), sink.write_alarms(active_alarms, source)):
+                        if inspect.isawaitable(result):
+                            await result
+            await asyncio.sleep(self.publish_interval)
+
+    def start(self, loop=None):
+        """Crée les tâches sur la boucle donnée sans la bloquer (pont tkinter)"""
+        loop = loop or asyncio.get_event_loop()
+        self.running = True
+
+        coroutines = [self._periodic(interval, phase, callbacks)
+                      for (phase, interval), callbacks in sorted(self._tick_groups().items())]
+        coroutines.extend(self._scenarios(site.scenario_manager) for site in self.sites)
+        if self.sinks or any(hasattr(site, 'snapshots') for site in self.sites):
+            coroutines.append(self._publish())
+
+        self.tasks = [loop.create_task(coroutine) for coroutine in coroutines]
+        return self.tasks
+
+    async def run(self, duration=None):
+        """Exécute la simulation sur la boucle courante (durée en secondes ou illimitée)"""
+        self.start(asyncio.get_running_loop())
+        try:
+            if duration is not None:
+                await asyncio.sleep(duration)
+            else:
+                await asyncio.gather(*self.tasks)
+        except asyncio.CancelledError:
+            pass
+        finally:
+            self.stop()
+            await asyncio.gather(*self.tasks, return_exceptions=True)
+
+    def stop(self):
+        """Arrête toutes les coroutines de la simulation"""
+        self.running = False
+        for task in self.tasks:
+            task.cancel()
+
+
+class TkAsyncBridge:
+    """Fait avancer la boucle asyncio depuis root.after(), dans le thread tkinter"""
+
+    def __init__(self, root, loop, interval_ms=10):
+        self.root = root
+        self.loop = loop
+        self.interval_ms = interval_ms
+        self.active = False
+
+    def start(self):
+        self.active = True
+        self._pump()
+
+    def _pump(self):
+        """Exécute tous les callbacks asyncio prêts puis rend la main à tkinter"""
+        if not self.active:
+            return
+        self.loop.call_soon(self.loop.stop)
+        self.loop.run_forever()
+        self.root.after(self.interval_ms, self._pump)
+
+    def stop(self):
+        self.active = False
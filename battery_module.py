@@ -3,21 +3,49 @@ Module de simulation Battery Monitoring
 Gère la tension, courant, température batterie avec alertes et modes d'économie
 """
 
+import math
 import random
-import time
-from config import BATTERY_CONFIG
+from alarm_rules import RULES, AlarmEvaluator
+from clock import WALL_CLOCK
+from config import BATTERY_CONFIG, MODULE_RATES, UPDATE_INTERVAL
+from command_queue import CommandQueue
+from scenario_registry import REGISTRY
+from scenario_stack import ScenarioStack
+from state_cache import StateCache
 
 
 class BatteryModule:
-    def __init__(self):
+    FORCED_ATTRIBUTES = ('forced_voltage', 'forced_current')
+    
+    def __init__(self, clock=None):
+        self.clock = clock if clock is not None else WALL_CLOCK
+        
+        # Cadences d'échantillonnage et de contrôle propres au module
+        self.sensor_interval = MODULE_RATES['battery']['sensor_interval']
+        self.control_interval = MODULE_RATES['battery']['control_interval']
+        
         self.voltage = 12.5
         self.current = 2.0
         self.temperature = 25.0
         self.battery_status = 'Normal'  # Normal, Low, Critical, Shutdown
         self.power_save_mode = False
-        self.last_update = time.time()
+        self.last_update = self.clock.time()
+        
+        # Noyau d'événements optionnel (expiration des scénarios programmée)
+        self.kernel = None
+        
+        # Commandes externes (scénarios...) appliquées au début du cycle capteurs
+        self.commands = CommandQueue()
+        
+        # Vues get_status / get_alarms en cache jusqu'au prochain changement d'état
+        self.state_cache = StateCache()
         
-        # Variables pour scénarios forcés
+        # Règles d'alarme de config.ALARM_RULES (hystérésis, durée minimale)
+        self.alarm_rules = AlarmEvaluator(RULES.for_module('battery'), self.clock)
+        self.alarms = []
+        
+        # Scénarios actifs superposables ; les variables ci-dessous en sont dérivées
+        self.scenarios = ScenarioStack()
         self.scenario_active = False
         self.scenario_end_time = 0
         self.forced_voltage = None
@@ -25,13 +53,18 @@ class BatteryModule:
     
     def update_sensors(self):
         """Met à jour les valeurs des capteurs simulés"""
-        current_time = time.time()
+        # Appliquer les commandes reçues depuis le cycle précédent
+        self.commands.apply(self)
+        
+        current_time = self.clock.time()
         
         # Vérifier si un scénario forcé est actif
-        if self.scenario_active and current_time > self.scenario_end_time:
-            self.scenario_active = False
-            self.forced_voltage = None
-            self.forced_current = None
+        self.expire_scenario()
+        
+        # Pas ramenés à la cadence du module (voir MODULE_RATES) : dérives
+        # proportionnelles à l'intervalle, bruits à sa racine carrée
+        step = self.sensor_interval / UPDATE_INTERVAL
+        noise = math.sqrt(step)
         
         # Générer valeurs aléatoires ou utiliser valeurs forcées
         if self.forced_voltage is not None:
@@ -42,10 +75,10 @@ class BatteryModule:
             
             # Tendance de décharge lente normale
             discharge_rate = random.uniform(-0.01, 0.02)  # Légère décharge
-            self.voltage += discharge_rate
+            self.voltage += discharge_rate * step
             
             # Fluctuation aléatoire
-            self.voltage += random.uniform(-0.05, 0.05)
+            self.voltage += random.uniform(-0.05, 0.05) * noise
             self.voltage = max(volt_min, min(volt_max, self.voltage))
         
         if self.forced_current is not None:
@@ -53,17 +86,19 @@ class BatteryModule:
         else:
             # Variation normale du courant
             curr_min, curr_max = BATTERY_CONFIG['current_range']
-            self.current += random.uniform(-0.3, 0.3)
+            self.current += random.uniform(-0.3, 0.3) * noise
             self.current = max(curr_min, min(curr_max, self.current))
         
         # Température batterie varie avec l'utilisation
         temp_min, temp_max = BATTERY_CONFIG['temp_range']
         # Plus de courant = plus de chaleur
         temp_influence = (self.current / 5.0) * 2.0  # Influence du courant sur la température
-        self.temperature += random.uniform(-0.5, 0.5) + temp_influence * 0.1
+        self.temperature += random.uniform(-0.5, 0.5) * noise + temp_influence * 0.1 * step
         self.temperature = max(temp_min, min(temp_max, self.temperature))
         
         self.last_update = current_time
+        self.state_cache.invalidate()
+        self._evaluate_alarms()
     
     def update_control_logic(self):
         """Met à jour la logique de contrôle et les alertes"""
@@ -80,21 +115,50 @@ class BatteryModule:
         else:
             self.battery_status = 'Normal'
             self.power_save_mode = False
+        
+        self.state_cache.invalidate()
+        self._evaluate_alarms()
     
-    def force_scenario(self, scenario_type, duration):
-        """Force un scénario spécifique pendant une durée donnée"""
-        self.scenario_active = True
-        self.scenario_end_time = time.time() + duration
-        
-        if scenario_type == 'low_battery':
-            self.forced_voltage = 10.5
-            self.forced_current = 1.0
-        elif scenario_type == 'critical_battery':
-            self.forced_voltage = 9.8
-            self.forced_current = 0.5
+    def expire_scenario(self):
+        """Retire les scénarios dont la durée est écoulée (tas trié par échéance)"""
+        if self.scenarios.expire(self.clock.time()):
+            self._apply_scenarios()
+    
+    def force_scenario(self, scenario_type, duration, priority=0):
+        """Force un scénario pendant une durée donnée et retourne son identifiant
+        
+        Les scénarios se superposent : pour chaque valeur forcée, le plus
+        prioritaire l'emporte (à priorité égale, le plus récent).
+        """
+        end_time = self.clock.time() + duration
+        scenario_id = self.scenarios.push(scenario_type, REGISTRY.values_for(scenario_type, 'battery'),
+                                          end_time, priority)
+        if self.kernel is not None:
+            self.kernel.schedule(end_time, self.expire_scenario)
+        
+        self._apply_scenarios()
+        return scenario_id
+    
+    def cancel_scenario(self, scenario_id):
+        """Interrompt un scénario avant son échéance"""
+        if self.scenarios.cancel(scenario_id):
+            self._apply_scenarios()
+    
+    def _apply_scenarios(self):
+        """Recalcule les valeurs forcées à partir des scénarios actifs"""
+        forced = self.scenarios.resolved()
+        for attribute in self.FORCED_ATTRIBUTES:
+            setattr(self, attribute, forced.get(attribute))
+        self.scenario_active = self.scenarios.active_count > 0
+        self.scenario_end_time = self.scenarios.end_time()
+        self.state_cache.invalidate()
     
     def get_status(self):
-        """Retourne l'état actuel du module"""
+        """Retourne l'état actuel du module (en cache jusqu'au prochain changement d'état)"""
+        return self.state_cache.get('status', self._build_status)
+    
+    def _build_status(self):
+        """Construit le dictionnaire d'état du module"""
         # Calculer la capacité estimée (approximative)
         voltage_range = BATTERY_CONFIG['voltage_range'][1] - BATTERY_CONFIG['voltage_range'][0]
         capacity_percent = ((self.voltage - BATTERY_CONFIG['voltage_range'][0]) / voltage_range) * 100
@@ -111,20 +175,10 @@ class BatteryModule:
         }
     
     def get_alarms(self):
-        """Retourne les alarmes actives"""
-        alarms = []
-        
-        if self.battery_status == 'Shutdown':
-            alarms.append(f"CRITIQUE: Arrêt système imminent - {self.voltage:.2f}V")
-        elif self.battery_status == 'Critical':
-            alarms.append(f"Batterie critique - {self.voltage:.2f}V")
-        elif self.battery_status == 'Low':
-            alarms.append(f"Batterie faible - {self.voltage:.2f}V")
-        
-        if self.temperature > 45:
-            alarms.append(f"Température batterie élevée: {self.temperature:.1f}°C")
-        
-        if self.current > 8:
-            alarms.append(f"Courant élevé: {self.current:.1f}A")
-        
-        return alarms
\ No newline at end of file
+        """Retourne les alarmes actives évaluées au dernier cycle (objets Alarm)"""
+        return self.alarms
+    
+    def _evaluate_alarms(self):
+        """Fait avancer les règles d'alarme sur l'échantillon courant (à chaque cycle)"""
+        self.alarms = self.alarm_rules.evaluate(self)
+        return self.alarms
\ No newline at end of file
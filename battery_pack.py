@@ -0,0 +1,212 @@
+"""
+Module de simulation Battery Pack cellule par cellule
+Tension, courant et température par cellule (topologie série/parallèle) avec
+détection des cellules faibles et du déséquilibre, calculés par réductions NumPy.
+Les scénarios se superposent par cellule comme dans ClimateFleet (ScenarioStack).
+"""
+
+import numpy as np
+from alarm_rules import RULES, AlarmEvaluator
+from clock import WALL_CLOCK
+from command_queue import CommandQueue
+from config import BATTERY_CONFIG, BATTERY_PACK_CONFIG
+from scenario_stack import ScenarioStack
+
+
+class BatteryPack:
+    # Valeurs forcées par scénario, ramenées à l'échelle d'une cellule
+    SCENARIO_VALUES = {
+        'low_battery': {'forced_cell_voltage': 3.3, 'forced_cell_current': 1.0},
+        'critical_battery': {'forced_cell_voltage': 3.1, 'forced_cell_current': 0.5},
+    }
+
+    def __init__(self, series=None, parallel=None, clock=None, seed=None):
+        self.clock = clock if clock is not None else WALL_CLOCK
+        self.series = series or BATTERY_PACK_CONFIG['series']
+        self.parallel = parallel or BATTERY_PACK_CONFIG['parallel']
+        self.rng = np.random.default_rng(seed)
+        shape = (self.series, self.parallel)
+
+        # État par cellule : ligne = groupe série, colonne = cellule en parallèle
+        self.voltage = np.full(shape, 3.9)
+        self.current = np.full(shape, 1.0)
+        self.temperature = np.full(shape, 25.0)
+        # Santé des cellules : les cellules usées ont une tension d'équilibre plus basse
+        self.health = self.rng.uniform(0.98, 1.0, shape)
+        self.rest_voltage = 3.9 - (1.0 - self.health) * 4.0
+        self.group_current = self.parallel * 1.0
+
+        # Grandeurs dérivées (mises à jour par update_control_logic)
+        self.pack_voltage = 0.0
+        self.pack_current = 0.0
+        self.battery_status = 'Normal'  # Normal, Low, Critical, Shutdown
+        self.power_save_mode = False
+        self.weak_cells = np.zeros(shape, dtype=bool)
+        self.weak_count = 0
+        self.imbalance = 0.0
+        self.imbalance_mv = 0.0
+        self.max_temperature = 25.0
+        self.last_update = self.clock.time()
+
+        # Scénarios forcés par cellule (NaN = pas de valeur forcée), dérivés des scénarios actifs
+        self.scenarios = ScenarioStack()
+        self.scenario_cells = np.zeros(shape, dtype=bool)
+        self.scenario_end_time = np.zeros(shape)
+        self.forced_cell_voltage = np.full(shape, np.nan)
+        self.forced_cell_current = np.full(shape, np.nan)
+
+        # Commandes externes appliquées au début du cycle capteurs
+        self.commands = CommandQueue()
+
+        # Règles d'alarme de config.ALARM_RULES ('battery_pack'), évaluées à chaque cycle de contrôle
+        self.alarm_rules = AlarmEvaluator(RULES.for_module('battery_pack'), self.clock)
+        self.alarms = []
+
+        self.update_control_logic()
+
+    @property
+    def cell_count(self):
+        return self.series * self.parallel
+
+    @property
+    def scenario_active(self):
+        """Vrai si au moins une cellule est sous scénario forcé"""
+        return bool(self.scenario_cells.any())
+
+    def update_sensors(self):
+        """Met à jour les mesures simulées de toutes les cellules"""
+        self.commands.apply(self)
+        current_time = self.clock.time()
+        shape = self.voltage.shape
+        rng = self.rng
+
+        # Expiration des scénarios forcés (sommet du tas, sans parcourir les cellules)
+        if self.scenarios.expire(current_time):
+            self._apply_scenarios()
+
+        # Courant du groupe (identique pour tous les groupes en série) : un courant
+        # forcé sur une partie des cellules impose sa moyenne à toute la chaîne
+        curr_min, curr_max = BATTERY_PACK_CONFIG['cell_current_range']
+        has_forced_current = ~np.isnan(self.forced_cell_current)
+        if has_forced_current.any():
+            forced_current = self.forced_cell_current[has_forced_current].mean()
+            self.group_current = self.parallel * (forced_current + rng.uniform(-0.1, 0.1))
+        else:
+            self.group_current += rng.uniform(-0.3, 0.3) * self.parallel
+            self.group_current = min(curr_max * self.parallel, max(curr_min, self.group_current))
+
+        # Répartition du courant entre cellules parallèles selon leur santé
+        self.current = self.health * (self.group_current / self.health.sum(axis=1, keepdims=True))
+
+        # Tension des cellules
+        # Retour lent vers la tension d'équilibre + fluctuation aléatoire, ou valeur forcée bruitée
+        volt_min, volt_max = BATTERY_PACK_CONFIG['cell_voltage_range']
+        has_forced_voltage = ~np.isnan(self.forced_cell_voltage)
+        walk = self.voltage + (self.rest_voltage - self.voltage) * 0.01 + rng.uniform(-0.005, 0.005, shape)
+        np.clip(walk, volt_min, volt_max, out=walk)
+        forced = self.forced_cell_voltage + rng.uniform(-0.03, 0.03, shape)
+        self.voltage = np.where(has_forced_voltage, forced, walk)
+
+        # Température : plus de courant = plus de chaleur, refroidissement vers 25°C
+        temp_min, temp_max = BATTERY_CONFIG['temp_range']
+        self.temperature += rng.uniform(-0.5, 0.5, shape) + self.current * 0.04
+        self.temperature += (25.0 - self.temperature) * 0.05
+        np.clip(self.temperature, temp_min, temp_max, out=self.temperature)
+
+        self.last_update = current_time
+
+    def update_control_logic(self):
+        """Calcule tension pack, statut, mode économie et cellules faibles"""
+        group_voltage = self.voltage.mean(axis=1)
+        self.pack_voltage = float(group_voltage.sum())
+        self.pack_current = float(self.current.sum(axis=1).mean())
+
+        # Le groupe série le plus faible limite tout le pack
+        weakest = group_voltage.min()
+        if weakest < BATTERY_PACK_CONFIG['cell_voltage_shutdown']:
+            self.battery_status = 'Shutdown'
+            self.power_save_mode = True
+        elif weakest < BATTERY_PACK_CONFIG['cell_voltage_critical']:
+            self.battery_status = 'Critical'
+            self.power_save_mode = True
+        elif weakest < BATTERY_PACK_CONFIG['cell_voltage_low']:
+            self.battery_status = 'Low'
+            self.power_save_mode = False
+        else:
+            self.battery_status = 'Normal'
+            self.power_save_mode = False
+
+        # Cellules faibles et déséquilibre entre groupes série
+        self.weak_cells = self.voltage < (self.voltage.mean() - BATTERY_PACK_CONFIG['weak_cell_margin'])
+        self.weak_count = int(self.weak_cells.sum())
+        self.imbalance = float(group_voltage.max() - weakest)
+        self.imbalance_mv = self.imbalance * 1000
+        self.max_temperature = float(self.temperature.max())
+
+        self.alarms = self.alarm_rules.evaluate(self)
+
+    def force_scenario(self, scenario_type, duration, cells=None, priority=0):
+        """Force un scénario sur une sélection de cellules (toutes par défaut)
+
+        cells indexe le tableau (groupe série, cellule parallèle) : un groupe
+        (3), une cellule ((3, 5)), une tranche ou un masque booléen. Les
+        scénarios se superposent comme dans ClimateFleet ; retourne l'identifiant.
+        """
+        scenario_id = self._push_scenario(scenario_type, duration, cells, priority)
+        self._apply_scenarios()
+        return scenario_id
+
+    def cancel_scenario(self, scenario_id):
+        """Interrompt un scénario avant son échéance"""
+        if self.scenarios.cancel(scenario_id):
+            self._apply_scenarios()
+
+    def _push_scenario(self, scenario_type, duration, cells, priority):
+        selected = np.ones(self.voltage.shape, dtype=bool)
+        if cells is not None:
+            selected = np.zeros(self.voltage.shape, dtype=bool)
+            selected[cells] = True
+        return self.scenarios.push(scenario_type, self.SCENARIO_VALUES.get(scenario_type, {}),
+                                   self.clock.time() + duration, priority, target=selected)
+
+    def _apply_scenarios(self):
+        """Recalcule les tableaux forcés : une affectation vectorisée par scénario actif"""
+        self.scenario_cells[:] = False
+        self.scenario_end_time[:] = 0
+        self.forced_cell_voltage[:] = np.nan
+        self.forced_cell_current[:] = np.nan
+
+        # Du moins au plus prioritaire : les affectations suivantes écrasent les précédentes
+        for scenario in self.scenarios.active():
+            cells = scenario.target
+            self.scenario_cells[cells] = True
+            self.scenario_end_time[cells] = np.maximum(self.scenario_end_time[cells], scenario.end_time)
+            for attribute, value in scenario.values.items():
+                getattr(self, attribute)[cells] = value
+
+    def get_weak_cells(self):
+        """Retourne la liste (groupe, cellule) des cellules faibles"""
+        return [tuple(int(i) for i in index) for index in np.argwhere(self.weak_cells)]
+
+    def get_status(self):
+        """Retourne l'état du pack (clés compatibles avec BatteryModule.get_status)"""
+        volt_min, volt_max = BATTERY_PACK_CONFIG['cell_voltage_range']
+        capacity_percent = (float(self.voltage.mean()) - volt_min) / (volt_max - volt_min) * 100
+        capacity_percent = max(0, min(100, capacity_percent))
+
+        return {
+            'voltage': round(self.pack_voltage, 2),
+            'current': round(self.pack_current, 2),
+            'temperature': round(float(self.temperature.max()), 1),
+            'battery_status': self.battery_status,
+            'power_save_mode': self.power_save_mode,
+            'capacity_percent': round(capacity_percent, 1),
+            'scenario_active': self.scenario_active,
+            'cells': self.cell_count,
+            'weak_cells': int(self.weak_cells.sum()),
+            'imbalance': round(self.imbalance, 3),
+        }
+
+    def get_alarms(self):
+        """Retourne les alarmes actives évaluées au dernier cycle de contrôle (objets Alarm)"""
+        return self.alarms
@@ -0,0 +1,105 @@
+"""
+Benchmark du journal des événements de l'HMI en rafale
+Compare l'ancienne insertion (un insert + relecture complète du journal par
+événement) à EventJournal (insertion groupée, limite appliquée par compteur).
+
+Exécution : python benchmark_journal.py [--events 20000] [--batch 50] [--tk]
+Sans --tk, un modèle en mémoire du widget Text est utilisé (pas d'affichage requis).
+"""
+
+import argparse
+import time
+from event_journal import EventJournal
+
+MAX_LINES = 150
+
+
+class MemoryText:
+    """Modèle minimal de tk.Text : une liste de lignes et une ligne vide finale"""
+
+    def __init__(self):
+        self.lines = [""]
+
+    def insert(self, index, *chunks):
+        text = "".join(chunks[::2])
+        new_lines = text.split("\n")
+        # Insertion avant la ligne vide finale, comme tk.Text à l'index "end"
+        self.lines[-1:] = new_lines[:-1] + [new_lines[-1] + self.lines[-1]]
+
+    def index(self, index):
+        return f"{len(self.lines) + 1}.0"
+
+    def tag_add(self, tag, start, end):
+        pass
+
+    def get(self, start, end):
+        return "\n".join(self.lines) + "\n"
+
+    def delete(self, start, end):
+        last = int(end.split(".")[0]) - 1
+        del self.lines[:last]
+
+    def see(self, index):
+        pass
+
+
+def legacy_log(widget, message, tag):
+    """Ancien log_event : insertion, tag, puis relecture du journal entier"""
+    start_pos = widget.index("end")
+    widget.insert("end", message)
+    line = start_pos.split('.')[0]
+    widget.tag_add(tag, f"{line}.0", f"{line}.end")
+    widget.see("end")
+
+    lines = widget.get("1.0", "end").split("\n")
+    if len(lines) > MAX_LINES:
+        widget.delete("1.0", f"{len(lines) - MAX_LINES}.0")
+
+
+def run(widget_factory, events, batch):
+    message = "[12:00:00] ⚠️ Température élevée: 31.2°C - alarme de test en rafale\n"
+
+    widget = widget_factory()
+    started = time.perf_counter()
+    for _ in range(events):
+        legacy_log(widget, message, "WARNING")
+    legacy = time.perf_counter() - started
+
+    widget = widget_factory()
+    journal = EventJournal(MAX_LINES)
+    started = time.perf_counter()
+    for i in range(events):
+        journal.append(message, "WARNING")
+        if (i + 1) % batch == 0:
+            journal.flush(widget)
+    journal.flush(widget)
+    batched = time.perf_counter() - started
+
+    return legacy, batched
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark du journal des événements en rafale")
+    parser.add_argument('--events', type=int, default=20000, help="nombre d'événements")
+    parser.add_argument('--batch', type=int, default=50, help="événements par image (insertion groupée)")
+    parser.add_argument('--tk', action='store_true', help="utiliser un vrai widget ScrolledText")
+    args = parser.parse_args(argv)
+
+    if args.tk:
+        import tkinter as tk
+        from tkinter import scrolledtext
+        root = tk.Tk()
+        root.withdraw()
+        widget_factory = lambda: scrolledtext.ScrolledText(root)
+    else:
+        widget_factory = MemoryText
+
+    legacy, batched = run(widget_factory, args.events, args.batch)
+    print(f"📜 {args.events} événements, limite {MAX_LINES} lignes, lots de {args.batch}")
+    print(f"🐢 Insertion + relecture par événement : {legacy:.3f}s ({args.events / legacy:.0f} évt/s)")
+    print(f"🚀 Insertion groupée par image        : {batched:.3f}s ({args.events / batched:.0f} évt/s)")
+    print(f"📊 Accélération : x{legacy / batched:.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,195 @@
+"""
+Moteur vectorisé Climate & Air Quality pour un parc de N pièces
+Mêmes règles que ClimateModule, appliquées en une opération NumPy par cycle
+"""
+
+import numpy as np
+from alarm_rules import RULES, MaskEvaluator
+from clock import WALL_CLOCK
+from config import CLIMATE_CONFIG
+from command_queue import CommandQueue
+from scenario_registry import REGISTRY
+from scenario_stack import ScenarioStack
+from sim_logging import get_logger
+
+log = get_logger('fleet')
+
+
+class ClimateFleet:
+    def __init__(self, n_rooms, clock=None, seed=None):
+        self.clock = clock if clock is not None else WALL_CLOCK
+        self.n_rooms = n_rooms
+        self.rng = np.random.default_rng(seed)
+
+        self.temperature = np.full(n_rooms, 24.0)
+        self.humidity = np.full(n_rooms, 50.0)
+        self.co2 = np.full(n_rooms, 600, dtype=np.int64)
+        self.ventilator_on = np.zeros(n_rooms, dtype=bool)
+        self.forced_ventilation = np.zeros(n_rooms, dtype=bool)
+        self.last_update = self.clock.time()
+
+        # Scénarios forcés par pièce (NaN = pas de valeur forcée), dérivés des scénarios actifs
+        self.scenarios = ScenarioStack()
+        self.scenario_active = np.zeros(n_rooms, dtype=bool)
+        self.scenario_end_time = np.zeros(n_rooms)
+        self.forced_temp = np.full(n_rooms, np.nan)
+        self.forced_co2 = np.full(n_rooms, np.nan)
+
+        # Commandes externes appliquées par lot au début du cycle capteurs
+        self.commands = CommandQueue()
+
+        # Règles d'alarme de ClimateModule, évaluées en masques une fois par cycle capteurs
+        self.alarm_rules = MaskEvaluator(RULES.for_module('climate'), n_rooms, self.clock)
+        self.alarm_state = self.alarm_rules.evaluate(self)
+
+    def update_sensors(self):
+        """Met à jour les capteurs simulés de toutes les pièces"""
+        self.commands.apply(self)
+        current_time = self.clock.time()
+        n = self.n_rooms
+        rng = self.rng
+
+        # Expiration des scénarios forcés (sommet du tas, sans parcourir les pièces)
+        if self.scenarios.expire(current_time):
+            self._apply_scenarios()
+
+        # Température : marche aléatoire bornée ou valeur forcée bruitée
+        temp_min, temp_max = CLIMATE_CONFIG['temp_range']
+        has_forced_temp = ~np.isnan(self.forced_temp)
+        walk = np.clip(self.temperature + rng.uniform(-0.3, 0.3, n), temp_min, temp_max)
+        forced = self.forced_temp + rng.uniform(-0.5, 0.5, n)
+        self.temperature = np.where(has_forced_temp, forced, walk)
+
+        # CO₂ : pas entier dans [-15, 15] ou valeur forcée tronquée comme int()
+        co2_min, co2_max = CLIMATE_CONFIG['co2_range']
+        has_forced_co2 = ~np.isnan(self.forced_co2)
+        walk = np.clip(self.co2 + rng.integers(-15, 16, n), co2_min, co2_max)
+        forced = np.trunc(self.forced_co2 + rng.uniform(-20, 20, n))
+        self.co2 = np.where(has_forced_co2, forced, walk).astype(np.int64)
+
+        # Humidité
+        hum_min, hum_max = CLIMATE_CONFIG['humidity_range']
+        self.humidity = np.clip(self.humidity + rng.uniform(-1, 1, n), hum_min, hum_max)
+
+        self.alarm_state = self.alarm_rules.evaluate(self)
+        self.last_update = current_time
+
+    def update_control_logic(self):
+        """Hystérésis ventilateur / ventilation forcée sur toutes les pièces"""
+        # Les seuils "on" et "off" sont disjoints : entre les deux, l'état est conservé
+        self.ventilator_on = (
+            (self.ventilator_on | (self.temperature > CLIMATE_CONFIG['temp_ventilation_on']))
+            & ~(self.temperature < CLIMATE_CONFIG['temp_ventilation_off'])
+        )
+        self.forced_ventilation = (
+            (self.forced_ventilation | (self.co2 > CLIMATE_CONFIG['co2_forced_ventilation']))
+            & ~(self.co2 < CLIMATE_CONFIG['co2_normal'])
+        )
+
+    def force_scenario(self, scenario_type, duration, rooms=None, priority=0):
+        """Force un scénario sur une sélection de pièces (toutes par défaut)
+
+        rooms accepte un indice, une liste d'indices ou un masque booléen.
+        Les scénarios se superposent comme dans ClimateModule ; retourne l'identifiant.
+        """
+        scenario_id = self._push_scenario(scenario_type, duration, rooms, priority)
+        self._apply_scenarios()
+        return scenario_id
+
+    def cancel_scenario(self, scenario_id):
+        """Interrompt un scénario avant son échéance"""
+        if self.scenarios.cancel(scenario_id):
+            self._apply_scenarios()
+
+    def _push_scenario(self, scenario_type, duration, rooms, priority):
+        selected = np.arange(self.n_rooms)
+        if rooms is not None:
+            selected = np.atleast_1d(selected[rooms])
+        return self.scenarios.push(scenario_type, REGISTRY.values_for(scenario_type, 'climate'),
+                                   self.clock.time() + duration, priority, target=selected)
+
+    def _apply_scenarios(self):
+        """Recalcule les tableaux forcés : une affectation vectorisée par scénario actif"""
+        self.scenario_active[:] = False
+        self.scenario_end_time[:] = 0
+        self.forced_temp[:] = np.nan
+        self.forced_co2[:] = np.nan
+
+        # Du moins au plus prioritaire : les affectations suivantes écrasent les précédentes
+        for scenario in self.scenarios.active():
+            rooms = scenario.target
+            self.scenario_active[rooms] = True
+            self.scenario_end_time[rooms] = np.maximum(self.scenario_end_time[rooms], scenario.end_time)
+            for attribute, value in scenario.values.items():
+                getattr(self, attribute)[rooms] = value
+
+    def apply_commands(self, commands):
+        """Applique un lot de commandes dans l'ordre, en fusionnant les scénarios identiques
+
+        Dans une suite de force_scenario consécutifs, ceux de même type, durée
+        et priorité deviennent un seul scénario sur l'union de leurs pièces ;
+        les groupes sont empilés dans l'ordre de leur dernière commande et les
+        tableaux forcés recalculés une seule fois. Toute autre commande
+        (cancel_scenario...) applique d'abord les scénarios qui la précèdent.
+        Une commande invalide est journalisée et ignorée ; retourne le nombre
+        de commandes rejetées.
+        """
+        all_rooms = np.arange(self.n_rooms)
+        groups = {}
+        failed = 0
+        for position, (name, args) in enumerate(commands):
+            try:
+                if name != 'force_scenario':
+                    failed += self._flush_scenario_groups(groups)
+                    getattr(self, name)(*args)
+                    continue
+
+                scenario_type, duration = args[0], args[1]
+                rooms = args[2] if len(args) > 2 else None
+                priority = args[3] if len(args) > 3 else 0
+                selected = all_rooms if rooms is None else np.atleast_1d(all_rooms[rooms])
+            except Exception as e:
+                failed += 1
+                log.error("❌ Commande %s%s rejetée: %s", name, args, e)
+                continue
+
+            group = groups.setdefault((scenario_type, duration, priority), [0, []])
+            group[0] = position
+            group[1].append(selected)
+
+        return failed + self._flush_scenario_groups(groups)
+
+    def _flush_scenario_groups(self, groups):
+        """Empile les groupes de force_scenario en attente puis recalcule les tableaux forcés"""
+        if not groups:
+            return 0
+        failed = 0
+        ordered = sorted(groups.items(), key=lambda item: item[1][0])
+        groups.clear()
+        for (scenario_type, duration, priority), (_, chunks) in ordered:
+            try:
+                self._push_scenario(scenario_type, duration, np.unique(np.concatenate(chunks)), priority)
+            except Exception as e:
+                failed += len(chunks)
+                log.error("❌ Scénario %s rejeté (%d commandes): %s", scenario_type, len(chunks), e)
+        self._apply_scenarios()
+        return failed
+
+    def alarm_masks(self):
+        """Retourne les masques booléens des alarmes actives par pièce (par identifiant de règle)"""
+        return self.alarm_state
+
+    def get_status(self, room):
+        """Retourne l'état d'une pièce (même format que ClimateModule.get_status)"""
+        return {
+            'temperature': round(float(self.temperature[room]), 1),
+            'humidity': round(float(self.humidity[room]), 1),
+            'co2': int(self.co2[room]),
+            'ventilator_on': bool(self.ventilator_on[room]),
+            'forced_ventilation': bool(self.forced_ventilation[room]),
+            'scenario_active': bool(self.scenario_active[room]),
+        }
+
+    def get_alarms(self, room):
+        """Retourne les alarmes actives d'une pièce (objets Alarm, mêmes règles que ClimateModule)"""
+        return self.alarm_rules.alarms(self, room)
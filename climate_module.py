@@ -3,21 +3,49 @@ Module de simulation Climate & Air Quality
 Gère la température, humidité, CO₂ et contrôle de ventilation
 """
 
+import math
 import random
-import time
-from config import CLIMATE_CONFIG
+from alarm_rules import RULES, AlarmEvaluator
+from clock import WALL_CLOCK
+from config import CLIMATE_CONFIG, MODULE_RATES, UPDATE_INTERVAL
+from command_queue import CommandQueue
+from scenario_registry import REGISTRY
+from scenario_stack import ScenarioStack
+from state_cache import StateCache
 
 
 class ClimateModule:
-    def __init__(self):
+    FORCED_ATTRIBUTES = ('forced_temp', 'forced_co2')
+    
+    def __init__(self, clock=None):
+        self.clock = clock if clock is not None else WALL_CLOCK
+        
+        # Cadences d'échantillonnage et de contrôle propres au module
+        self.sensor_interval = MODULE_RATES['climate']['sensor_interval']
+        self.control_interval = MODULE_RATES['climate']['control_interval']
+        
         self.temperature = 24.0
         self.humidity = 50.0
         self.co2 = 600
         self.ventilator_on = False
         self.forced_ventilation = False
-        self.last_update = time.time()
+        self.last_update = self.clock.time()
+        
+        # Noyau d'événements optionnel (expiration des scénarios programmée)
+        self.kernel = None
+        
+        # Commandes externes (scénarios...) appliquées au début du cycle capteurs
+        self.commands = CommandQueue()
+        
+        # Vues get_status / get_alarms en cache jusqu'au prochain changement d'état
+        self.state_cache = StateCache()
         
-        # Variables pour scénarios forcés
+        # Règles d'alarme de config.ALARM_RULES (hystérésis, durée minimale)
+        self.alarm_rules = AlarmEvaluator(RULES.for_module('climate'), self.clock)
+        self.alarms = []
+        
+        # Scénarios actifs superposables ; les variables ci-dessous en sont dérivées
+        self.scenarios = ScenarioStack()
         self.scenario_active = False
         self.scenario_end_time = 0
         self.forced_temp = None
@@ -25,13 +53,16 @@ class ClimateModule:
     
     def update_sensors(self):
         """Met à jour les valeurs des capteurs simulés"""
-        current_time = time.time()
+        # Appliquer les commandes reçues depuis le cycle précédent
+        self.commands.apply(self)
+        
+        current_time = self.clock.time()
         
         # Vérifier si un scénario forcé est actif
-        if self.scenario_active and current_time > self.scenario_end_time:
-            self.scenario_active = False
-            self.forced_temp = None
-            self.forced_co2 = None
+        self.expire_scenario()
+        
+        # Pas des marches aléatoires ramenés à la cadence du module (voir MODULE_RATES)
+        noise = math.sqrt(self.sensor_interval / UPDATE_INTERVAL)
         
         # Générer valeurs aléatoires ou utiliser valeurs forcées
         if self.forced_temp is not None:
@@ -39,7 +70,7 @@ class ClimateModule:
         else:
             # Variation normale de température
             temp_min, temp_max = CLIMATE_CONFIG['temp_range']
-            self.temperature += random.uniform(-0.3, 0.3)
+            self.temperature += random.uniform(-0.3, 0.3) * noise
             self.temperature = max(temp_min, min(temp_max, self.temperature))
         
         if self.forced_co2 is not None:
@@ -47,15 +78,17 @@ class ClimateModule:
         else:
             # Variation normale de CO₂
             co2_min, co2_max = CLIMATE_CONFIG['co2_range']
-            self.co2 += random.randint(-15, 15)
+            self.co2 += round(random.randint(-15, 15) * noise)
             self.co2 = max(co2_min, min(co2_max, self.co2))
         
         # Humidité varie normalement
         hum_min, hum_max = CLIMATE_CONFIG['humidity_range']
-        self.humidity += random.uniform(-1, 1)
+        self.humidity += random.uniform(-1, 1) * noise
         self.humidity = max(hum_min, min(hum_max, self.humidity))
         
         self.last_update = current_time
+        self.state_cache.invalidate()
+        self._evaluate_alarms()
     
     def update_control_logic(self):
         """Met à jour la logique de contrôle des actionneurs"""
@@ -70,21 +103,50 @@ class ClimateModule:
             self.forced_ventilation = True
         elif self.co2 < CLIMATE_CONFIG['co2_normal']:
             self.forced_ventilation = False
+        
+        self.state_cache.invalidate()
+        self._evaluate_alarms()
+    
+    def expire_scenario(self):
+        """Retire les scénarios dont la durée est écoulée (tas trié par échéance)"""
+        if self.scenarios.expire(self.clock.time()):
+            self._apply_scenarios()
     
-    def force_scenario(self, scenario_type, duration):
-        """Force un scénario spécifique pendant une durée donnée"""
-        self.scenario_active = True
-        self.scenario_end_time = time.time() + duration
-        
-        if scenario_type == 'high_temperature':
-            self.forced_temp = 32.0
-        elif scenario_type == 'low_temperature':
-            self.forced_temp = 22.0
-        elif scenario_type == 'high_co2':
-            self.forced_co2 = 1200
+    def force_scenario(self, scenario_type, duration, priority=0):
+        """Force un scénario pendant une durée donnée et retourne son identifiant
+        
+        Les scénarios se superposent : pour chaque valeur forcée, le plus
+        prioritaire l'emporte (à priorité égale, le plus récent).
+        """
+        end_time = self.clock.time() + duration
+        scenario_id = self.scenarios.push(scenario_type, REGISTRY.values_for(scenario_type, 'climate'),
+                                          end_time, priority)
+        if self.kernel is not None:
+            self.kernel.schedule(end_time, self.expire_scenario)
+        
+        self._apply_scenarios()
+        return scenario_id
+    
+    def cancel_scenario(self, scenario_id):
+        """Interrompt un scénario avant son échéance"""
+        if self.scenarios.cancel(scenario_id):
+            self._apply_scenarios()
+    
+    def _apply_scenarios(self):
+        """Recalcule les valeurs forcées à partir des scénarios actifs"""
+        forced = self.scenarios.resolved()
+        for attribute in self.FORCED_ATTRIBUTES:
+            setattr(self, attribute, forced.get(attribute))
+        self.scenario_active = self.scenarios.active_count > 0
+        self.scenario_end_time = self.scenarios.end_time()
+        self.state_cache.invalidate()
     
     def get_status(self):
-        """Retourne l'état actuel du module"""
+        """Retourne l'état actuel du module (en cache jusqu'au prochain changement d'état)"""
+        return self.state_cache.get('status', self._build_status)
+    
+    def _build_status(self):
+        """Construit le dictionnaire d'état du module"""
         return {
             'temperature': round(self.temperature, 1),
             'humidity': round(self.humidity, 1),
@@ -95,13 +157,10 @@ class ClimateModule:
         }
     
     def get_alarms(self):
-        """Retourne les alarmes actives"""
-        alarms = []
-        
-        if self.temperature > CLIMATE_CONFIG['temp_ventilation_on']:
-            alarms.append(f"Température élevée: {self.temperature:.1f}°C")
-        
-        if self.co2 > CLIMATE_CONFIG['co2_forced_ventilation']:
-            alarms.append(f"CO₂ élevé: {self.co2} ppm")
-        
-        return alarms
\ No newline at end of file
+        """Retourne les alarmes actives évaluées au dernier cycle (objets Alarm)"""
+        return self.alarms
+    
+    def _evaluate_alarms(self):
+        """Fait avancer les règles d'alarme sur l'échantillon courant (à chaque cycle)"""
+        self.alarms = self.alarm_rules.evaluate(self)
+        return self.alarms
\ No newline at end of file
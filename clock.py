@@ -0,0 +1,57 @@
+"""
+Horloges de simulation
+WallClock suit le temps réel, VirtualClock fait avancer le temps sans dormir
+"""
+
+import threading
+import time
+
+
+class WallClock:
+    """Horloge temps réel (time.time / time.sleep)"""
+
+    realtime = True
+
+    def time(self):
+        """Retourne l'heure courante en secondes"""
+        return time.time()
+
+    def sleep(self, seconds):
+        """Attend réellement la durée demandée"""
+        if seconds > 0:
+            time.sleep(seconds)
+
+
+class VirtualClock:
+    """Horloge virtuelle : sleep() fait avancer le temps instantanément"""
+
+    realtime = False
+
+    def __init__(self, start=None):
+        # Démarrer à l'heure réelle pour garder des horodatages lisibles
+        self._now = time.time() if start is None else float(start)
+        self._lock = threading.Lock()
+
+    def time(self):
+        """Retourne l'heure virtuelle courante en secondes"""
+        return self._now
+
+    def sleep(self, seconds):
+        """Avance le temps virtuel sans bloquer"""
+        self.advance(seconds)
+
+    def advance(self, seconds):
+        """Avance le temps virtuel d'une durée donnée"""
+        if seconds > 0:
+            with self._lock:
+                self._now += seconds
+
+    def advance_to(self, timestamp):
+        """Avance le temps virtuel jusqu'à un instant donné (jamais en arrière)"""
+        with self._lock:
+            if timestamp > self._now:
+                self._now = timestamp
+
+
+# Horloge partagée par défaut par tous les modules
+WALL_CLOCK = WallClock()
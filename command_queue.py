@@ -0,0 +1,61 @@
+"""
+File de commandes appliquées aux limites de cycle
+Les commandes externes (boutons de l'HMI, gestionnaire de scénarios, scripts)
+ne modifient plus directement un module : elles sont mises en file et le module
+les applique lui-même au début de son prochain cycle capteurs, dans le thread
+de la simulation. deque.append / extend / popleft étant atomiques, producteurs
+et consommateur n'ont besoin d'aucun verrou.
+"""
+
+from collections import deque
+from sim_logging import get_logger
+
+log = get_logger('commands')
+
+
+class CommandQueue:
+    def __init__(self):
+        self._pending = deque()
+        self.applied = 0
+        self.failed = 0
+        self.batches = 0
+
+    def submit(self, name, *args):
+        """Demande l'appel target.name(*args) au début du prochain cycle"""
+        self._pending.append((name, args))
+
+    def submit_many(self, commands):
+        """Ajoute un lot de commandes (name, args) en une seule opération"""
+        self._pending.extend(commands)
+
+    @property
+    def pending(self):
+        return len(self._pending)
+
+    def take(self):
+        """Retire les commandes présentes au début du cycle (les suivantes attendent le prochain)"""
+        pending = self._pending
+        return [pending.popleft() for _ in range(len(pending))]
+
+    def apply(self, target):
+        """Applique les commandes en attente à target, par lot si target sait le faire"""
+        batch = self.take()
+        if not batch:
+            return 0
+
+        self.batches += 1
+        if hasattr(target, 'apply_commands'):
+            # Le module isole lui-même les commandes invalides et retourne leur nombre
+            failed = target.apply_commands(batch) or 0
+            self.failed += failed
+            self.applied += len(batch) - failed
+            return len(batch)
+
+        for name, args in batch:
+            try:
+                getattr(target, name)(*args)
+                self.applied += 1
+            except Exception as e:
+                self.failed += 1
+                log.error("❌ Commande %s%s rejetée: %s", name, args, e)
+        return len(batch)
@@ -5,6 +5,21 @@ Configuration du système de simulation de monitoring intelligent
 # Intervalle de mise à jour principal (en secondes)
 UPDATE_INTERVAL = 2.0
 
+# Cadences propres à chaque module (en secondes) : échantillonnage des capteurs
+# et logique de contrôle. Les pas des marches aléatoires sont définis pour un
+# échantillon toutes les UPDATE_INTERVAL secondes ; chaque module les met à
+# l'échelle de sa cadence (dérives × intervalle / UPDATE_INTERVAL, bruits ×
+# racine de ce rapport) : un module plus rapide évolue plus finement, pas plus vite.
+MODULE_RATES = {
+    'climate': {'sensor_interval': 10.0, 'control_interval': 10.0},   # Température et CO₂ lents
+    'presence': {'sensor_interval': UPDATE_INTERVAL, 'control_interval': UPDATE_INTERVAL},
+    'battery': {'sensor_interval': 0.5, 'control_interval': 1.0},     # Courant échantillonné vite
+}
+
+# Politique en cas de dépassement d'un cycle périodique :
+# 'skip' abandonne les échéances manquées, 'catch_up' les rattrape à la suite
+TICK_OVERRUN_POLICY = 'skip'
+
 # Délai avant déclenchement des scénarios automatiques (en secondes)
 SCENARIO_DELAY = 10.0
 
@@ -36,20 +51,135 @@ BATTERY_CONFIG = {
     'voltage_shutdown': 9.5,        # Seuil arrêt système (V)
 }
 
+# Configuration Battery Pack (modèle cellule par cellule)
+BATTERY_PACK_CONFIG = {
+    'series': 4,                     # Groupes de cellules en série
+    'parallel': 2,                   # Cellules en parallèle par groupe
+    'cell_voltage_range': (2.8, 4.2),  # Plage tension cellule (V)
+    'cell_current_range': (0, 5),    # Plage courant cellule (A)
+    'cell_voltage_low': 3.4,         # Seuil batterie faible par cellule (V)
+    'cell_voltage_critical': 3.2,    # Seuil batterie critique par cellule (V)
+    'cell_voltage_shutdown': 3.0,    # Seuil arrêt système par cellule (V)
+    'weak_cell_margin': 0.15,        # Écart sous la moyenne du pack pour cellule faible (V)
+    'imbalance_threshold': 0.1,      # Écart max entre groupes série (V)
+    'cell_temp_high': 45,            # Seuil température cellule élevée (°C)
+}
+
 # Configuration HMI
 HMI_CONFIG = {
     'window_title': 'Simulation Monitoring Intelligent',
     'window_size': '1000x700',
     'refresh_rate': 1000,           # Rafraîchissement interface (ms)
+    'journal_max_lines': 150,       # Lignes conservées dans le journal des événements
+    'journal_flush_ms': 16,         # Insertion groupée des événements (une fois par image)
+}
+
+# Bus d'événements entre les threads de simulation et l'interface
+EVENT_BUS_CONFIG = {
+    'max_events': 1000,             # Capacité du bus (au-delà, événements abandonnés)
+    'overflow_policy': 'drop_oldest',  # 'drop_oldest' ou 'drop_newest'
+    'drain_batch': 100,             # Événements traités au maximum par passage
+    'drain_interval_ms': 50,        # Période de vidage du bus par la boucle tkinter
+}
+
+# Historique des scénarios déclenchés
+SCENARIO_HISTORY_CONFIG = {
+    'capacity': 50,                 # Enregistrements conservés en mémoire (tampon circulaire)
+    'spill_path': None,             # Fichier JSON Lines de la piste d'audit complète (optionnel)
+}
+
+# Journalisation (voir sim_logging) : niveau global, niveaux par module, file d'écriture
+LOG_CONFIG = {
+    'level': 'INFO',
+    'levels': {},                   # Ex. {'presence': 'WARNING'} pour taire l'éclairage
+                                    # (ignorés si un niveau est donné en ligne de commande)
+    'format': '%(message)s',
+    'queue_size': 10000,            # Au-delà, les enregistrements sont abandonnés (jamais bloquant)
+}
+
+# Agrégation des nouvelles alarmes avant journalisation (tempêtes d'alarmes)
+ALARM_AGGREGATION_CONFIG = {
+    'dedup_window': 30,             # Même alarme, même source : signalée une fois par fenêtre (s)
+    'rate_limit': 5,                # Au plus une ligne par type d'alarme et par intervalle (s)
+    'max_sources_listed': 3,        # Sources citées dans une ligne de synthèse
+}
+
+# Règles d'alarme (compilées par alarm_rules au démarrage)
+# when : « attribut op valeur » (valeur littérale ou référence TABLE.clé de ce fichier)
+# hysteresis : écart de retour sous/au-dessus du seuil ; min_duration : persistance requise (s)
+ALARM_RULES = {
+    'climate.high_temperature': {'module': 'climate', 'when': 'temperature > CLIMATE_CONFIG.temp_ventilation_on',
+                                 'hysteresis': 0.5, 'severity': 'WARNING',
+                                 'message': "Température élevée: {temperature:.1f}°C", 'icon': '🌡️'},
+    'climate.high_co2': {'module': 'climate', 'when': 'co2 > CLIMATE_CONFIG.co2_forced_ventilation',
+                         'hysteresis': 50, 'severity': 'WARNING',
+                         'message': "CO₂ élevé: {co2} ppm", 'icon': '💨'},
+    'presence.lights_left_on': {'module': 'presence', 'when': 'lights_left_on', 'severity': 'WARNING',
+                                'message': "Lampes allumées sans présence détectée", 'icon': '💡'},
+    'battery.shutdown': {'module': 'battery', 'when': 'battery_status == "Shutdown"', 'severity': 'CRITICAL',
+                         'message': "CRITIQUE: Arrêt système imminent - {voltage:.2f}V", 'icon': '🔋'},
+    'battery.critical': {'module': 'battery', 'when': 'battery_status == "Critical"', 'severity': 'ERROR',
+                         'message': "Batterie critique - {voltage:.2f}V", 'icon': '🔋'},
+    'battery.low': {'module': 'battery', 'when': 'battery_status == "Low"', 'severity': 'WARNING',
+                    'message': "Batterie faible - {voltage:.2f}V", 'icon': '🔋'},
+    'battery.high_temperature': {'module': 'battery', 'when': 'temperature > 45', 'hysteresis': 2,
+                                 'severity': 'WARNING',
+                                 'message': "Température batterie élevée: {temperature:.1f}°C", 'icon': '🌡️'},
+    'battery.high_current': {'module': 'battery', 'when': 'current > 8', 'hysteresis': 0.5, 'min_duration': 4,
+                             'severity': 'WARNING', 'message': "Courant élevé: {current:.1f}A"},
+    # Pack cellule par cellule (battery_pack.BatteryPack), évaluées sur les grandeurs du pack
+    'battery_pack.shutdown': {'module': 'battery_pack', 'when': 'battery_status == "Shutdown"',
+                              'severity': 'CRITICAL', 'icon': '🔋',
+                              'message': "CRITIQUE: Arrêt système imminent - {pack_voltage:.2f}V"},
+    'battery_pack.critical': {'module': 'battery_pack', 'when': 'battery_status == "Critical"', 'severity': 'ERROR',
+                              'message': "Batterie critique - {pack_voltage:.2f}V", 'icon': '🔋'},
+    'battery_pack.low': {'module': 'battery_pack', 'when': 'battery_status == "Low"', 'severity': 'WARNING',
+                         'message': "Batterie faible - {pack_voltage:.2f}V", 'icon': '🔋'},
+    'battery_pack.high_temperature': {'module': 'battery_pack',
+                                      'when': 'max_temperature > BATTERY_PACK_CONFIG.cell_temp_high',
+                                      'severity': 'WARNING', 'icon': '🌡️',
+                                      'message': "Température cellule élevée: {max_temperature:.1f}°C"},
+    'battery_pack.weak_cells': {'module': 'battery_pack', 'when': 'weak_count > 0', 'severity': 'WARNING',
+                                'message': "{weak_count} cellule(s) faible(s) détectée(s)", 'icon': '🔋'},
+    'battery_pack.imbalance': {'module': 'battery_pack',
+                               'when': 'imbalance > BATTERY_PACK_CONFIG.imbalance_threshold',
+                               'severity': 'WARNING', 'message': "Déséquilibre du pack: {imbalance_mv:.0f} mV"},
+}
+
+# Historique des capteurs (timeseries) : un point par instantané publié
+TIMESERIES_CONFIG = {
+    'capacity': 3600,               # Points conservés par signal (tampon circulaire, mémoire fixe)
+    'signals': {
+        'climate': ('temperature', 'humidity', 'co2', 'ventilator_on', 'forced_ventilation'),
+        'presence': ('persons_count', 'movement_detected', 'lights_on'),
+        'battery': ('voltage', 'current', 'temperature', 'capacity_percent', 'power_save_mode'),
+    },
 }
 
 # Scénarios de simulation automatique
+# module : module ciblé ; les autres champs (hors duration / priority / icon / label / action)
+# sont les valeurs forcées (voir scenario_registry.FORCED_FIELDS pour les champs reconnus par module).
+# label est formaté une fois avec les valeurs du scénario : il suit toujours la configuration.
 SCENARIOS = {
-    'high_temperature': {'temp': 32, 'duration': 30},
-    'low_temperature': {'temp': 22, 'duration': 20},
-    'high_co2': {'co2': 1200, 'duration': 25},
-    'low_battery': {'voltage': 10.5, 'duration': 40},
-    'critical_battery': {'voltage': 9.8, 'duration': 15},
-    'presence_detected': {'persons': 3, 'movement': True, 'duration': 20},
-    'no_presence': {'persons': 0, 'movement': False, 'duration': 15},
+    'high_temperature': {'module': 'climate', 'temp': 32.0, 'duration': 30,
+                         'icon': '🔥', 'label': "Température critique ({temp:g}°C)",
+                         'action': "Test automatique du système de ventilation et alertes thermiques"},
+    'low_temperature': {'module': 'climate', 'temp': 22.0, 'duration': 20,
+                        'icon': '❄️', 'label': "Température basse ({temp:g}°C)",
+                        'action': "Test du système de chauffage et gestion thermique"},
+    'high_co2': {'module': 'climate', 'co2': 1200, 'duration': 25,
+                 'icon': '💨', 'label': "CO₂ dangereux ({co2}ppm)",
+                 'action': "Test ventilation forcée et purification air"},
+    'low_battery': {'module': 'battery', 'voltage': 10.5, 'current': 1.0, 'duration': 40,
+                    'icon': '🔋', 'label': "Batterie faible ({voltage:g}V)",
+                    'action': "Test alertes énergétiques et gestion consommation"},
+    'critical_battery': {'module': 'battery', 'voltage': 9.8, 'current': 0.5, 'duration': 15,
+                         'icon': '⚡', 'label': "Batterie critique ({voltage:g}V)",
+                         'action': "Test mode économie d'urgence et procédures sécurité"},
+    'presence_detected': {'module': 'presence', 'persons': 3, 'movement': True, 'duration': 20,
+                          'icon': '👥', 'label': "Présence détectée ({persons} pers.)",
+                          'action': "Test éclairage automatique et gestion occupation"},
+    'no_presence': {'module': 'presence', 'persons': 0, 'movement': False, 'duration': 15,
+                    'icon': '🚫', 'label': "Absence totale",
+                    'action': "Test extinction automatique et mode veille"},
 }
\ No newline at end of file
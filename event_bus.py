@@ -0,0 +1,76 @@
+"""
+Bus d'événements borné et thread-safe
+Les producteurs (gestionnaire de scénarios, modules, exports) publient depuis
+n'importe quel thread sans jamais bloquer ; le consommateur (boucle tkinter)
+vide le bus par lots. Quand le bus est plein, les événements sont abandonnés
+selon la politique choisie et comptés, au lieu de ralentir l'interface.
+"""
+
+import threading
+from collections import deque, namedtuple
+from config import EVENT_BUS_CONFIG
+
+BusEvent = namedtuple('BusEvent', ['message', 'event_type', 'show_timestamp'])
+
+
+class EventBus:
+    def __init__(self, max_events=None, overflow_policy=None):
+        self.max_events = max_events or EVENT_BUS_CONFIG['max_events']
+        self.overflow_policy = overflow_policy or EVENT_BUS_CONFIG['overflow_policy']
+        if self.overflow_policy not in ('drop_oldest', 'drop_newest'):
+            raise ValueError(f"Politique de débordement inconnue: {self.overflow_policy}")
+
+        self._events = deque()
+        self._lock = threading.Lock()
+
+        self.published = 0
+        self.delivered = 0
+        self.dropped = 0
+        self.dropped_by_type = {}
+        self.high_water = 0
+
+    def publish(self, message, event_type="INFO", show_timestamp=True):
+        """Publie un événement sans bloquer ; retourne False s'il a été abandonné"""
+        event = BusEvent(message, event_type, show_timestamp)
+        with self._lock:
+            self.published += 1
+            if len(self._events) >= self.max_events:
+                if self.overflow_policy == 'drop_newest':
+                    self._count_drop(event)
+                    return False
+                self._count_drop(self._events.popleft())
+
+            self._events.append(event)
+            if len(self._events) > self.high_water:
+                self.high_water = len(self._events)
+        return True
+
+    # Même signature que HMIInterface.log_event et les sinks
+    log_event = publish
+
+    def _count_drop(self, event):
+        self.dropped += 1
+        self.dropped_by_type[event.event_type] = self.dropped_by_type.get(event.event_type, 0) + 1
+
+    def drain(self, max_items=None):
+        """Retire et retourne jusqu'à max_items événements, dans l'ordre de publication"""
+        with self._lock:
+            count = len(self._events) if max_items is None else min(max_items, len(self._events))
+            batch = [self._events.popleft() for _ in range(count)]
+            self.delivered += count
+        return batch
+
+    @property
+    def pending(self):
+        """Nombre d'événements en attente de vidage"""
+        return len(self._events)
+
+    def as_dict(self):
+        return {
+            'published': self.published,
+            'delivered': self.delivered,
+            'dropped': self.dropped,
+            'dropped_by_type': dict(self.dropped_by_type),
+            'pending': len(self._events),
+            'high_water': self.high_water,
+        }
@@ -0,0 +1,55 @@
+"""
+Tampon du journal des événements de l'HMI
+Les événements sont mis en file puis insérés dans le widget Text en un seul
+appel par image ; le nombre de lignes est suivi ici, ce qui évite de relire tout
+le journal pour appliquer la limite de lignes.
+Ce module n'importe pas tkinter : il fonctionne avec tout objet exposant
+insert(), delete() et see() comme tk.Text.
+"""
+
+from collections import deque
+
+
+class EventJournal:
+    def __init__(self, max_lines=150):
+        self.max_lines = max_lines
+        self.line_count = 0
+        # Au-delà de max_lines, les plus anciens événements en attente ne seraient pas affichés
+        self.pending = deque(maxlen=max_lines)
+        self.dropped = 0
+        self.flushes = 0
+        self.inserted = 0
+
+    def append(self, text, tag):
+        """Met un événement (texte terminé par un saut de ligne) en attente d'affichage"""
+        if len(self.pending) == self.max_lines:
+            self.dropped += 1
+        self.pending.append((text, tag))
+
+    def flush(self, widget):
+        """Insère les événements en attente en un seul appel puis retire les lignes en trop"""
+        if not self.pending:
+            return 0
+
+        # insert(index, texte1, tags1, texte2, tags2, ...)
+        chunks = []
+        lines = 0
+        for text, tag in self.pending:
+            chunks.append(text)
+            chunks.append(tag)
+            lines += text.count("\n")
+        widget.insert("end", *chunks)
+        count = len(self.pending)
+        self.pending.clear()
+
+        # Limite de lignes appliquée à partir du compteur, sans relire le widget
+        self.line_count += lines
+        excess = self.line_count - self.max_lines
+        if excess > 0:
+            widget.delete("1.0", f"{excess + 1}.0")
+            self.line_count = self.max_lines
+
+        widget.see("end")
+        self.flushes += 1
+        self.inserted += count
+        return count
@@ -0,0 +1,197 @@
+"""
+Noyau de simulation à événements discrets
+File d'événements ordonnée par un tas : le noyau saute directement au prochain
+événement, en temps réel (WallClock) ou à vitesse maximale (VirtualClock)
+"""
+
+import heapq
+import itertools
+import math
+import threading
+from clock import WALL_CLOCK
+from config import TICK_OVERRUN_POLICY
+from sim_logging import get_logger
+
+log = get_logger('kernel')
+
+
+class TickStats:
+    """Statistiques d'un événement périodique : retard, gigue et dépassements"""
+
+    __slots__ = ('ticks', 'overruns', 'skipped', 'max_lateness', '_mean', '_m2')
+
+    def __init__(self):
+        self.ticks = 0
+        self.overruns = 0       # Cycles terminés après l'échéance suivante
+        self.skipped = 0        # Échéances abandonnées (politique 'skip')
+        self.max_lateness = 0.0
+        self._mean = 0.0
+        self._m2 = 0.0
+
+    def record(self, lateness):
+        """Enregistre le retard d'un cycle (algorithme de Welford)"""
+        self.ticks += 1
+        delta = lateness - self._mean
+        self._mean += delta / self.ticks
+        self._m2 += delta * (lateness - self._mean)
+        if lateness > self.max_lateness:
+            self.max_lateness = lateness
+
+    @property
+    def mean_lateness(self):
+        return self._mean
+
+    @property
+    def jitter(self):
+        """Écart type du retard au démarrage des cycles (s)"""
+        return math.sqrt(self._m2 / self.ticks) if self.ticks else 0.0
+
+    def as_dict(self):
+        return {
+            'ticks': self.ticks,
+            'overruns': self.overruns,
+            'skipped': self.skipped,
+            'mean_lateness_ms': round(self._mean * 1000, 3),
+            'max_lateness_ms': round(self.max_lateness * 1000, 3),
+            'jitter_ms': round(self.jitter * 1000, 3),
+        }
+
+
+class ScheduledEvent:
+    """Événement programmé ; interval non nul pour un événement périodique"""
+
+    __slots__ = ('time', 'priority', 'callback', 'args', 'interval', 'cancelled', 'policy', 'stats')
+
+    def __init__(self, time, callback, args, interval=None, policy=None, priority=0):
+        self.time = time
+        self.priority = priority
+        self.callback = callback
+        self.args = args
+        self.interval = interval
+        self.cancelled = False
+        self.policy = policy
+        self.stats = TickStats() if interval else None
+
+    def cancel(self):
+        """Annule l'événement (il sera ignoré lorsqu'il sortira de la file)"""
+        self.cancelled = True
+
+
+class EventKernel:
+    def __init__(self, clock=None):
+        self.clock = clock if clock is not None else WALL_CLOCK
+        self.running = False
+        self.events_processed = 0
+
+        self._queue = []
+        self._sequence = itertools.count()
+        # Réveille la boucle temps réel lorsqu'un événement plus proche est ajouté
+        self._condition = threading.Condition()
+
+    def schedule(self, at, callback, *args, priority=0):
+        """Programme callback(*args) à l'instant absolu at
+
+        À instant égal, les événements de plus petite priorité passent en premier.
+        """
+        return self._push(ScheduledEvent(at, callback, args, priority=priority))
+
+    def schedule_in(self, delay, callback, *args, priority=0):
+        """Programme callback(*args) dans delay secondes"""
+        return self.schedule(self.clock.time() + delay, callback, *args, priority=priority)
+
+    def schedule_every(self, interval, callback, *args, start=None, policy=None, priority=0):
+        """Programme callback(*args) toutes les interval secondes, à échéances absolues
+
+        policy : 'skip' abandonne les échéances déjà passées après un dépassement,
+        'catch_up' les exécute toutes à la suite (TICK_OVERRUN_POLICY par défaut).
+        """
+        if policy is None:
+            policy = TICK_OVERRUN_POLICY
+        if policy not in ('skip', 'catch_up'):
+            raise ValueError(f"Politique de dépassement inconnue: {policy}")
+        first = self.clock.time() if start is None else start
+        return self._push(ScheduledEvent(first, callback, args, interval, policy, priority))
+
+    def _push(self, event):
+        with self._condition:
+            heapq.heappush(self._queue, (event.time, event.priority, next(self._sequence), event))
+            self._condition.notify()
+        return event
+
+    def next_event_time(self):
+        """Instant du prochain événement non annulé (None si la file est vide)"""
+        with self._condition:
+            while self._queue and self._queue[0][3].cancelled:
+                heapq.heappop(self._queue)
+            return self._queue[0][0] if self._queue else None
+
+    def _pop_due(self, until):
+        """Attend puis retire le prochain événement à exécuter (None = fin de run)"""
+        with self._condition:
+            while self.running:
+                while self._queue and self._queue[0][3].cancelled:
+                    heapq.heappop(self._queue)
+
+                next_time = self._queue[0][0] if self._queue else None
+                due = next_time is not None and (until is None or next_time <= until)
+
+                # Temps virtuel : sauter directement au prochain événement
+                if not self.clock.realtime:
+                    if not due:
+                        return None
+                    self.clock.advance_to(next_time)
+                    return heapq.heappop(self._queue)[3]
+
+                # Temps réel : attendre l'échéance (un nouvel événement réveille la boucle)
+                now = self.clock.time()
+                if due and next_time <= now:
+                    return heapq.heappop(self._queue)[3]
+                if not due and until is not None and now >= until:
+                    return None
+                target = next_time if due else until
+                self._condition.wait(None if target is None else target - now)
+            return None
+
+    def run(self, until=None):
+        """Exécute les événements dans l'ordre jusqu'à until (ou stop())"""
+        self.running = True
+
+        while self.running:
+            event = self._pop_due(until)
+            if event is None:
+                break
+
+            if event.stats is not None:
+                event.stats.record(self.clock.time() - event.time)
+
+            try:
+                event.callback(*event.args)
+            except Exception as e:
+                log.error("❌ Erreur dans l'événement %s: %s", getattr(event.callback, '__name__', event.callback), e)
+            self.events_processed += 1
+
+            if event.interval and not event.cancelled:
+                self._reschedule(event)
+
+        # En temps virtuel, l'horloge termine exactement à until
+        if until is not None and not self.clock.realtime and self.running:
+            self.clock.advance_to(until)
+        self.running = False
+
+    def _reschedule(self, event):
+        """Reprogramme un événement périodique sur sa grille d'échéances absolues"""
+        # Nombre d'échéances de la grille déjà dépassées à la fin du cycle
+        missed = int((self.clock.time() - event.time) // event.interval)
+        if missed >= 1:
+            event.stats.overruns += 1
+            if event.policy == 'skip':
+                event.stats.skipped += missed
+                event.time += missed * event.interval
+        event.time += event.interval
+        self._push(event)
+
+    def stop(self):
+        """Interrompt run() (appelable depuis un autre thread)"""
+        with self._condition:
+            self.running = False
+            self._condition.notify()
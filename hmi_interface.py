@@ -6,15 +6,28 @@ Design moderne avec thème sombre et animations
 import tkinter as tk
 from tkinter import ttk, scrolledtext
 import time
-from config import HMI_CONFIG, SCENARIOS
+from alarm_aggregator import AlarmAggregator
+from alarms import diff_alarms
+from config import EVENT_BUS_CONFIG, HMI_CONFIG
+from event_journal import EventJournal
+from hmi_render import DiffRenderer, display_values, system_indicator
+from scenario_registry import REGISTRY
 
 
 class HMIInterface:
-    def __init__(self, root, climate_module, presence_module, battery_module):
+    def __init__(self, root, climate_module, presence_module, battery_module, snapshot_source=None):
         self.root = root
         self.climate_module = climate_module
         self.presence_module = presence_module
         self.battery_module = battery_module
+        # Module ciblé par chaque nom de module du registre, avec son libellé de journal
+        self.scenario_targets = {
+            'climate': (climate_module, "🌡️ Module Climate"),
+            'presence': (presence_module, "👥 Module Presence"),
+            'battery': (battery_module, "🔋 Module Battery"),
+        }
+        # Source d'instantanés publiés par la simulation (sinon lecture directe des modules)
+        self.snapshot_source = snapshot_source
         
         # Couleurs du thème moderne
         self.colors = {
@@ -46,6 +59,23 @@ class HMIInterface:
         
         # Variables pour les labels dynamiques
         self.status_vars = {}
+        
+        # Rendu différentiel : dernier état affiché et widgets effectivement modifiés
+        self.renderer = DiffRenderer()
+        self.last_rendered_status = None
+        self.rendered_widgets = 0
+        
+        # Journal : événements insérés par lots, une fois par image
+        self.journal = EventJournal(HMI_CONFIG['journal_max_lines'])
+        self.journal_flush_scheduled = False
+        
+        # Bus d'événements publiés par les autres threads (voir attach_event_bus)
+        self.event_bus = None
+        self.reported_drops = 0
+        # Identifiants des alarmes actives au dernier rafraîchissement
+        self.previous_alarm_ids = set()
+        # Nouvelles alarmes dédupliquées et regroupées avant d'atteindre le journal
+        self.alarm_aggregator = AlarmAggregator()
         self.setup_styles()
         self.create_interface()
         
@@ -752,157 +782,77 @@ class HMIInterface:
     
     def trigger_scenario(self, scenario_name):
         """Déclenche manuellement un scénario avec logging détaillé"""
-        if scenario_name in SCENARIOS:
-            scenario = SCENARIOS[scenario_name]
-            duration = scenario['duration']
-            
-            # Messages détaillés selon le scénario
-            scenario_descriptions = {
-                'high_temperature': f'🔥 SIMULATION: Température élevée (32°C) pendant {duration}s - Test ventilation',
-                'low_temperature': f'❄️ SIMULATION: Température basse (22°C) pendant {duration}s - Test chauffage',
-                'high_co2': f'💨 SIMULATION: CO₂ élevé (1200ppm) pendant {duration}s - Test ventilation forcée',
-                'low_battery': f'🔋 SIMULATION: Batterie faible (10.5V) pendant {duration}s - Test alertes',
-                'critical_battery': f'⚡ SIMULATION: Batterie critique (9.8V) pendant {duration}s - Test mode économie',
-                'presence_detected': f'👥 SIMULATION: Présence détectée (3 pers.) pendant {duration}s - Test éclairage',
-                'no_presence': f'🚫 SIMULATION: Absence totale pendant {duration}s - Test extinction auto'
-            }
+        definition = REGISTRY.get(scenario_name)
+        if definition is not None:
+            duration = definition.duration
             
-            description = scenario_descriptions.get(scenario_name, f'Scénario {scenario_name}')
-            self.log_event(description, "SCENARIO")
+            # Message détaillé à partir du libellé compilé par le registre
+            self.log_event(f"{definition.icon} SIMULATION: {definition.label} pendant {duration}s "
+                           f"- {definition.action}", "SCENARIO")
             
-            # Déclencher le scénario dans le bon module
-            if scenario_name in ['high_temperature', 'low_temperature', 'high_co2']:
-                self.climate_module.force_scenario(scenario_name, duration)
-                self.log_event(f"🌡️ Module Climate: Scénario '{scenario_name}' actif", "SYSTEM")
-            elif scenario_name in ['presence_detected', 'no_presence']:
-                self.presence_module.force_scenario(scenario_name, duration)
-                self.log_event(f"👥 Module Presence: Scénario '{scenario_name}' actif", "SYSTEM")
-            elif scenario_name in ['low_battery', 'critical_battery']:
-                self.battery_module.force_scenario(scenario_name, duration)
-                self.log_event(f"🔋 Module Battery: Scénario '{scenario_name}' actif", "SYSTEM")
+            # Déclencher le scénario dans le bon module (appliqué au début de son prochain cycle)
+            module, label = self.scenario_targets[definition.module]
+            module.commands.submit('force_scenario', scenario_name, duration, definition.priority)
+            self.log_event(f"{label}: Scénario '{scenario_name}' actif", "SYSTEM")
             
             # Logger la fin programée du scénario
             end_time = time.strftime("%H:%M:%S", time.localtime(time.time() + duration))
             self.log_event(f"⏰ Scénario se terminera automatiquement à {end_time}", "INFO")
     
+    def current_state(self):
+        """Retourne (statuts, alarmes) par module, lus une seule fois par rafraîchissement"""
+        snapshot = self.snapshot_source.latest() if self.snapshot_source else None
+        if snapshot is not None:
+            return snapshot.status, snapshot.alarms
+        
+        modules = {
+            'climate': self.climate_module,
+            'presence': self.presence_module,
+            'battery': self.battery_module,
+        }
+        statuses = {name: module.get_status() for name, module in modules.items()}
+        alarms = {name: module.get_alarms() for name, module in modules.items()}
+        return statuses, alarms
+    
     def update_display(self):
-        """Met à jour l'affichage avec les nouvelles valeurs"""
-        # Mettre à jour Climate
-        climate_status = self.climate_module.get_status()
-        
-        # Nouvelles variables pour le design moderne
-        if 'temp_display' in self.status_vars:
-            self.status_vars['temp_display'].set(str(climate_status['temperature']))
-        if 'humidity_display' in self.status_vars:
-            self.status_vars['humidity_display'].set(str(climate_status['humidity']))
-        if 'co2_display' in self.status_vars:
-            self.status_vars['co2_display'].set(str(climate_status['co2']))
-        
-        # LEDs et statuts des actionneurs
-        if 'ventilator_led' in self.status_vars:
-            self.status_vars['ventilator_led'].set("🟢" if climate_status['ventilator_on'] else "🔴")
-        if 'ventilator_status' in self.status_vars:
-            self.status_vars['ventilator_status'].set("ON" if climate_status['ventilator_on'] else "OFF")
-        
-        if 'forced_vent_led' in self.status_vars:
-            self.status_vars['forced_vent_led'].set("🟡" if climate_status['forced_ventilation'] else "🔴")
-        if 'forced_vent_status' in self.status_vars:
-            self.status_vars['forced_vent_status'].set("FORCÉE" if climate_status['forced_ventilation'] else "NORMAL")
-        
-        # Mettre à jour Presence
-        presence_status = self.presence_module.get_status()
-        
-        if 'movement_indicator' in self.status_vars:
-            self.status_vars['movement_indicator'].set("✅" if presence_status['movement_detected'] else "❌")
-        
-        if 'persons_display' in self.status_vars:
-            self.status_vars['persons_display'].set(str(presence_status['persons_count']))
-        
-        time_since = presence_status['time_since_movement']
-        if 'time_since_display' in self.status_vars:
-            self.status_vars['time_since_display'].set(str(int(time_since)) if time_since else "--")
-        
-        if 'lights_led' in self.status_vars:
-            self.status_vars['lights_led'].set("🟡" if presence_status['lights_on'] else "🔴")
-        if 'lights_status' in self.status_vars:
-            self.status_vars['lights_status'].set("ON" if presence_status['lights_on'] else "OFF")
-        
-        # Mettre à jour Battery
-        battery_status = self.battery_module.get_status()
-        
-        if 'voltage_display' in self.status_vars:
-            self.status_vars['voltage_display'].set(str(battery_status['voltage']))
-        if 'current_display' in self.status_vars:
-            self.status_vars['current_display'].set(str(battery_status['current']))
-        if 'battery_temp_display' in self.status_vars:
-            self.status_vars['battery_temp_display'].set(str(battery_status['temperature']))
-        
-        # Capacité avec icône dynamique
-        if 'capacity_bar' in self.status_vars:
-            capacity = battery_status['capacity_percent']
-            self.status_vars['capacity_bar'].set(f"{capacity}%")
-            
-            # Icône batterie selon la capacité
-            if 'battery_icon' in self.status_vars:
-                if capacity > 75:
-                    self.status_vars['battery_icon'].set("🔋")
-                elif capacity > 50:
-                    self.status_vars['battery_icon'].set("🔋")
-                elif capacity > 25:
-                    self.status_vars['battery_icon'].set("🪫")
-                else:
-                    self.status_vars['battery_icon'].set("🪫")
-        
-        # Statuts système avec LEDs
-        if 'battery_status_led' in self.status_vars:
-            status_leds = {
-                'Normal': '🟢',
-                'Low': '🟡', 
-                'Critical': '🟠',
-                'Shutdown': '🔴'
-            }
-            self.status_vars['battery_status_led'].set(status_leds.get(battery_status['battery_status'], '🔴'))
-        
-        if 'battery_status_text' in self.status_vars:
-            self.status_vars['battery_status_text'].set(battery_status['battery_status'].upper())
-        
-        if 'power_save_led' in self.status_vars:
-            self.status_vars['power_save_led'].set("🟡" if battery_status['power_save_mode'] else "🔴")
-        if 'power_save_text' in self.status_vars:
-            self.status_vars['power_save_text'].set("ACTIVÉ" if battery_status['power_save_mode'] else "DÉSACTIVÉ")
+        """Met à jour l'affichage avec les nouvelles valeurs (seulement les widgets modifiés)"""
+        statuses, alarms = self.current_state()
+        
+        # Même instantané que le dernier rendu : aucun widget à comparer
+        if statuses is self.last_rendered_status:
+            self.renderer.skip(self.rendered_widgets)
+        else:
+            self.render_state(statuses, alarms)
+            self.last_rendered_status = statuses
         
         # Mettre à jour l'horloge
         current_time = time.strftime("%H:%M:%S")
-        self.system_clock.configure(text=current_time)
-        
-        # Mettre à jour l'indicateur système global avec plus de détails
-        total_alarms = len(self.climate_module.get_alarms()) + len(self.presence_module.get_alarms()) + len(self.battery_module.get_alarms())
-        
-        if battery_status['battery_status'] == 'Shutdown':
-            self.system_status.configure(text="💀 SYSTÈME ARRÊT", fg=self.colors['accent_red'])
-        elif battery_status['battery_status'] == 'Critical':
-            self.system_status.configure(text="⚡ SYSTÈME CRITIQUE", fg=self.colors['accent_red'])
-        elif total_alarms > 2:
-            self.system_status.configure(text=f"🚨 {total_alarms} ALERTES", fg=self.colors['accent_red'])
-        elif total_alarms > 0:
-            self.system_status.configure(text=f"🟡 {total_alarms} ALERTE(S)", fg=self.colors['accent_orange'])
-        elif any([climate_status['scenario_active'], presence_status['scenario_active'], battery_status['scenario_active']]):
-            self.system_status.configure(text="🎭 SCÉNARIO ACTIF", fg=self.colors['accent_purple'])
-        else:
-            self.system_status.configure(text="🟢 SYSTÈME ACTIF", fg=self.colors['accent_green'])
+        self.renderer.configure('system_clock', self.system_clock, text=current_time)
         
         # Mettre à jour les alarmes
-        self.update_alarms()
+        self.update_alarms(statuses, alarms)
         
         # Programmer la prochaine mise à jour
         self.root.after(HMI_CONFIG['refresh_rate'], self.update_display)
     
-    def update_alarms(self):
+    def render_state(self, statuses, alarms):
+        """Compare l'état au dernier rendu et ne touche que les widgets modifiés"""
+        self.rendered_widgets = 1
+        for var_name, value in display_values(statuses).items():
+            if var_name in self.status_vars:
+                self.renderer.set_var(var_name, self.status_vars[var_name], value)
+                self.rendered_widgets += 1
+        
+        # Indicateur système global
+        text, color = system_indicator(statuses, alarms)
+        self.renderer.configure('system_status', self.system_status, text=text, fg=self.colors[color])
+    
+    def update_alarms(self, statuses, alarms):
         """Met à jour la section des alarmes et log les événements détaillés"""
-        # Récupérer les statuts actuels
-        climate_status = self.climate_module.get_status()
-        presence_status = self.presence_module.get_status()
-        battery_status = self.battery_module.get_status()
+        # Statuts du rafraîchissement courant
+        climate_status = statuses['climate']
+        presence_status = statuses['presence']
+        battery_status = statuses['battery']
         
         # Logger les changements d'état importants
         if hasattr(self, 'previous_states'):
@@ -934,27 +884,15 @@ class HMIInterface:
                 elif battery_status['battery_status'] == 'Normal':
                     self.log_event(f"✅ Batterie revenue à la normale - Tension: {voltage}V", "SUCCESS")
         
-        # Récupérer et logger les alarmes actuelles
-        climate_alarms = self.climate_module.get_alarms()
-        presence_alarms = self.presence_module.get_alarms()
-        battery_alarms = self.battery_module.get_alarms()
-        
-        # Logger les nouvelles alarmes uniquement
-        all_current_alarms = climate_alarms + presence_alarms + battery_alarms
-        
-        if hasattr(self, 'previous_alarms'):
-            new_alarms = [alarm for alarm in all_current_alarms if alarm not in self.previous_alarms]
-            for alarm in new_alarms:
-                if "température" in alarm.lower():
-                    self.log_event(f"🌡️ {alarm}", "WARNING")
-                elif "co₂" in alarm.lower():
-                    self.log_event(f"💨 {alarm}", "WARNING")
-                elif "batterie" in alarm.lower():
-                    self.log_event(f"🔋 {alarm}", "ERROR" if "critique" in alarm.lower() else "WARNING")
-                elif "lampe" in alarm.lower():
-                    self.log_event(f"💡 {alarm}", "WARNING")
-                else:
-                    self.log_event(alarm, "WARNING")
+        # Logger les nouvelles alarmes uniquement (différence d'ensembles d'identifiants :
+        # une alarme dont seule la valeur mesurée change n'est pas relogguée)
+        all_current_alarms = [alarm for name in ('climate', 'presence', 'battery') for alarm in alarms[name]]
+        new_alarms, _, current_alarm_ids = diff_alarms(self.previous_alarm_ids, all_current_alarms)
+        
+        if hasattr(self, 'previous_states'):
+            self.alarm_aggregator.submit(new_alarms)
+        for message, event_type in self.alarm_aggregator.flush():
+            self.log_event(message, event_type)
         
         # Sauvegarder les états pour la prochaine comparaison
         self.previous_states = {
@@ -964,7 +902,7 @@ class HMIInterface:
             'movement_detected': presence_status['movement_detected'],
             'battery_status': battery_status['battery_status']
         }
-        self.previous_alarms = all_current_alarms
+        self.previous_alarm_ids = current_alarm_ids
         
         # Logger des métriques périodiques (toutes les 30 secondes)
         if not hasattr(self, 'last_metrics_log'):
@@ -998,29 +936,41 @@ class HMIInterface:
         else:
             formatted_message = f"{icon} {message}\n"
         
-        # Insérer le message avec les tags de couleur
-        start_pos = self.alarms_text.index(tk.END)
-        self.alarms_text.insert(tk.END, formatted_message)
-        
-        # Appliquer le tag de couleur au message complet
-        line_start = f"{start_pos.split('.')[0]}.0"
-        line_end = f"{int(start_pos.split('.')[0])}.end"
-        self.alarms_text.tag_add(event_type, line_start, line_end)
+        # Mettre le message en attente avec son tag de couleur
+        self.journal.append(formatted_message, event_type)
+        self.event_count += 1
+        self.last_event_clock = current_time
         
-        # Faire défiler vers le bas
-        self.alarms_text.see(tk.END)
+        # Une seule insertion par image, quel que soit le nombre d'événements
+        if not self.journal_flush_scheduled:
+            self.journal_flush_scheduled = True
+            self.root.after(HMI_CONFIG['journal_flush_ms'], self.flush_journal)
+    
+    def flush_journal(self):
+        """Insère les événements en attente dans le journal et met à jour les statistiques"""
+        self.journal_flush_scheduled = False
+        self.journal.flush(self.alarms_text)
         
-        # Mettre à jour les statistiques
-        self.event_count += 1
         self.events_counter.configure(text=f"📊 Événements: {self.event_count}")
-        self.last_event_time.configure(text=f"⏰ Dernier: {current_time}")
-        
-        # Garder seulement les 150 dernières lignes pour éviter la surcharge
-        lines = self.alarms_text.get("1.0", tk.END).split("\n")
-        if len(lines) > 150:
-            # Supprimer les anciennes lignes
-            lines_to_remove = len(lines) - 150
-            self.alarms_text.delete("1.0", f"{lines_to_remove}.0")
+        self.last_event_time.configure(text=f"⏰ Dernier: {self.last_event_clock}")
+    
+    def attach_event_bus(self, event_bus):
+        """Vide périodiquement le bus d'événements depuis la boucle tkinter"""
+        self.event_bus = event_bus
+        self.root.after(EVENT_BUS_CONFIG['drain_interval_ms'], self.drain_event_bus)
+    
+    def drain_event_bus(self):
+        """Affiche un lot d'événements du bus (seul point d'entrée des autres threads)"""
+        for event in self.event_bus.drain(EVENT_BUS_CONFIG['drain_batch']):
+            self.log_event(event.message, event.event_type, event.show_timestamp)
+        
+        # Signaler les événements abandonnés depuis le dernier passage
+        dropped = self.event_bus.dropped
+        if dropped > self.reported_drops:
+            self.log_event(f"⚠️ {dropped - self.reported_drops} événement(s) abandonné(s) (bus saturé)", "WARNING")
+            self.reported_drops = dropped
+        
+        self.root.after(EVENT_BUS_CONFIG['drain_interval_ms'], self.drain_event_bus)
     
     def log_alarm(self, message):
         """Fonction de compatibilité - utilise le nouveau système"""
@@ -0,0 +1,117 @@
+"""
+Rendu différentiel de l'HMI
+Les textes affichés sont calculés à partir de l'état de la simulation, puis
+comparés au dernier rendu : seuls les widgets dont la valeur a changé sont mis à
+jour (chaque set() / configure() déclenche du travail de redessin côté Tk).
+Ce module n'importe pas tkinter : il fonctionne avec tout objet exposant
+set() ou configure().
+"""
+
+from clock import WALL_CLOCK
+
+BATTERY_STATUS_LEDS = {
+    'Normal': '🟢',
+    'Low': '🟡',
+    'Critical': '🟠',
+    'Shutdown': '🔴'
+}
+
+
+def display_values(statuses):
+    """Texte de chaque variable d'affichage de l'HMI pour un état donné"""
+    climate_status = statuses['climate']
+    presence_status = statuses['presence']
+    battery_status = statuses['battery']
+    time_since = presence_status['time_since_movement']
+    capacity = battery_status['capacity_percent']
+
+    return {
+        # Climate
+        'temp_display': str(climate_status['temperature']),
+        'humidity_display': str(climate_status['humidity']),
+        'co2_display': str(climate_status['co2']),
+        'ventilator_led': "🟢" if climate_status['ventilator_on'] else "🔴",
+        'ventilator_status': "ON" if climate_status['ventilator_on'] else "OFF",
+        'forced_vent_led': "🟡" if climate_status['forced_ventilation'] else "🔴",
+        'forced_vent_status': "FORCÉE" if climate_status['forced_ventilation'] else "NORMAL",
+        # Presence
+        'movement_indicator': "✅" if presence_status['movement_detected'] else "❌",
+        'persons_display': str(presence_status['persons_count']),
+        'time_since_display': str(int(time_since)) if time_since else "--",
+        'lights_led': "🟡" if presence_status['lights_on'] else "🔴",
+        'lights_status': "ON" if presence_status['lights_on'] else "OFF",
+        # Battery
+        'voltage_display': str(battery_status['voltage']),
+        'current_display': str(battery_status['current']),
+        'battery_temp_display': str(battery_status['temperature']),
+        'capacity_bar': f"{capacity}%",
+        'battery_icon': "🔋" if capacity > 50 else "🪫",
+        'battery_status_led': BATTERY_STATUS_LEDS.get(battery_status['battery_status'], '🔴'),
+        'battery_status_text': battery_status['battery_status'].upper(),
+        'power_save_led': "🟡" if battery_status['power_save_mode'] else "🔴",
+        'power_save_text': "ACTIVÉ" if battery_status['power_save_mode'] else "DÉSACTIVÉ",
+    }
+
+
+def system_indicator(statuses, alarms):
+    """Texte et couleur (clé du thème) de l'indicateur système global"""
+    battery_state = statuses['battery']['battery_status']
+    total_alarms = sum(len(module_alarms) for module_alarms in alarms.values())
+
+    if battery_state == 'Shutdown':
+        return "💀 SYSTÈME ARRÊT", 'accent_red'
+    if battery_state == 'Critical':
+        return "⚡ SYSTÈME CRITIQUE", 'accent_red'
+    if total_alarms > 2:
+        return f"🚨 {total_alarms} ALERTES", 'accent_red'
+    if total_alarms > 0:
+        return f"🟡 {total_alarms} ALERTE(S)", 'accent_orange'
+    if any(status['scenario_active'] for status in statuses.values()):
+        return "🎭 SCÉNARIO ACTIF", 'accent_purple'
+    return "🟢 SYSTÈME ACTIF", 'accent_green'
+
+
+class DiffRenderer:
+    def __init__(self, clock=None):
+        self.clock = clock if clock is not None else WALL_CLOCK
+        self.started = self.clock.time()
+        self.updates = 0
+        self.skipped = 0
+        # Dernière valeur rendue par widget / variable
+        self._rendered = {}
+
+    def set_var(self, key, variable, value):
+        """variable.set(value) seulement si la valeur affichée a changé"""
+        if self._rendered.get(key) == value:
+            self.skipped += 1
+            return False
+        variable.set(value)
+        self._rendered[key] = value
+        self.updates += 1
+        return True
+
+    def configure(self, key, widget, **options):
+        """widget.configure(**options) seulement si une option a changé"""
+        if self._rendered.get(key) == options:
+            self.skipped += 1
+            return False
+        widget.configure(**options)
+        self._rendered[key] = options
+        self.updates += 1
+        return True
+
+    def skip(self, count):
+        """Comptabilise des widgets non retouchés sans comparaison (état inchangé)"""
+        self.skipped += count
+
+    def saved_per_second(self):
+        """Mises à jour de widgets évitées par seconde depuis le démarrage"""
+        elapsed = self.clock.time() - self.started
+        return self.skipped / elapsed if elapsed > 0 else 0.0
+
+    def as_dict(self):
+        return {
+            'updates': self.updates,
+            'skipped': self.skipped,
+            'saved_per_second': round(self.saved_per_second(), 1),
+        }
@@ -3,59 +3,105 @@ Simulation de Monitoring Intelligent
 Système de simulation avec modules Climate, Presence, Battery et interface HMI
 
 Exécution : python main.py
+Mode sans interface : python main.py --headless [--duration 3600] [--sink jsonl --output run.jsonl]
+Temps virtuel (plus rapide que le temps réel) : python main.py --headless --virtual --duration 86400
+Runtime asyncio (un seul thread, avec ou sans interface) : python main.py --asyncio
+Rejouer un script de scénarios : python main.py --headless --virtual --script journee.txt --seed 1
 """
 
-import tkinter as tk
+import argparse
+import random
 import threading
-import time
 import signal
 import sys
+import sim_logging
+from clock import WALL_CLOCK, VirtualClock
 from config import UPDATE_INTERVAL
+from event_bus import EventBus
+from event_kernel import EventKernel
 
 # Import des modules
 from climate_module import ClimateModule
 from presence_module import PresenceModule
 from battery_module import BatteryModule
-from hmi_interface import HMIInterface
 from scenario_manager import ScenarioManager
+from scenario_script import load_script
+from snapshot import SnapshotPublisher
+from timeseries import TimeSeriesStore
+from sinks import ConsoleSink, JsonLinesSink, NullSink
+
+log = sim_logging.get_logger('main')
 
 
 class MonitoringSimulation:
-    def __init__(self):
+    def __init__(self, headless=False, sink=None, clock=None, use_asyncio=False, timeline=None):
         self.running = False
+        self.headless = headless
+        self.sink = sink
+        self.use_asyncio = use_asyncio
+        # Chronologie de scénarios scriptée (remplace les scénarios automatiques aléatoires)
+        self.timeline = timeline
+        self.clock = clock if clock is not None else WALL_CLOCK
+        if not self.clock.realtime and not headless:
+            raise ValueError("L'horloge virtuelle n'est disponible qu'en mode headless")
+        if not self.clock.realtime and use_asyncio:
+            raise ValueError("Le runtime asyncio fonctionne uniquement en temps réel")
+        if timeline is not None and use_asyncio:
+            raise ValueError("Les scripts de scénarios sont joués par le noyau à événements, pas par asyncio")
         
         # Initialiser les modules
         print("🚀 Démarrage de la simulation de monitoring intelligent...")
         
-        self.climate_module = ClimateModule()
-        self.presence_module = PresenceModule()
-        self.battery_module = BatteryModule()
+        self.climate_module = ClimateModule(self.clock)
+        self.presence_module = PresenceModule(self.clock)
+        self.battery_module = BatteryModule(self.clock)
+        self.modules = {
+            'climate': self.climate_module,
+            'presence': self.presence_module,
+            'battery': self.battery_module,
+        }
         
-        print("✅ Modules initialisés : Climate, Presence, Battery")
+        # Noyau à événements discrets : cycles, scénarios et minuteries
+        # (le runtime asyncio planifie lui-même les cycles et les scénarios)
+        self.kernel = EventKernel(self.clock)
+        if not use_asyncio:
+            for module in self.modules.values():
+                module.kernel = self.kernel
+        self.runtime = None
+        self.async_bridge = None
         
-        # Interface graphique
-        self.root = tk.Tk()
-        self.hmi_interface = HMIInterface(
-            self.root, 
-            self.climate_module, 
-            self.presence_module, 
-            self.battery_module
-        )
+        # Instantané cohérent de tous les modules, republié à chaque cycle,
+        # et historique des capteurs (mémoire fixe) alimenté par ces instantanés
+        self.history = TimeSeriesStore()
+        self.snapshots = SnapshotPublisher(self.modules, self.clock, self.history)
+        self.snapshots.publish()
+        
+        print("✅ Modules initialisés : Climate, Presence, Battery")
         
-        print("✅ Interface HMI créée")
+        # Interface graphique (tkinter n'est importé que si elle est demandée)
+        self.root = None
+        self.hmi_interface = None
+        self.event_bus = None
+        if not headless:
+            self._create_gui()
+            print("✅ Interface HMI créée")
+        else:
+            print("✅ Mode sans interface graphique")
         
-        # Gestionnaire de scénarios
+        # Gestionnaire de scénarios : bus d'événements vidé par l'HMI, ou sink en mode headless
         self.scenario_manager = ScenarioManager(
             self.climate_module,
             self.presence_module,
             self.battery_module,
-            self.hmi_interface
+            self.event_bus if self.hmi_interface else self.sink,
+            self.clock
         )
         
         print("✅ Gestionnaire de scénarios configuré")
         
-        # Thread pour la boucle de simulation
+        # Thread pour la boucle de simulation et événements périodiques des modules
         self.simulation_thread = None
+        self.tick_events = {}
         
         # Gestion de l'arrêt propre
         self.setup_signal_handlers()
@@ -70,20 +116,54 @@ class MonitoringSimulation:
         signal.signal(signal.SIGINT, signal_handler)
         signal.signal(signal.SIGTERM, signal_handler)
     
-    def start(self):
+    def _create_gui(self):
+        """Crée la fenêtre tkinter et l'interface HMI"""
+        import tkinter as tk
+        from hmi_interface import HMIInterface
+        
+        self.root = tk.Tk()
+        self.hmi_interface = HMIInterface(
+            self.root, 
+            self.climate_module, 
+            self.presence_module, 
+            self.battery_module,
+            snapshot_source=self.snapshots
+        )
+        
+        # Les threads de simulation ne touchent jamais tkinter : ils publient sur le bus
+        self.event_bus = EventBus()
+        self.hmi_interface.attach_event_bus(self.event_bus)
+    
+    def start(self, duration=None):
         """Démarre la simulation complète"""
-        self.running = True
+        if self.headless:
+            self.run_headless(duration)
+            return
         
-        # Démarrer la boucle de simulation dans un thread séparé
-        self.simulation_thread = threading.Thread(target=self._simulation_loop, daemon=True)
-        self.simulation_thread.start()
+        self.running = True
         
-        # Démarrer le gestionnaire de scénarios
-        self.scenario_manager.start()
+        if self.use_asyncio:
+            # Boucle asyncio pilotée par tkinter : simulation et HMI dans le même thread
+            # (asyncio n'est importé que si le runtime est demandé)
+            import asyncio
+            from async_runtime import AsyncSimulationRuntime, TkAsyncBridge
+            
+            self.runtime = AsyncSimulationRuntime([self])
+            loop = asyncio.new_event_loop()
+            self.runtime.start(loop)
+            self.async_bridge = TkAsyncBridge(self.root, loop)
+            self.async_bridge.start()
+        else:
+            # Démarrer la boucle de simulation dans un thread séparé
+            self.simulation_thread = threading.Thread(target=self._simulation_loop, daemon=True)
+            self.simulation_thread.start()
+            
+            # Programmer les scénarios (automatiques ou scriptés) dans le noyau
+            self._attach_scenarios()
         
         print("✅ Simulation démarrée")
         print(f"📊 Interface graphique en cours d'exécution...")
-        print(f"⏱️  Intervalle de mise à jour : {UPDATE_INTERVAL}s")
+        self.print_module_rates()
         print("🎮 Utilisez les boutons dans l'interface pour déclencher des scénarios manuels")
         print("🤖 Les scénarios automatiques se déclenchent toutes les ~10s")
         print("\\n" + "="*60)
@@ -100,10 +180,19 @@ class MonitoringSimulation:
             print("\\n🛑 Arrêt de la simulation en cours...")
             
             self.running = False
+            self.kernel.stop()
+            if self.runtime:
+                self.runtime.stop()
+            if self.async_bridge:
+                self.async_bridge.stop()
             
             # Arrêter le gestionnaire de scénarios
             self.scenario_manager.stop()
             
+            # Écrire les messages encore en file avant le bilan
+            dropped_logs = sim_logging.dropped()
+            sim_logging.shutdown()
+            
             # Fermer l'interface graphique si elle existe
             if self.root:
                 try:
@@ -112,32 +201,120 @@ class MonitoringSimulation:
                 except:
                     pass
             
+            # Bilan de la régularité des cycles
+            for name, event in self.tick_events.items():
+                stats = event.stats.as_dict()
+                print(f"⏱️  {name}: {stats['ticks']} cycles, retard moyen {stats['mean_lateness_ms']}ms, "
+                      f"max {stats['max_lateness_ms']}ms, gigue {stats['jitter_ms']}ms, "
+                      f"dépassements {stats['overruns']} ({stats['skipped']} échéances sautées)")
+            
+            # Lectures de statut / alarmes servies par le cache des modules
+            for name, module in self.modules.items():
+                cache = module.state_cache.as_dict()
+                print(f"🗃️  {name}: {cache['hits']} lectures en cache, {cache['misses']} reconstructions "
+                      f"(taux {cache['hit_rate']:.0%})")
+            
+            # Mises à jour de widgets évitées par le rendu différentiel de l'HMI
+            if self.hmi_interface:
+                render = self.hmi_interface.renderer.as_dict()
+                print(f"🖥️  HMI: {render['updates']} widgets mis à jour, {render['skipped']} inchangés "
+                      f"({render['saved_per_second']} mises à jour évitées/s)")
+            
+            if self.event_bus:
+                bus = self.event_bus.as_dict()
+                print(f"📨 Bus d'événements: {bus['published']} publiés, {bus['delivered']} affichés, "
+                      f"{bus['dropped']} abandonnés (max en attente {bus['high_water']})")
+            
+            history = self.history.as_dict()
+            print(f"📈 Historique: {history['points']} points conservés sur {history['total']} "
+                  f"({history['signals']} signaux, {history['bytes'] // 1024} Ko)")
+            
+            if dropped_logs:
+                print(f"📝 Journalisation: {dropped_logs} messages abandonnés (file pleine)")
+            
+            # Fermer le sink s'il écrit dans un fichier
+            if self.sink and hasattr(self.sink, 'close'):
+                self.sink.close()
+            
             print("✅ Simulation arrêtée proprement")
     
-    def _simulation_loop(self):
-        """Boucle principale de simulation"""
-        print("🔄 Boucle de simulation démarrée")
-        
-        while self.running:
-            try:
-                # Mettre à jour tous les capteurs
-                self.climate_module.update_sensors()
-                self.presence_module.update_sensors()
-                self.battery_module.update_sensors()
-                
-                # Appliquer la logique de contrôle
-                self.climate_module.update_control_logic()
-                self.presence_module.update_control_logic()
-                self.battery_module.update_control_logic()
-                
-                # Attendre avant la prochaine itération
-                time.sleep(UPDATE_INTERVAL)
-                
-            except Exception as e:
-                print(f"❌ Erreur dans la boucle de simulation: {e}")
-                time.sleep(1)
-        
-        print("🛑 Boucle de simulation arrêtée")
+    def run_headless(self, duration=None):
+        """Exécute la simulation sans interface dans le thread courant"""
+        self.running = True
+        
+        print("✅ Simulation démarrée (headless)")
+        self.print_module_rates()
+        if duration is not None:
+            print(f"⏳ Durée de la simulation : {duration}s")
+        
+        if self.use_asyncio:
+            import asyncio
+            from async_runtime import AsyncSimulationRuntime
+            
+            self.runtime = AsyncSimulationRuntime([self], sinks=[self.sink] if self.sink else [])
+            asyncio.run(self.runtime.run(duration))
+        else:
+            self._attach_scenarios()
+            self._simulation_loop(duration)
+        self.stop()
+    
+    def _attach_scenarios(self):
+        """Programme le script de scénarios s'il y en a un, sinon les scénarios automatiques"""
+        if self.timeline is None:
+            self.scenario_manager.attach_kernel(self.kernel)
+            return
+        
+        self.timeline.schedule(self.kernel, self.modules, on_trigger=self.scenario_manager.record_script_event)
+        log.info("📜 Script de scénarios : %d déclenchements sur %gs",
+                 len(self.timeline.events), self.timeline.length)
+    
+    def _simulation_loop(self, duration=None):
+        """Boucle principale de simulation (exécution du noyau à événements)"""
+        log.info("🔄 Boucle de simulation démarrée")
+        
+        # Le noyau saute d'un événement à l'autre : temps réel ou vitesse maximale
+        self._schedule_modules()
+        end_time = self.clock.time() + duration if duration is not None else None
+        self.kernel.run(until=end_time)
+        
+        log.info("🛑 Boucle de simulation arrêtée")
+    
+    def _schedule_modules(self):
+        """Programme chaque module à ses propres cadences capteurs / contrôle"""
+        # À instant égal : capteurs (0), contrôle (1), instantané (2), puis publication (3)
+        for name, module in self.modules.items():
+            self.tick_events[f'{name}.sensors'] = self.kernel.schedule_every(
+                module.sensor_interval, module.update_sensors, priority=0)
+            self.tick_events[f'{name}.control'] = self.kernel.schedule_every(
+                module.control_interval, module.update_control_logic, priority=1)
+        
+        # Un instantané par cycle de contrôle le plus rapide
+        snapshot_interval = min(module.control_interval for module in self.modules.values())
+        self.tick_events['snapshot'] = self.kernel.schedule_every(
+            snapshot_interval, self.snapshots.publish, priority=2)
+        self.tick_events['publish'] = self.kernel.schedule_every(
+            UPDATE_INTERVAL, self._publish, priority=3)
+    
+    def _publish(self):
+        """Publie le statut et les alarmes vers le sink"""
+        if self.sink:
+            self._write_to_sink()
+    
+    def print_module_rates(self):
+        """Affiche les cadences de chaque module"""
+        for name, module in self.modules.items():
+            print(f"⏱️  {name}: capteurs {module.sensor_interval}s, contrôle {module.control_interval}s")
+        print(f"⏱️  Publication du statut : {UPDATE_INTERVAL}s")
+    
+    def _write_to_sink(self):
+        """Envoie le dernier instantané (statut et alarmes de tous les modules) au sink
+
+        Le sink ne journalise que les alarmes levées ou disparues, agrégées
+        (voir sinks.AlarmTracker).
+        """
+        snapshot = self.snapshots.latest()
+        self.sink.write_status(snapshot.plain_status())
+        self.sink.write_alarms(snapshot.active_alarms)
     
     def print_system_status(self):
         """Affiche le statut du système (pour debug)"""
@@ -167,16 +344,73 @@ class MonitoringSimulation:
         print("="*50)
 
 
-def main():
+def create_sink(kind, output=None, clock=None):
+    """Crée le sink demandé en ligne de commande (clock : limitation des alarmes)"""
+    if kind == 'jsonl':
+        return JsonLinesSink(output or 'simulation.jsonl', clock)
+    if kind == 'null':
+        return NullSink()
+    return ConsoleSink(clock=clock)
+
+
+def parse_args(argv=None):
+    """Analyse les arguments de la ligne de commande"""
+    parser = argparse.ArgumentParser(description="Simulation de monitoring intelligent")
+    parser.add_argument('--headless', action='store_true',
+                        help="exécuter sans interface graphique (tkinter non chargé)")
+    parser.add_argument('--duration', type=float, default=None,
+                        help="durée de la simulation en secondes (mode headless)")
+    parser.add_argument('--virtual', action='store_true',
+                        help="utiliser une horloge virtuelle sans attente (mode headless)")
+    parser.add_argument('--asyncio', action='store_true', dest='use_asyncio',
+                        help="utiliser le runtime asyncio (un seul thread) au lieu du noyau threadé")
+    parser.add_argument('--sink', choices=['console', 'jsonl', 'null'], default='console',
+                        help="destination du statut et des alarmes en mode headless")
+    parser.add_argument('--output', default=None,
+                        help="fichier de sortie pour le sink jsonl")
+    parser.add_argument('--script', default=None,
+                        help="script de scénarios chronologique à rejouer (voir scenario_script.py)")
+    parser.add_argument('--seed', type=int, default=None,
+                        help="graine aléatoire pour une exécution reproductible")
+    parser.add_argument('--log-level', choices=['DEBUG', 'INFO', 'WARNING', 'ERROR'], default=None,
+                        help="niveau de journalisation (par défaut config.LOG_CONFIG)")
+    args = parser.parse_args(argv)
+    if args.virtual and not args.headless:
+        parser.error("--virtual nécessite --headless")
+    if args.virtual and args.use_asyncio:
+        parser.error("--virtual et --asyncio sont incompatibles")
+    if args.script and args.use_asyncio:
+        parser.error("--script et --asyncio sont incompatibles")
+    return args
+
+
+def main(argv=None):
     """Fonction principale"""
+    args = parse_args(argv)
+    
     print("🎯 SIMULATION MONITORING INTELLIGENT")
     print("=" * 40)
     
+    if args.seed is not None:
+        random.seed(args.seed)
+    
+    # Journal écrit par un thread dédié : les cycles de simulation ne bloquent jamais sur stdout
+    sim_logging.configure(level=args.log_level)
+    
     # Créer et démarrer la simulation
-    simulation = MonitoringSimulation()
+    clock = VirtualClock() if args.virtual else None
+    sink = create_sink(args.sink, args.output, clock) if args.headless else None
+    timeline = load_script(args.script) if args.script else None
+    simulation = MonitoringSimulation(headless=args.headless, sink=sink, clock=clock,
+                                      use_asyncio=args.use_asyncio, timeline=timeline)
+    
+    # Par défaut, un script est joué jusqu'à la fin de son dernier scénario
+    duration = args.duration
+    if duration is None and timeline is not None and args.headless:
+        duration = timeline.end_time
     
     try:
-        simulation.start()
+        simulation.start(duration=duration)
     except KeyboardInterrupt:
         print("\\n⏹️  Interruption clavier détectée")
     except Exception as e:
@@ -0,0 +1,139 @@
+"""
+Simulation multi-sites répartie sur plusieurs processus
+Chaque worker simule un lot (shard) de sites en temps virtuel avec son propre
+noyau à événements ; le coordinateur agrège les instantanés de chaque cycle.
+
+Exécution : python multisite.py --sites 1000 --workers 8 --duration 3600
+"""
+
+import argparse
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+from clock import VirtualClock
+from config import UPDATE_INTERVAL
+from event_kernel import EventKernel
+from simulation_site import Site
+from sinks import NullSink
+
+BATTERY_STATUSES = ('Normal', 'Low', 'Critical', 'Shutdown')
+
+
+def summarize_sites(sites, timestamp):
+    """Résumé agrégeable de l'état d'un lot de sites à un instant donné"""
+    summary = {
+        'time': timestamp,
+        'sites': len(sites),
+        'alarms': 0,
+        'sites_with_alarms': 0,
+        'temperature_sum': 0.0,
+        'max_co2': 0,
+        'lights_on': 0,
+        'scenarios_active': 0,
+        'battery_status': dict.fromkeys(BATTERY_STATUSES, 0),
+    }
+    for site in sites:
+        climate = site.climate_module
+        alarm_count = len(site.get_alarms())
+        summary['alarms'] += alarm_count
+        summary['sites_with_alarms'] += alarm_count > 0
+        summary['temperature_sum'] += climate.temperature
+        summary['max_co2'] = max(summary['max_co2'], climate.co2)
+        summary['lights_on'] += site.presence_module.lights_on
+        summary['scenarios_active'] += sum(module.scenario_active for module in site.modules.values())
+        summary['battery_status'][site.battery_module.battery_status] += 1
+    return summary
+
+
+def merge_summaries(parts):
+    """Fusionne les résumés des différents shards pour un même cycle"""
+    merged = {
+        'time': parts[0]['time'],
+        'sites': sum(part['sites'] for part in parts),
+        'alarms': sum(part['alarms'] for part in parts),
+        'sites_with_alarms': sum(part['sites_with_alarms'] for part in parts),
+        'max_co2': max(part['max_co2'] for part in parts),
+        'lights_on': sum(part['lights_on'] for part in parts),
+        'scenarios_active': sum(part['scenarios_active'] for part in parts),
+        'battery_status': {status: sum(part['battery_status'][status] for part in parts)
+                           for status in BATTERY_STATUSES},
+    }
+    temperature_sum = sum(part['temperature_sum'] for part in parts)
+    merged['mean_temperature'] = round(temperature_sum / merged['sites'], 2) if merged['sites'] else None
+    return merged
+
+
+def simulate_shard(site_names, duration, interval, seed, start_time):
+    """Simule un lot de sites dans un processus worker et retourne un résumé par cycle"""
+    random.seed(seed)
+    clock = VirtualClock(start=start_time)
+    kernel = EventKernel(clock)
+    sites = [Site(name, clock, NullSink()) for name in site_names]
+
+    # Chaque module à sa cadence, scénarios automatiques planifiés dans le noyau
+    for site in sites:
+        for module in site.modules.values():
+            module.kernel = kernel
+            kernel.schedule_every(module.sensor_interval, module.update_sensors, priority=0)
+            kernel.schedule_every(module.control_interval, module.update_control_logic, priority=1)
+        site.scenario_manager.attach_kernel(kernel)
+
+    summaries = []
+    kernel.schedule_every(interval, lambda: summaries.append(summarize_sites(sites, clock.time())),
+                          priority=2)
+    kernel.run(until=start_time + duration)
+    return summaries
+
+
+class MultiSiteRunner:
+    def __init__(self, n_sites, workers=None, seed=None):
+        self.n_sites = n_sites
+        self.workers = workers or os.cpu_count() or 1
+        self.seed = seed if seed is not None else random.randrange(2 ** 31)
+
+    def shards(self):
+        """Répartit les sites en lots équilibrés, un par worker"""
+        names = [f"site-{i:05d}" for i in range(self.n_sites)]
+        count = min(self.workers, self.n_sites)
+        return [names[i::count] for i in range(count)]
+
+    def run(self, duration, interval=UPDATE_INTERVAL):
+        """Simule tous les sites et retourne un instantané agrégé par cycle"""
+        start_time = time.time()
+        shards = self.shards()
+
+        with ProcessPoolExecutor(max_workers=len(shards)) as executor:
+            futures = [executor.submit(simulate_shard, shard, duration, interval,
+                                       self.seed + index, start_time)
+                       for index, shard in enumerate(shards)]
+            results = [future.result() for future in futures]
+
+        # Tous les shards partagent la même grille de cycles
+        return [merge_summaries(parts) for parts in zip(*results)]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Simulation multi-sites sur plusieurs processus")
+    parser.add_argument('--sites', type=int, default=100, help="nombre de sites simulés")
+    parser.add_argument('--workers', type=int, default=None, help="nombre de processus (défaut : cœurs)")
+    parser.add_argument('--duration', type=float, default=3600, help="durée virtuelle en secondes")
+    parser.add_argument('--seed', type=int, default=None, help="graine pour une exécution reproductible")
+    args = parser.parse_args(argv)
+
+    runner = MultiSiteRunner(args.sites, args.workers, args.seed)
+    print(f"🏭 {args.sites} sites répartis sur {len(runner.shards())} processus, {args.duration}s virtuelles")
+
+    started = time.perf_counter()
+    snapshots = runner.run(args.duration)
+    elapsed = time.perf_counter() - started
+
+    last = snapshots[-1]
+    print(f"✅ {len(snapshots)} cycles en {elapsed:.1f}s "
+          f"({args.sites * len(snapshots) / elapsed:.0f} site-cycles/s)")
+    print(f"📊 Dernier cycle : {last['alarms']} alarmes sur {last['sites_with_alarms']} sites, "
+          f"température moyenne {last['mean_temperature']}°C, batteries {last['battery_status']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,284 @@
+"""
+Simulation Presence Detection pilotée par événements
+Au lieu d'un tirage aléatoire à chaque cycle, on tire directement l'instant du
+prochain événement (arrivée, départ, mouvement) et l'extinction des lampes est
+un événement programmé : le coût dépend du nombre d'événements, pas de cycles.
+
+Tant que des personnes sont présentes, les mouvements ne changent pas l'état
+des lampes : ils ne sont pas programmés un par un, l'instant du dernier
+mouvement est tiré à la demande (propriété sans mémoire du processus de Poisson).
+
+Chaque zone a sa pile de scénarios (ScenarioStack) comme PresenceModule : les
+scénarios se superposent avec une priorité, et un seul événement
+'scenario_end' est programmé, à l'échéance la plus proche.
+"""
+
+import heapq
+import math
+import random
+from alarm_rules import RULES, AlarmEvaluator
+from clock import WALL_CLOCK
+from config import PRESENCE_CONFIG, UPDATE_INTERVAL
+from scenario_registry import REGISTRY
+from scenario_stack import ScenarioStack
+
+
+def _rate_from_probability(probability, interval=UPDATE_INTERVAL):
+    """Convertit une probabilité par cycle en taux d'un processus de Poisson (1/s)"""
+    probability = min(probability, 0.999)
+    if probability <= 0:
+        return 0.0
+    return -math.log(1.0 - probability) / interval
+
+
+# Taux équivalents au modèle par cycle de PresenceModule :
+# 10% de chance de changement par cycle, réparti entre -1, 0 et +1
+ARRIVAL_RATE = _rate_from_probability(0.1 / 3)
+DEPARTURE_RATE = _rate_from_probability(0.1 / 3)
+
+
+class PresenceZone:
+    """État d'une zone ; les jetons invalident les événements programmés obsolètes"""
+
+    __slots__ = ('index', 'persons_count', 'lights_on', 'last_movement_time',
+                 'scenarios', 'scenario_active', 'scenario_end_time', 'forced_movement',
+                 'forced_persons', 'movement_epoch', 'tokens', 'lights_left_on',
+                 'alarm_rules', 'alarms')
+
+    FORCED_ATTRIBUTES = ('forced_movement', 'forced_persons')
+
+    def __init__(self, index, clock):
+        self.index = index
+        self.persons_count = 0
+        self.lights_on = False
+        self.last_movement_time = 0
+        # Scénarios actifs superposables ; les variables ci-dessous en sont dérivées
+        self.scenarios = ScenarioStack()
+        self.scenario_active = False
+        self.scenario_end_time = 0
+        self.forced_movement = None
+        self.forced_persons = None
+        self.movement_epoch = 0
+        self.tokens = {'arrival': 0, 'departure': 0, 'movement': 0,
+                       'light_off': 0, 'scenario_end': 0}
+        # Règles d'alarme de PresenceModule, évaluées à chaque avancée du moteur
+        self.lights_left_on = False
+        self.alarm_rules = AlarmEvaluator(RULES.for_module('presence'), clock)
+        self.alarms = []
+
+
+class EventDrivenPresence:
+    def __init__(self, n_zones=1, clock=None, seed=None):
+        self.clock = clock if clock is not None else WALL_CLOCK
+        self.random = random.Random(seed)
+        # Les règles d'alarme des zones suivent l'instant courant du moteur (voir time())
+        self.zones = [PresenceZone(i, self) for i in range(n_zones)]
+        self.current_time = self.clock.time()
+
+        self._queue = []
+        self._sequence = 0
+        self.events_processed = 0
+        self.light_changes = 0
+
+        for zone in self.zones:
+            self._schedule_random_events(zone)
+
+    def time(self):
+        """Instant courant du moteur (horloge des règles d'alarme des zones)"""
+        return self.current_time
+
+    # --- Programmation des événements ---
+
+    def _schedule(self, zone, kind, at):
+        """Programme un événement et invalide le précédent du même type"""
+        zone.tokens[kind] += 1
+        self._sequence += 1
+        heapq.heappush(self._queue, (at, self._sequence, zone.index, kind, zone.tokens[kind]))
+
+    def _cancel(self, zone, kind):
+        zone.tokens[kind] += 1
+
+    def _schedule_after(self, zone, kind, rate):
+        """Tire le délai du prochain événement selon une loi exponentielle"""
+        if rate > 0:
+            self._schedule(zone, kind, self.current_time + self.random.expovariate(rate))
+        else:
+            self._cancel(zone, kind)
+
+    def _movement_rate(self, zone):
+        movement_prob = PRESENCE_CONFIG['movement_probability']
+        if zone.persons_count > 0:
+            movement_prob *= (1 + zone.persons_count * 0.2)
+        return _rate_from_probability(movement_prob)
+
+    def _schedule_random_events(self, zone):
+        """(Re)programme arrivées, départs et mouvements selon l'état de la zone"""
+        if zone.scenario_active:
+            for kind in ('arrival', 'departure', 'movement'):
+                self._cancel(zone, kind)
+            return
+
+        max_persons = PRESENCE_CONFIG['max_persons']
+        self._schedule_after(zone, 'arrival', ARRIVAL_RATE if zone.persons_count < max_persons else 0)
+        self._schedule_after(zone, 'departure', DEPARTURE_RATE if zone.persons_count > 0 else 0)
+        # Mouvements programmés seulement quand ils peuvent changer l'éclairage
+        self._schedule_after(zone, 'movement', self._movement_rate(zone) if zone.persons_count == 0 else 0)
+
+    def _sample_movement(self, zone):
+        """Tire l'instant du dernier mouvement depuis movement_epoch (zone occupée)"""
+        if zone.persons_count > 0 and not zone.scenario_active:
+            gap = self.random.expovariate(self._movement_rate(zone))
+            if gap < self.current_time - zone.movement_epoch:
+                zone.last_movement_time = self.current_time - gap
+        zone.movement_epoch = self.current_time
+
+    def _update_lights(self, zone):
+        """Logique d'éclairage : allumage immédiat, extinction programmée"""
+        previous_lights_state = zone.lights_on
+
+        # Même expression que l'instant programmé, pour éviter les erreurs d'arrondi
+        light_off_time = zone.last_movement_time + PRESENCE_CONFIG['light_off_delay']
+        recent_movement = zone.last_movement_time > 0 and self.current_time < light_off_time
+        if zone.persons_count > 0 or zone.forced_movement or recent_movement:
+            zone.lights_on = True
+            if zone.persons_count == 0 and not zone.forced_movement:
+                self._schedule(zone, 'light_off', light_off_time)
+            else:
+                self._cancel(zone, 'light_off')
+        elif zone.lights_on:
+            zone.lights_on = False
+            self._cancel(zone, 'light_off')
+
+        if previous_lights_state != zone.lights_on:
+            self.light_changes += 1
+
+    # --- Traitement des événements ---
+
+    def _handle(self, zone, kind):
+        if kind == 'arrival':
+            self._sample_movement(zone)
+            zone.persons_count += 1
+            self._schedule_random_events(zone)
+        elif kind == 'departure':
+            self._sample_movement(zone)
+            zone.persons_count -= 1
+            self._schedule_random_events(zone)
+        elif kind == 'movement':
+            zone.last_movement_time = self.current_time
+            self._schedule_after(zone, 'movement', self._movement_rate(zone))
+        elif kind == 'scenario_end':
+            # Le mouvement forcé a duré jusqu'à l'échéance
+            if zone.forced_movement:
+                zone.last_movement_time = self.current_time
+            zone.scenarios.expire(self.current_time)
+            self._apply_scenarios(zone)
+            return
+        # 'light_off' : la règle d'extinction est réévaluée ci-dessous
+        self._update_lights(zone)
+
+    def next_event_time(self):
+        """Instant du prochain événement valide (None si la file est vide)"""
+        queue = self._queue
+        while queue:
+            at, _, zone_index, kind, token = queue[0]
+            if self.zones[zone_index].tokens[kind] == token:
+                return at
+            heapq.heappop(queue)
+        return None
+
+    def advance_to(self, timestamp=None):
+        """Traite tous les événements jusqu'à l'instant donné (horloge par défaut)"""
+        if timestamp is None:
+            timestamp = self.clock.time()
+
+        queue = self._queue
+        zones = self.zones
+        while queue and queue[0][0] <= timestamp:
+            at, _, zone_index, kind, token = heapq.heappop(queue)
+            zone = zones[zone_index]
+            if zone.tokens[kind] != token:
+                continue  # Événement annulé ou reprogrammé
+            self.current_time = at
+            self._handle(zone, kind)
+            self.events_processed += 1
+
+        self.current_time = max(self.current_time, timestamp)
+        for zone in zones:
+            self._evaluate_alarms(zone)
+
+    def _evaluate_alarms(self, zone):
+        """Fait avancer les règles d'alarme d'une zone à l'instant courant"""
+        zone.lights_left_on = (zone.persons_count == 0 and zone.lights_on and
+                               self.current_time - zone.last_movement_time > PRESENCE_CONFIG['light_off_delay'] * 2)
+        zone.alarms = zone.alarm_rules.evaluate(zone)
+
+    def force_scenario(self, zone_index, scenario_type, duration, priority=0):
+        """Force un scénario sur une zone pendant une durée donnée et retourne son identifiant
+
+        Les scénarios se superposent : pour chaque valeur forcée, le plus
+        prioritaire l'emporte (à priorité égale, le plus récent).
+        """
+        zone = self.zones[zone_index]
+        self._sample_movement(zone)
+        if zone.forced_movement:
+            zone.last_movement_time = self.current_time
+        scenario_id = zone.scenarios.push(scenario_type, REGISTRY.values_for(scenario_type, 'presence'),
+                                          self.current_time + duration, priority)
+        self._apply_scenarios(zone)
+        return scenario_id
+
+    def cancel_scenario(self, zone_index, scenario_id):
+        """Interrompt un scénario d'une zone avant son échéance"""
+        zone = self.zones[zone_index]
+        if zone.scenarios.cancel(scenario_id):
+            self._sample_movement(zone)
+            if zone.forced_movement:
+                zone.last_movement_time = self.current_time
+            self._apply_scenarios(zone)
+
+    def _apply_scenarios(self, zone):
+        """Recalcule les valeurs forcées d'une zone et reprogramme ses événements"""
+        forced = zone.scenarios.resolved()
+        for attribute in zone.FORCED_ATTRIBUTES:
+            setattr(zone, attribute, forced.get(attribute))
+        zone.scenario_active = zone.scenarios.active_count > 0
+        zone.scenario_end_time = zone.scenarios.end_time()
+        zone.movement_epoch = self.current_time
+        if zone.forced_persons is not None:
+            zone.persons_count = zone.forced_persons
+        if zone.forced_movement:
+            zone.last_movement_time = self.current_time
+
+        next_expiry = zone.scenarios.next_expiry()
+        if next_expiry is None:
+            self._cancel(zone, 'scenario_end')
+        else:
+            self._schedule(zone, 'scenario_end', next_expiry)
+        self._schedule_random_events(zone)
+        self._update_lights(zone)
+
+    # --- Vues compatibles avec PresenceModule ---
+
+    def get_status(self, zone_index):
+        """Retourne l'état d'une zone (même format que PresenceModule.get_status)"""
+        zone = self.zones[zone_index]
+        self._sample_movement(zone)
+        if zone.last_movement_time > 0:
+            time_since_movement = self.current_time - zone.last_movement_time
+        else:
+            time_since_movement = float('inf')
+
+        # Un mouvement est "détecté" s'il a eu lieu durant le dernier cycle
+        movement_detected = bool(zone.forced_movement) or time_since_movement < UPDATE_INTERVAL
+
+        return {
+            'movement_detected': movement_detected,
+            'persons_count': zone.persons_count,
+            'lights_on': zone.lights_on,
+            'time_since_movement': round(time_since_movement, 1) if time_since_movement != float('inf') else None,
+            'scenario_active': zone.scenario_active,
+        }
+
+    def get_alarms(self, zone_index):
+        """Retourne les alarmes actives d'une zone, évaluées à la dernière avancée (objets Alarm)"""
+        return self.zones[zone_index].alarms
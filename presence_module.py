@@ -3,20 +3,52 @@ Module de simulation Presence Detection
 Gère la détection de mouvement, nombre de personnes et contrôle des lampes
 """
 
+import logging
 import random
-import time
-from config import PRESENCE_CONFIG
+from alarm_rules import RULES, AlarmEvaluator
+from clock import WALL_CLOCK
+from config import PRESENCE_CONFIG, MODULE_RATES, UPDATE_INTERVAL
+from command_queue import CommandQueue
+from scenario_registry import REGISTRY
+from scenario_stack import ScenarioStack
+from sim_logging import get_logger
+from state_cache import StateCache
+
+log = get_logger('presence')
 
 
 class PresenceModule:
-    def __init__(self):
+    FORCED_ATTRIBUTES = ('forced_movement', 'forced_persons')
+    
+    def __init__(self, clock=None):
+        self.clock = clock if clock is not None else WALL_CLOCK
+        
+        # Cadences d'échantillonnage et de contrôle propres au module
+        self.sensor_interval = MODULE_RATES['presence']['sensor_interval']
+        self.control_interval = MODULE_RATES['presence']['control_interval']
+        
         self.movement_detected = False
         self.persons_count = 0
         self.lights_on = False
         self.last_movement_time = 0
-        self.last_update = time.time()
+        self.last_update = self.clock.time()
+        
+        # Noyau d'événements optionnel (expiration des scénarios et extinction programmées)
+        self.kernel = None
+        self.light_off_event = None
+        
+        # Commandes externes (scénarios...) appliquées au début du cycle capteurs
+        self.commands = CommandQueue()
+        
+        # Vues get_status / get_alarms en cache jusqu'au prochain changement d'état
+        self.state_cache = StateCache()
         
-        # Variables pour scénarios forcés
+        # Règles d'alarme de config.ALARM_RULES (hystérésis, durée minimale)
+        self.alarm_rules = AlarmEvaluator(RULES.for_module('presence'), self.clock)
+        self.alarms = []
+        
+        # Scénarios actifs superposables ; les variables ci-dessous en sont dérivées
+        self.scenarios = ScenarioStack()
         self.scenario_active = False
         self.scenario_end_time = 0
         self.forced_movement = None
@@ -24,13 +56,13 @@ class PresenceModule:
     
     def update_sensors(self):
         """Met à jour les valeurs des capteurs simulés"""
-        current_time = time.time()
+        # Appliquer les commandes reçues depuis le cycle précédent
+        self.commands.apply(self)
+        
+        current_time = self.clock.time()
         
         # Vérifier si un scénario forcé est actif
-        if self.scenario_active and current_time > self.scenario_end_time:
-            self.scenario_active = False
-            self.forced_movement = None
-            self.forced_persons = None
+        self.expire_scenario()
         
         # Générer valeurs aléatoires ou utiliser valeurs forcées
         if self.forced_movement is not None:
@@ -51,43 +83,47 @@ class PresenceModule:
             self.persons_count = self.forced_persons
         else:
             # Variation normale du nombre de personnes
-            if random.random() < 0.1:  # 10% de chance de changement
+            # 10% de chance de changement par intervalle UPDATE_INTERVAL, quelle que soit la cadence
+            if random.random() < 1 - 0.9 ** (self.sensor_interval / UPDATE_INTERVAL):
                 change = random.choice([-1, 0, 1])
                 self.persons_count = max(0, min(PRESENCE_CONFIG['max_persons'], 
                                                self.persons_count + change))
         
         self.last_update = current_time
+        self.state_cache.invalidate()
+        self._evaluate_alarms()
     
     def update_control_logic(self):
         """Met à jour la logique de contrôle des actionneurs avec logging détaillé"""
-        current_time = time.time()
+        current_time = self.clock.time()
         previous_lights_state = self.lights_on
         
         # LOGIQUE 1: Allumer les lampes si mouvement détecté
         if self.movement_detected and not self.lights_on:
             self.lights_on = True
-            print(f"[PRESENCE] 💡 LAMPES ALLUMÉES: Mouvement détecté ({self.persons_count} pers.)")
+            log.info("[PRESENCE] 💡 LAMPES ALLUMÉES: Mouvement détecté (%d pers.)", self.persons_count)
         
         # LOGIQUE 2: Allumer/maintenir si des personnes sont présentes
         if self.persons_count > 0 and not self.lights_on:
             self.lights_on = True
-            print(f"[PRESENCE] 💡 LAMPES ALLUMÉES: {self.persons_count} personne(s) présente(s)")
+            log.info("[PRESENCE] 💡 LAMPES ALLUMÉES: %d personne(s) présente(s)", self.persons_count)
         
         # LOGIQUE 3: Éteindre les lampes si aucune présence pendant X secondes
         time_since_movement = current_time - self.last_movement_time if self.last_movement_time > 0 else float('inf')
+        light_off_time = self.last_movement_time + PRESENCE_CONFIG['light_off_delay']
         
         if (self.persons_count == 0 and 
             self.lights_on and 
-            time_since_movement > PRESENCE_CONFIG['light_off_delay']):
+            current_time >= light_off_time):
             self.lights_on = False
-            print(f"[PRESENCE] 💡 LAMPES ÉTEINTES: Aucune présence depuis {time_since_movement:.1f}s")
+            log.info("[PRESENCE] 💡 LAMPES ÉTEINTES: Aucune présence depuis %.1fs", time_since_movement)
         
         # LOGIQUE 4: Maintenir allumées si présence continue
         if self.persons_count > 0:
             self.lights_on = True
         
-        # Logger les changements d'état
-        if previous_lights_state != self.lights_on:
+        # Logger les changements d'état (raison construite seulement si le niveau est actif)
+        if previous_lights_state != self.lights_on and log.isEnabledFor(logging.INFO):
             state = "ALLUMÉES" if self.lights_on else "ÉTEINTES"
             reason = ""
             if self.lights_on:
@@ -98,40 +134,86 @@ class PresenceModule:
             else:
                 reason = f"(absence depuis {time_since_movement:.1f}s)"
             
-            print(f"[CONTROL] 💡 ÉCLAIRAGE {state} {reason}")
+            log.info("[CONTROL] 💡 ÉCLAIRAGE %s %s", state, reason)
+        
+        # Programmer la vérification d'extinction au lieu d'attendre le prochain cycle
+        if self.kernel is not None and self.lights_on and self.persons_count == 0:
+            if self.light_off_event is not None:
+                self.light_off_event.cancel()
+            self.light_off_event = self.kernel.schedule(light_off_time, self.update_control_logic)
+        
+        self.state_cache.invalidate()
+        self._evaluate_alarms()
     
-    def force_scenario(self, scenario_type, duration):
-        """Force un scénario spécifique pendant une durée donnée"""
-        self.scenario_active = True
-        self.scenario_end_time = time.time() + duration
-        
-        if scenario_type == 'presence_detected':
-            self.forced_movement = True
-            self.forced_persons = 3
-        elif scenario_type == 'no_presence':
-            self.forced_movement = False
-            self.forced_persons = 0
+    def expire_scenario(self):
+        """Retire les scénarios dont la durée est écoulée (tas trié par échéance)"""
+        if self.scenarios.expire(self.clock.time()):
+            self._apply_scenarios()
     
-    def get_status(self):
-        """Retourne l'état actuel du module"""
-        current_time = time.time()
-        time_since_movement = current_time - self.last_movement_time if self.last_movement_time > 0 else float('inf')
+    def force_scenario(self, scenario_type, duration, priority=0):
+        """Force un scénario pendant une durée donnée et retourne son identifiant
         
+        Les scénarios se superposent : pour chaque valeur forcée, le plus
+        prioritaire l'emporte (à priorité égale, le plus récent).
+        """
+        end_time = self.clock.time() + duration
+        scenario_id = self.scenarios.push(scenario_type, REGISTRY.values_for(scenario_type, 'presence'),
+                                          end_time, priority)
+        if self.kernel is not None:
+            self.kernel.schedule(end_time, self.expire_scenario)
+        
+        self._apply_scenarios()
+        return scenario_id
+    
+    def cancel_scenario(self, scenario_id):
+        """Interrompt un scénario avant son échéance"""
+        if self.scenarios.cancel(scenario_id):
+            self._apply_scenarios()
+    
+    def _apply_scenarios(self):
+        """Recalcule les valeurs forcées à partir des scénarios actifs"""
+        forced = self.scenarios.resolved()
+        for attribute in self.FORCED_ATTRIBUTES:
+            setattr(self, attribute, forced.get(attribute))
+        self.scenario_active = self.scenarios.active_count > 0
+        self.scenario_end_time = self.scenarios.end_time()
+        self.state_cache.invalidate()
+    
+    def get_status(self):
+        """Retourne l'état actuel du module (en cache jusqu'au prochain changement d'état)"""
+        # time_since_movement évolue avec l'horloge : il complète la version d'état
+        return self.state_cache.get('status', self._build_status, self._time_since_movement())
+    
+    def _time_since_movement(self):
+        """Temps écoulé depuis le dernier mouvement, arrondi au dixième (None si aucun)"""
+        if self.last_movement_time <= 0:
+            return None
+        return round(self.clock.time() - self.last_movement_time, 1)
+    
+    @property
+    def lights_left_on(self):
+        return self._lights_left_on()
+    
+    def _lights_left_on(self):
+        """Lampes allumées sans présence depuis plus de deux délais d'extinction"""
+        return (self.persons_count == 0 and self.lights_on and
+                self.clock.time() - self.last_movement_time > PRESENCE_CONFIG['light_off_delay'] * 2)
+    
+    def _build_status(self):
+        """Construit le dictionnaire d'état du module"""
         return {
             'movement_detected': self.movement_detected,
             'persons_count': self.persons_count,
             'lights_on': self.lights_on,
-            'time_since_movement': round(time_since_movement, 1) if time_since_movement != float('inf') else None,
+            'time_since_movement': self._time_since_movement(),
             'scenario_active': self.scenario_active,
         }
     
     def get_alarms(self):
-        """Retourne les alarmes actives"""
-        alarms = []
-        
-        current_time = time.time()
-        if (self.persons_count == 0 and self.lights_on and 
-            current_time - self.last_movement_time > PRESENCE_CONFIG['light_off_delay'] * 2):
-            alarms.append("Lampes allumées sans présence détectée")
-        
-        return alarms
\ No newline at end of file
+        """Retourne les alarmes actives évaluées au dernier cycle (objets Alarm)"""
+        return self.alarms
+    
+    def _evaluate_alarms(self):
+        """Fait avancer les règles d'alarme sur l'échantillon courant (à chaque cycle)"""
+        self.alarms = self.alarm_rules.evaluate(self)
+        return self.alarms
\ No newline at end of file
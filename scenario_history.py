@@ -0,0 +1,160 @@
+"""
+Historique borné et indexé des scénarios déclenchés
+Tampon circulaire de taille fixe (les plus anciens enregistrements sont écrasés)
+avec des index par module, nom de scénario et type de déclenchement. Les
+enregistrements arrivant dans l'ordre chronologique, les requêtes sur une
+fenêtre de temps se font par recherche dichotomique dans chaque index.
+Optionnellement, chaque enregistrement est aussi ajouté à un fichier JSON Lines
+(piste d'audit complète, non bornée).
+"""
+
+import json
+from bisect import bisect_left, bisect_right
+
+INDEXED_FIELDS = ('module', 'name', 'trigger_type')
+
+
+class _Index:
+    """Numéros et instants des enregistrements d'une clé, du plus ancien au plus récent"""
+
+    __slots__ = ('seqs', 'times', 'start')
+
+    def __init__(self):
+        self.seqs = []
+        self.times = []
+        self.start = 0      # Premier élément encore présent dans le tampon
+
+    def append(self, seq, timestamp):
+        self.seqs.append(seq)
+        self.times.append(timestamp)
+
+    def evict_before(self, oldest_seq):
+        """Oublie les enregistrements écrasés dans le tampon (compactage amorti)"""
+        seqs = self.seqs
+        while self.start < len(seqs) and seqs[self.start] < oldest_seq:
+            self.start += 1
+        if self.start > 64 and self.start * 2 > len(seqs):
+            del seqs[:self.start]
+            del self.times[:self.start]
+            self.start = 0
+
+    def count(self):
+        return len(self.seqs) - self.start
+
+    def count_between(self, start, end):
+        low = self.start if start is None else bisect_left(self.times, start, self.start)
+        high = len(self.times) if end is None else bisect_right(self.times, end, self.start)
+        return max(0, high - low)
+
+
+class ScenarioHistory:
+    def __init__(self, capacity=50, spill_path=None):
+        if capacity < 1:
+            raise ValueError(f"Capacité d'historique invalide: {capacity} (minimum 1)")
+        self.capacity = capacity
+        self._ring = [None] * capacity
+        self._next_seq = 0
+        self._indexes = {field: {} for field in INDEXED_FIELDS}
+
+        # Piste d'audit complète sur disque (optionnelle)
+        self.spill_path = spill_path
+        self._spill = open(spill_path, 'a', encoding='utf-8') if spill_path else None
+
+    @property
+    def total(self):
+        """Nombre total d'enregistrements depuis le démarrage (y compris écrasés)"""
+        return self._next_seq
+
+    @property
+    def _oldest_seq(self):
+        return max(0, self._next_seq - self.capacity)
+
+    def append(self, record):
+        """Ajoute un enregistrement (dict avec name, module, trigger_type, timestamp)"""
+        seq = self._next_seq
+        slot = seq % self.capacity
+        evicted = self._ring[slot]
+        self._ring[slot] = record
+        self._next_seq += 1
+
+        oldest = self._oldest_seq
+        for field, index in self._indexes.items():
+            key = record.get(field)
+            key_index = index.get(key)
+            if key_index is None:
+                key_index = index[key] = _Index()
+            key_index.append(seq, record['timestamp'])
+            # Seul l'index de l'enregistrement écrasé contient une entrée obsolète
+            if evicted is not None:
+                index[evicted.get(field)].evict_before(oldest)
+
+        if self._spill:
+            self._spill.write(json.dumps(record, ensure_ascii=False) + "\n")
+            self._spill.flush()
+
+    def _record(self, seq):
+        return self._ring[seq % self.capacity]
+
+    def __len__(self):
+        return self._next_seq - self._oldest_seq
+
+    def __getitem__(self, position):
+        """Accès comme une liste, du plus ancien au plus récent enregistrement conservé"""
+        if isinstance(position, slice):
+            return [self._record(seq) for seq in range(self._oldest_seq, self._next_seq)[position]]
+        return self._record(range(self._oldest_seq, self._next_seq)[position])
+
+    def __iter__(self):
+        return (self._record(seq) for seq in range(self._oldest_seq, self._next_seq))
+
+    def _key_index(self, field, key):
+        key_index = self._indexes[field].get(key)
+        if key_index is not None:
+            key_index.evict_before(self._oldest_seq)
+        return key_index
+
+    def last(self, n=10, **filters):
+        """n derniers enregistrements, éventuellement filtrés (module=, name=, trigger_type=)
+
+        Avec un filtre, seul l'index correspondant est parcouru.
+        """
+        if not filters:
+            start = max(self._oldest_seq, self._next_seq - n)
+            return [self._record(seq) for seq in range(start, self._next_seq)]
+
+        # Parcourir l'index le plus court puis vérifier les autres filtres
+        indexes = []
+        for field, key in filters.items():
+            if field not in self._indexes:
+                raise ValueError(f"Champ d'historique non indexé: {field}")
+            key_index = self._key_index(field, key)
+            if key_index is None:
+                return []
+            indexes.append(key_index)
+        shortest = min(indexes, key=_Index.count)
+
+        found = []
+        for position in range(len(shortest.seqs) - 1, shortest.start - 1, -1):
+            record = self._record(shortest.seqs[position])
+            if all(record.get(field) == key for field, key in filters.items()):
+                found.append(record)
+                if len(found) == n:
+                    break
+        found.reverse()
+        return found
+
+    def counts(self, by='name', start=None, end=None):
+        """Nombre d'enregistrements par clé (module, name ou trigger_type) entre start et end"""
+        if by not in self._indexes:
+            raise ValueError(f"Champ d'historique non indexé: {by}")
+        counts = {}
+        for key in list(self._indexes[by]):
+            count = self._key_index(by, key).count_between(start, end)
+            if count:
+                counts[key] = count
+        return counts
+
+    def close(self):
+        if self._spill:
+            self._spill.close()
+            self._spill = None
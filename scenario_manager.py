@@ -6,21 +6,37 @@ Déclenche des scénarios prédéfinis après un délai configurable
 import threading
 import time
 import random
-from config import SCENARIO_DELAY, SCENARIOS
+from clock import WALL_CLOCK
+from config import SCENARIO_DELAY, SCENARIO_HISTORY_CONFIG
+from scenario_history import ScenarioHistory
+from scenario_registry import REGISTRY
+from sim_logging import get_logger
+
+log = get_logger('scenarios')
 
 
 class ScenarioManager:
-    def __init__(self, climate_module, presence_module, battery_module, hmi_interface=None):
+    def __init__(self, climate_module, presence_module, battery_module, hmi_interface=None, clock=None):
         self.climate_module = climate_module
         self.presence_module = presence_module
         self.battery_module = battery_module
+        self.modules = {
+            'climate': climate_module,
+            'presence': presence_module,
+            'battery': battery_module,
+        }
+        # Destination du journal (log_event) : bus d'événements vidé par l'HMI, ou sink
         self.hmi_interface = hmi_interface
+        self.clock = clock if clock is not None else WALL_CLOCK
         
         self.running = False
         self.thread = None
-        self.start_time = time.time()
-        self.next_scenario_time = time.time() + SCENARIO_DELAY
-        self.scenario_history = []
+        self.kernel = None
+        self.start_time = self.clock.time()
+        self.next_scenario_time = self.start_time + SCENARIO_DELAY
+        # Historique borné, indexé par module, scénario et type de déclenchement
+        self.scenario_history = ScenarioHistory(SCENARIO_HISTORY_CONFIG['capacity'],
+                                                SCENARIO_HISTORY_CONFIG['spill_path'])
     
     def start(self):
         """Démarre le gestionnaire de scénarios automatiques"""
@@ -28,185 +44,160 @@ class ScenarioManager:
             self.running = True
             self.thread = threading.Thread(target=self._run_scenarios, daemon=True)
             self.thread.start()
-            print(f"Gestionnaire de scénarios démarré. Premier scénario dans {SCENARIO_DELAY}s")
+            log.info("Gestionnaire de scénarios démarré. Premier scénario dans %ss", SCENARIO_DELAY)
+    
+    def attach_kernel(self, kernel):
+        """Programme les scénarios automatiques comme événements du noyau (sans thread)"""
+        if not self.running:
+            self.running = True
+            self.kernel = kernel
+            kernel.schedule(self.next_scenario_time, self._on_scenario_due)
+            log.info("Gestionnaire de scénarios démarré. Premier scénario dans %ss", SCENARIO_DELAY)
+    
+    def _on_scenario_due(self):
+        """Événement du noyau : déclenche le scénario puis programme le suivant"""
+        if self.running:
+            self.check_scenarios()
+            self.kernel.schedule(self.next_scenario_time, self._on_scenario_due)
     
     def stop(self):
         """Arrête le gestionnaire de scénarios"""
         self.running = False
         if self.thread:
             self.thread.join()
-        print("Gestionnaire de scénarios arrêté")
+        self.scenario_history.close()
+        log.info("Gestionnaire de scénarios arrêté")
     
     def _run_scenarios(self):
         """Boucle principale du gestionnaire de scénarios"""
         while self.running:
-            current_time = time.time()
-            
-            # Vérifier s'il est temps de déclencher un scénario
-            if current_time >= self.next_scenario_time:
-                self._trigger_random_scenario()
-                
-                # Programmer le prochain scénario
-                next_delay = random.uniform(SCENARIO_DELAY * 0.8, SCENARIO_DELAY * 1.2)
-                self.next_scenario_time = current_time + next_delay
-                
-                print(f"Prochain scénario automatique dans {next_delay:.1f}s")
+            self.check_scenarios()
             
             # Dormir un peu pour éviter une consommation CPU excessive
-            time.sleep(1)
+            self.clock.sleep(1)
+    
+    def check_scenarios(self):
+        """Déclenche un scénario si son heure est venue
+        
+        Appelée par le thread du gestionnaire, ou par l'événement programmé
+        dans le noyau de simulation (voir attach_kernel).
+        """
+        current_time = self.clock.time()
+        
+        # Vérifier s'il est temps de déclencher un scénario
+        if current_time >= self.next_scenario_time:
+            self._trigger_random_scenario()
+            
+            # Programmer le prochain scénario
+            next_delay = random.uniform(SCENARIO_DELAY * 0.8, SCENARIO_DELAY * 1.2)
+            self.next_scenario_time = current_time + next_delay
+            
+            log.info("Prochain scénario automatique dans %.1fs", next_delay)
     
     def _trigger_random_scenario(self):
         """Déclenche un scénario aléatoire"""
-        # Obtenir la liste des scénarios disponibles
-        available_scenarios = list(SCENARIOS.keys())
+        # Scénarios disponibles (table précalculée par le registre)
+        available_scenarios = REGISTRY.names()
         
-        # Éviter de répéter le même scénario consécutivement
-        if self.scenario_history:
-            last_scenario = self.scenario_history[-1]['name']
-            if last_scenario in available_scenarios and len(available_scenarios) > 1:
-                available_scenarios.remove(last_scenario)
-        
-        # Sélectionner un scénario aléatoire
+        # Sélectionner un scénario aléatoire, différent du précédent si possible
+        last_scenario = self.scenario_history[-1]['name'] if self.scenario_history else None
         scenario_name = random.choice(available_scenarios)
-        scenario_config = SCENARIOS[scenario_name]
-        duration = scenario_config['duration']
+        while scenario_name == last_scenario and len(available_scenarios) > 1:
+            scenario_name = random.choice(available_scenarios)
         
-        # Déclencher le scénario dans le bon module
-        module_name = self._get_module_for_scenario(scenario_name)
+        definition = REGISTRY.get(scenario_name)
+        duration = definition.duration
         
-        if module_name == 'climate':
-            self.climate_module.force_scenario(scenario_name, duration)
-        elif module_name == 'presence':
-            self.presence_module.force_scenario(scenario_name, duration)
-        elif module_name == 'battery':
-            self.battery_module.force_scenario(scenario_name, duration)
+        # Déclencher le scénario dans le bon module (au début de son prochain cycle)
+        module_name = definition.module
+        self._submit_scenario(definition)
         
         # Enregistrer dans l'historique
-        scenario_record = {
-            'name': scenario_name,
-            'module': module_name,
-            'duration': duration,
-            'timestamp': time.time(),
-            'trigger_type': 'automatic'
-        }
-        self.scenario_history.append(scenario_record)
-        
-        # Limiter l'historique à 50 entrées
-        if len(self.scenario_history) > 50:
-            self.scenario_history.pop(0)
-        
-        # Messages détaillés pour l'interface
-        scenario_descriptions = {
-            'high_temperature': {
-                'start': f'🔥 SCÉNARIO AUTO: Température critique (32°C) pendant {duration}s',
-                'action': 'Test automatique du système de ventilation et alertes thermiques'
-            },
-            'low_temperature': {
-                'start': f'❄️ SCÉNARIO AUTO: Température basse (22°C) pendant {duration}s',
-                'action': 'Test du système de chauffage et gestion thermique'
-            },
-            'high_co2': {
-                'start': f'💨 SCÉNARIO AUTO: CO₂ dangereux (1200ppm) pendant {duration}s',
-                'action': 'Test ventilation forcée et purification air'
-            },
-            'low_battery': {
-                'start': f'🔋 SCÉNARIO AUTO: Batterie faible (10.5V) pendant {duration}s',
-                'action': 'Test alertes énergétiques et gestion consommation'
-            },
-            'critical_battery': {
-                'start': f'⚡ SCÉNARIO AUTO: Batterie critique (9.8V) pendant {duration}s',
-                'action': 'Test mode économie d\'urgence et procédures sécurité'
-            },
-            'presence_detected': {
-                'start': f'👥 SCÉNARIO AUTO: Présence détectée (3 pers.) pendant {duration}s',
-                'action': 'Test éclairage automatique et gestion occupation'
-            },
-            'no_presence': {
-                'start': f'🚫 SCÉNARIO AUTO: Absence totale pendant {duration}s',
-                'action': 'Test extinction automatique et mode veille'
-            }
-        }
+        self._record(scenario_name, module_name, duration, 'automatic')
         
-        scenario_info = scenario_descriptions.get(scenario_name, {
-            'start': f'Scénario {scenario_name}',
-            'action': 'Test automatique du système'
-        })
+        # Messages détaillés pour l'interface (libellé compilé par le registre)
+        start = f"{definition.icon} SCÉNARIO AUTO: {definition.label} pendant {duration}s"
         
-        print(f"[SCENARIO] {scenario_info['start']}")
-        print(f"[ACTION] {scenario_info['action']}")
+        log.info("[SCENARIO] %s", start)
+        log.info("[ACTION] %s", definition.action)
         
         if self.hmi_interface:
             # Logger le déclenchement du scénario
-            self.hmi_interface.log_event(scenario_info['start'], "SCENARIO")
+            self.hmi_interface.log_event(start, "SCENARIO")
             
             # Logger l'action attendue
-            self.hmi_interface.log_event(f"⚙️ ACTION: {scenario_info['action']}", "ACTION")
+            self.hmi_interface.log_event(f"⚙️ ACTION: {definition.action}", "ACTION")
             
             # Logger les détails techniques
-            end_time = time.strftime("%H:%M:%S", time.localtime(time.time() + duration))
+            end_time = time.strftime("%H:%M:%S", time.localtime(self.clock.time() + duration))
             self.hmi_interface.log_event(f"⏰ Durée: {duration}s - Fin prévue: {end_time}", "INFO")
             
             # Séparateur visuel
             self.hmi_interface.log_event("-" * 40, "INFO", False)
     
+    def _submit_scenario(self, definition):
+        """Met le scénario dans la file de commandes du module concerné"""
+        module = self.modules.get(definition.module)
+        if module is not None:
+            module.commands.submit('force_scenario', definition.name, definition.duration, definition.priority)
+    
     def _get_module_for_scenario(self, scenario_name):
         """Retourne le nom du module responsable d'un scénario"""
-        climate_scenarios = ['high_temperature', 'low_temperature', 'high_co2']
-        presence_scenarios = ['presence_detected', 'no_presence']
-        battery_scenarios = ['low_battery', 'critical_battery']
-        
-        if scenario_name in climate_scenarios:
-            return 'climate'
-        elif scenario_name in presence_scenarios:
-            return 'presence'
-        elif scenario_name in battery_scenarios:
-            return 'battery'
-        else:
-            return 'unknown'
+        return REGISTRY.module_for(scenario_name)
     
     def trigger_manual_scenario(self, scenario_name):
         """Déclenche manuellement un scénario spécifique"""
-        if scenario_name in SCENARIOS:
-            scenario_config = SCENARIOS[scenario_name]
-            duration = scenario_config['duration']
-            
-            # Déclencher le scénario
-            module_name = self._get_module_for_scenario(scenario_name)
+        definition = REGISTRY.get(scenario_name)
+        if definition is not None:
+            duration = definition.duration
             
-            if module_name == 'climate':
-                self.climate_module.force_scenario(scenario_name, duration)
-            elif module_name == 'presence':
-                self.presence_module.force_scenario(scenario_name, duration)
-            elif module_name == 'battery':
-                self.battery_module.force_scenario(scenario_name, duration)
+            # Déclencher le scénario (au début du prochain cycle du module)
+            module_name = definition.module
+            self._submit_scenario(definition)
             
             # Enregistrer dans l'historique
-            scenario_record = {
-                'name': scenario_name,
-                'module': module_name,
-                'duration': duration,
-                'timestamp': time.time(),
-                'trigger_type': 'manual'
-            }
-            self.scenario_history.append(scenario_record)
+            self._record(scenario_name, module_name, duration, 'manual')
             
-            print(f"[SCENARIO] Scénario manuel '{scenario_name}' déclenché pour {duration}s")
+            log.info("[SCENARIO] Scénario manuel '%s' déclenché pour %ss", scenario_name, duration)
             return True
         
         return False
     
+    def record_script_event(self, event):
+        """Historique et journal d'un scénario joué par un script (voir scenario_script)"""
+        self._record(event.name, event.module, event.duration, 'script')
+        log.info("[SCRIPT] t=%gs: scénario '%s' pendant %gs", event.time, event.name, event.duration)
+        if self.hmi_interface:
+            self.hmi_interface.log_event(f"📜 SCRIPT t={event.time:g}s: {event.name} pendant {event.duration:g}s",
+                                         "SCENARIO")
+    
+    def _record(self, scenario_name, module_name, duration, trigger_type):
+        """Ajoute un déclenchement à l'historique"""
+        self.scenario_history.append({
+            'name': scenario_name,
+            'module': module_name,
+            'duration': duration,
+            'timestamp': self.clock.time(),
+            'trigger_type': trigger_type
+        })
+    
     def get_status(self):
         """Retourne l'état actuel du gestionnaire"""
-        current_time = time.time()
+        current_time = self.clock.time()
         time_to_next = max(0, self.next_scenario_time - current_time)
         
         return {
             'running': self.running,
             'time_to_next_scenario': round(time_to_next, 1),
-            'total_scenarios': len(self.scenario_history),
+            'total_scenarios': self.scenario_history.total,
             'uptime': round(current_time - self.start_time, 1),
         }
     
     def get_scenario_history(self, limit=10):
         """Retourne l'historique des scénarios récents"""
-        return self.scenario_history[-limit:] if limit else self.scenario_history
\ No newline at end of file
+        return self.scenario_history.last(limit) if limit else list(self.scenario_history)
+    
+    def get_scenario_counts(self, window=None, by='name'):
+        """Nombre de scénarios par nom (ou module, trigger_type) sur les window dernières secondes"""
+        start = self.clock.time() - window if window is not None else None
+        return self.scenario_history.counts(by, start=start)
@@ -0,0 +1,114 @@
+"""
+Registre des scénarios compilé à partir de config.SCENARIOS
+Chaque scénario est validé une seule fois au démarrage et traduit en valeurs
+forcées du module ciblé ; le déclenchement se résume ensuite à des accès
+dictionnaire, quel que soit le nombre de scénarios déclarés.
+"""
+
+from collections import namedtuple
+from types import MappingProxyType
+from config import SCENARIOS
+
+# Champs de configuration reconnus par module -> attribut forcé du module
+FORCED_FIELDS = {
+    'climate': {'temp': 'forced_temp', 'co2': 'forced_co2'},
+    'presence': {'persons': 'forced_persons', 'movement': 'forced_movement'},
+    'battery': {'voltage': 'forced_voltage', 'current': 'forced_current'},
+}
+
+# Champs communs à tous les scénarios (pas des valeurs forcées)
+SCENARIO_FIELDS = ('module', 'duration', 'priority', 'icon', 'label', 'action')
+
+ScenarioDefinition = namedtuple('ScenarioDefinition', ['name', 'module', 'duration', 'priority', 'values',
+                                                       'icon', 'label', 'action'])
+
+NO_VALUES = MappingProxyType({})
+
+
+class ScenarioRegistry:
+    def __init__(self, scenarios=None):
+        self._definitions = {}
+        self._names = ()
+        self._by_module = {module: () for module in FORCED_FIELDS}
+        for name, config in (SCENARIOS if scenarios is None else scenarios).items():
+            self.register(name, config)
+
+    @staticmethod
+    def compile(name, config):
+        """Valide la configuration d'un scénario et la traduit en valeurs forcées"""
+        module = config.get('module')
+        if module not in FORCED_FIELDS:
+            raise ValueError(f"Scénario {name}: module inconnu {module!r}")
+        if 'duration' not in config:
+            raise ValueError(f"Scénario {name}: durée manquante")
+
+        fields = FORCED_FIELDS[module]
+        values = {}
+        for field, value in config.items():
+            if field in SCENARIO_FIELDS:
+                continue
+            if field not in fields:
+                raise ValueError(f"Scénario {name}: champ {field!r} inconnu pour le module {module}")
+            values[fields[field]] = value
+
+        # Libellé des journaux formaté une fois avec les valeurs de la configuration
+        try:
+            label = config.get('label', f"Scénario {name}").format(**config)
+        except (KeyError, IndexError) as e:
+            raise ValueError(f"Scénario {name}: champ {e} inconnu dans le libellé") from None
+
+        return ScenarioDefinition(name, module, config['duration'], config.get('priority', 0),
+                                  MappingProxyType(values), config.get('icon', '🎬'), label,
+                                  config.get('action', 'Test automatique du système'))
+
+    def register(self, name, config):
+        """Ajoute (ou remplace) un scénario ; retourne sa définition compilée"""
+        definition = self.compile(name, config)
+        previous = self._definitions.get(name)
+        self._definitions[name] = definition
+
+        # Tables précalculées pour le tirage aléatoire et les listes par module
+        if previous is None:
+            self._names += (name,)
+        if previous is not None and previous.module != definition.module:
+            self._by_module[previous.module] = tuple(n for n in self._by_module[previous.module] if n != name)
+        if name not in self._by_module[definition.module]:
+            self._by_module[definition.module] += (name,)
+        return definition
+
+    def unregister(self, name):
+        """Retire un scénario du registre"""
+        definition = self._definitions.pop(name)
+        self._names = tuple(n for n in self._names if n != name)
+        self._by_module[definition.module] = tuple(n for n in self._by_module[definition.module] if n != name)
+        return definition
+
+    def __contains__(self, name):
+        return name in self._definitions
+
+    def get(self, name):
+        """Définition compilée d'un scénario (None s'il est inconnu)"""
+        return self._definitions.get(name)
+
+    def module_for(self, name):
+        """Nom du module ciblé par un scénario ('unknown' s'il est inconnu)"""
+        definition = self._definitions.get(name)
+        return definition.module if definition else 'unknown'
+
+    def values_for(self, name, module=None):
+        """Valeurs forcées (attribut -> valeur) d'un scénario
+
+        Avec module, un scénario destiné à un autre module ne force aucune valeur.
+        """
+        definition = self._definitions.get(name)
+        if definition is None or (module is not None and definition.module != module):
+            return NO_VALUES
+        return definition.values
+
+    def names(self, module=None):
+        """Noms des scénarios, tous ou ceux d'un module, dans l'ordre de déclaration"""
+        return self._names if module is None else self._by_module.get(module, ())
+
+
+# Registre partagé, compilé une fois au chargement de la configuration
+REGISTRY = ScenarioRegistry()
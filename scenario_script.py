@@ -0,0 +1,94 @@
+"""
+Scripts de scénarios chronologiques
+Un script décrit un profil de perturbations, une entrée par ligne (ou séparées
+par des virgules) :
+
+    # Journée type
+    t=0 high_co2
+    t=120 critical_battery for 600s
+    t=2h high_temperature for 30m priority 5
+
+Les temps et durées acceptent les unités s (défaut), m et h. Sans « for », la
+durée est celle du scénario dans config.SCENARIOS. Le script est compilé une
+fois en une chronologie triée, puis programmé dans le noyau à événements :
+rejoué en temps réel, ou en quelques secondes avec l'horloge virtuelle.
+"""
+
+import re
+from collections import namedtuple
+from scenario_registry import REGISTRY
+
+UNITS = {'': 1, 's': 1, 'm': 60, 'h': 3600}
+
+ENTRY_PATTERN = re.compile(
+    r'^t\s*=\s*(?P<time>\d+(?:\.\d+)?)\s*(?P<unit>[smh]?)\s+(?P<name>\w+)'
+    r'(?:\s+for\s+(?P<duration>\d+(?:\.\d+)?)\s*(?P<duration_unit>[smh]?))?'
+    r'(?:\s+priority\s+(?P<priority>-?\d+))?$'
+)
+
+TimelineEvent = namedtuple('TimelineEvent', ['time', 'name', 'module', 'duration', 'priority'])
+
+
+class ScenarioTimeline:
+    def __init__(self, events):
+        # Tri stable : à instant égal, l'ordre du script est conservé
+        self.events = tuple(sorted(events, key=lambda event: event.time))
+
+    @property
+    def length(self):
+        """Instant du dernier déclenchement (s)"""
+        return self.events[-1].time if self.events else 0
+
+    @property
+    def end_time(self):
+        """Fin du dernier scénario du script (s)"""
+        return max((event.time + event.duration for event in self.events), default=0)
+
+    def schedule(self, kernel, modules, start=None, on_trigger=None):
+        """Programme chaque scénario dans le noyau, à start + t
+
+        Les scénarios sont appliqués dans le thread du noyau, avant les cycles
+        capteurs du même instant. on_trigger(event) est appelé après chaque
+        déclenchement (historique, journal).
+        """
+        start = kernel.clock.time() if start is None else start
+        return [kernel.schedule(start + event.time, self._play, event, modules, on_trigger, priority=-1)
+                for event in self.events]
+
+    @staticmethod
+    def _play(event, modules, on_trigger):
+        modules[event.module].force_scenario(event.name, event.duration, event.priority)
+        if on_trigger is not None:
+            on_trigger(event)
+
+
+def compile_script(text, registry=REGISTRY):
+    """Compile le texte d'un script en chronologie triée (ValueError si invalide)"""
+    events = []
+    for line_number, line in enumerate(text.splitlines(), 1):
+        for entry in line.split('#', 1)[0].split(','):
+            entry = entry.strip()
+            if not entry:
+                continue
+
+            match = ENTRY_PATTERN.match(entry)
+            if match is None:
+                raise ValueError(f"Ligne {line_number}: entrée invalide {entry!r}")
+            definition = registry.get(match['name'])
+            if definition is None:
+                raise ValueError(f"Ligne {line_number}: scénario inconnu {match['name']!r}")
+
+            duration = definition.duration
+            if match['duration'] is not None:
+                duration = float(match['duration']) * UNITS[match['duration_unit']]
+            priority = definition.priority if match['priority'] is None else int(match['priority'])
+
+            events.append(TimelineEvent(float(match['time']) * UNITS[match['unit']], definition.name,
+                                        definition.module, duration, priority))
+    return ScenarioTimeline(events)
+
+
+def load_script(path, registry=REGISTRY):
+    """Lit et compile un fichier de script"""
+    with open(path, encoding='utf-8') as script:
+        return compile_script(script.read(), registry)
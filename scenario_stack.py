@@ -0,0 +1,86 @@
+"""
+Pile de scénarios actifs d'un module
+Plusieurs scénarios peuvent se superposer : chacun force certaines valeurs,
+avec une priorité. Les échéances sont rangées dans un tas, ce qui permet de
+trouver et retirer les scénarios expirés en O(log n) sans parcourir la liste.
+Pour chaque valeur forcée, le scénario de plus haute priorité l'emporte
+(à priorité égale, le plus récent).
+"""
+
+import heapq
+import itertools
+
+
+class ActiveScenario:
+    __slots__ = ('id', 'name', 'values', 'priority', 'end_time', 'target', 'cancelled')
+
+    def __init__(self, scenario_id, name, values, priority, end_time, target=None):
+        self.id = scenario_id
+        self.name = name
+        self.values = values
+        self.priority = priority
+        self.end_time = end_time
+        self.target = target        # Sous-ensemble visé (pièces d'un parc), None = tout le module
+        self.cancelled = False
+
+
+class ScenarioStack:
+    def __init__(self):
+        self._heap = []
+        self._active = {}
+        self._ids = itertools.count(1)
+        self.expired_count = 0
+
+    def push(self, name, values, end_time, priority=0, target=None):
+        """Ajoute un scénario actif jusqu'à end_time ; retourne son identifiant"""
+        scenario = ActiveScenario(next(self._ids), name, dict(values), priority, end_time, target)
+        self._active[scenario.id] = scenario
+        heapq.heappush(self._heap, (end_time, scenario.id, scenario))
+        return scenario.id
+
+    def cancel(self, scenario_id):
+        """Retire un scénario avant son échéance (son entrée du tas est ignorée plus tard)"""
+        scenario = self._active.pop(scenario_id, None)
+        if scenario is None:
+            return False
+        scenario.cancelled = True
+        return True
+
+    def expire(self, now):
+        """Retire les scénarios arrivés à échéance et les retourne"""
+        expired = []
+        heap = self._heap
+        while heap and heap[0][0] <= now:
+            scenario = heapq.heappop(heap)[2]
+            if scenario.cancelled:
+                continue
+            del self._active[scenario.id]
+            expired.append(scenario)
+        self.expired_count += len(expired)
+        return expired
+
+    def next_expiry(self):
+        """Échéance du prochain scénario actif (None si aucun)"""
+        heap = self._heap
+        while heap and heap[0][2].cancelled:
+            heapq.heappop(heap)
+        return heap[0][0] if heap else None
+
+    @property
+    def active_count(self):
+        return len(self._active)
+
+    def active(self):
+        """Scénarios actifs, du moins au plus prioritaire (puis du plus ancien au plus récent)"""
+        return sorted(self._active.values(), key=lambda scenario: (scenario.priority, scenario.id))
+
+    def resolved(self):
+        """Valeurs forcées résultantes : les scénarios prioritaires écrasent les autres"""
+        values = {}
+        for scenario in self.active():
+            values.update(scenario.values)
+        return values
+
+    def end_time(self):
+        """Fin du dernier scénario actif (0 si aucun)"""
+        return max((scenario.end_time for scenario in self._active.values()), default=0)
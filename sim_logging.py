@@ -0,0 +1,137 @@
+"""
+Journalisation asynchrone de la simulation
+Les modules écrivent via des loggers standard (logging) nommés
+'simulation.<module>' ; les enregistrements sont déposés dans une file bornée
+et un thread d'écriture (QueueListener) les formate et les écrit sur la sortie.
+Le thread de simulation ne fait donc jamais d'entrée/sortie, et avec les
+arguments différés (log.info("%d pers.", n)) le message n'est même pas formaté
+lorsque le niveau du module est désactivé. Les sorties du sink console
+passent par le même thread (OUTPUT), écrites telles quelles et quel que soit
+le niveau du journal.
+"""
+
+import atexit
+import logging
+import logging.handlers
+import queue
+import sys
+from config import LOG_CONFIG
+
+ROOT_LOGGER = 'simulation'
+OUTPUT_LOGGER = f"{ROOT_LOGGER}.output"
+
+_listener = None
+_handler = None
+
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """Dépose les enregistrements sans bloquer ; file pleine = enregistrement abandonné"""
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record):
+        # Le formatage est laissé au thread d'écriture (sauf exception à figer tout de suite)
+        if record.exc_info:
+            return super().prepare(record)
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class WriterFormatter(logging.Formatter):
+    """Format du journal ; les lignes de sortie des sinks sont écrites telles quelles"""
+
+    def format(self, record):
+        if record.name == OUTPUT_LOGGER:
+            return record.getMessage()
+        return super().format(record)
+
+
+class QueuedOutput:
+    """Flux texte dont les écritures sont confiées au thread d'écriture
+
+    Avant configure() (ou après shutdown()), écrit directement sur la sortie standard.
+    """
+
+    def __init__(self):
+        self._logger = logging.getLogger(OUTPUT_LOGGER)
+
+    def write(self, text):
+        if _listener is None:
+            sys.stdout.write(text)
+        else:
+            self._logger.info(text[:-1] if text.endswith("\n") else text)
+
+    def flush(self):
+        pass
+
+
+# Sortie standard non bloquante partagée par les sinks console
+OUTPUT = QueuedOutput()
+
+
+def get_logger(name):
+    """Logger d'un module de la simulation ('presence', 'scenarios'...)
+
+    Avant configure(), seuls les avertissements et erreurs sont affichés
+    (gestionnaire par défaut de logging).
+    """
+    return logging.getLogger(f"{ROOT_LOGGER}.{name}")
+
+
+def configure(stream=None, level=None, levels=None):
+    """Installe la file et le thread d'écriture (une seule fois)
+
+    Un niveau explicite (--log-level) remplace aussi les niveaux par module de
+    LOG_CONFIG ; seuls ceux passés dans levels s'appliquent alors.
+    """
+    global _listener, _handler
+    if _listener is not None:
+        return _listener
+
+    root = logging.getLogger(ROOT_LOGGER)
+    root.setLevel(level or LOG_CONFIG['level'])
+    if levels is None:
+        levels = LOG_CONFIG['levels'] if level is None else {}
+    for name, module_level in levels.items():
+        logging.getLogger(f"{ROOT_LOGGER}.{name}").setLevel(module_level)
+    logging.getLogger(OUTPUT_LOGGER).setLevel(logging.INFO)
+
+    writer = logging.StreamHandler(stream if stream is not None else sys.stdout)
+    writer.setFormatter(WriterFormatter(LOG_CONFIG['format']))
+    _handler = DroppingQueueHandler(queue.Queue(LOG_CONFIG['queue_size']))
+    root.addHandler(_handler)
+    root.propagate = False
+
+    _listener = logging.handlers.QueueListener(_handler.queue, writer)
+    _listener.start()
+    atexit.register(shutdown)
+    return _listener
+
+
+def set_level(level, module=None):
+    """Change le niveau global ou celui d'un module en cours d'exécution"""
+    name = ROOT_LOGGER if module is None else f"{ROOT_LOGGER}.{module}"
+    logging.getLogger(name).setLevel(level)
+
+
+def dropped():
+    """Enregistrements abandonnés faute de place dans la file"""
+    return _handler.dropped if _handler is not None else 0
+
+
+def shutdown():
+    """Écrit les enregistrements en attente puis arrête le thread d'écriture"""
+    global _listener, _handler
+    if _listener is None:
+        return
+    _listener.stop()
+    logging.getLogger(ROOT_LOGGER).removeHandler(_handler)
+    _listener = None
+    _handler = None
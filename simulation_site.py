@@ -0,0 +1,42 @@
+"""
+Site de simulation : un ensemble de modules Climate, Presence, Battery
+et son gestionnaire de scénarios, sans interface ni thread
+"""
+
+from climate_module import ClimateModule
+from presence_module import PresenceModule
+from battery_module import BatteryModule
+from scenario_manager import ScenarioManager
+
+
+class Site:
+    def __init__(self, name, clock=None, event_log=None):
+        self.name = name
+        self.climate_module = ClimateModule(clock)
+        self.presence_module = PresenceModule(clock)
+        self.battery_module = BatteryModule(clock)
+        self.modules = {
+            'climate': self.climate_module,
+            'presence': self.presence_module,
+            'battery': self.battery_module,
+        }
+
+        # Gestionnaire piloté de l'extérieur (check_scenarios), jamais démarré en thread
+        self.scenario_manager = ScenarioManager(
+            self.climate_module,
+            self.presence_module,
+            self.battery_module,
+            event_log,
+            clock
+        )
+
+    def get_status(self):
+        """Retourne le statut de tous les modules du site"""
+        return {name: module.get_status() for name, module in self.modules.items()}
+
+    def get_alarms(self):
+        """Retourne les alarmes actives de tous les modules du site"""
+        alarms = []
+        for module in self.modules.values():
+            alarms.extend(module.get_alarms())
+        return alarms
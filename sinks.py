@@ -0,0 +1,128 @@
+"""
+Sorties (sinks) pour le mode sans interface graphique
+Reçoivent le statut des modules, les alarmes et les événements du journal.
+Les alarmes arrivent sous forme d'objets Alarm, avec la source qui les a
+publiées (nom du site) : chaque sink les compare par identifiant à la
+publication précédente de la même source, puis les alarmes levées ou
+disparues passent par un AlarmAggregator (déduplication, limitation, synthèse)
+avant d'être écrites. Une tempête sur des centaines de sites reste bornée à
+quelques lignes par type d'alarme. Les horodatages suivent l'horloge de la
+simulation (temps virtuel compris).
+"""
+
+import json
+import time
+from alarm_aggregator import AlarmAggregator
+from alarms import diff_alarms
+from clock import WALL_CLOCK
+from sim_logging import OUTPUT
+
+
+class AlarmTracker:
+    """Alarmes actives de chaque source, comparées par identifiant puis agrégées"""
+
+    def __init__(self, clock=None):
+        self.aggregator = AlarmAggregator(clock)
+        self.active = {}        # source -> {identifiant: alarme}
+
+    def update(self, alarms, source=None):
+        """Soumet les changements d'une source et retourne les regroupements prêts à écrire"""
+        previous = self.active.get(source, {})
+        raised, cleared, _ = diff_alarms(previous.keys(), alarms)
+        self.aggregator.submit(raised, source)
+        self.aggregator.submit([previous[alarm_id] for alarm_id in cleared], source, cleared=True)
+        self.active[source] = {alarm.id: alarm for alarm in alarms}
+        return self.aggregator.drain()
+
+
+class ConsoleSink:
+    """Écrit le statut et les alarmes sur la sortie standard
+
+    Par défaut les lignes passent par le thread d'écriture de sim_logging : le
+    cycle de publication ne bloque jamais sur stdout.
+    """
+
+    def __init__(self, stream=None, clock=None):
+        self.stream = stream if stream is not None else OUTPUT
+        self.clock = clock if clock is not None else WALL_CLOCK
+        self.alarms = AlarmTracker(self.clock)
+
+    def _time(self):
+        """Heure de la simulation (HH:MM:SS)"""
+        return time.strftime("%H:%M:%S", time.localtime(self.clock.time()))
+
+    def write_status(self, statuses):
+        """Écrit une ligne de statut résumant les trois modules"""
+        climate = statuses['climate']
+        presence = statuses['presence']
+        battery = statuses['battery']
+        current_time = self._time()
+        self.stream.write(
+            f"[{current_time}] 🌡️ {climate['temperature']}°C {climate['humidity']}% "
+            f"CO₂:{climate['co2']}ppm | 👥 {presence['persons_count']} pers. "
+            f"Lampes:{'ON' if presence['lights_on'] else 'OFF'} | "
+            f"🔋 {battery['voltage']}V {battery['battery_status']}\n"
+        )
+
+    def write_alarms(self, alarms, source=None):
+        """Écrit les alarmes levées ou disparues depuis la publication précédente de source"""
+        format_line = self.alarms.aggregator.format_line
+        for alarm, sources, cleared in self.alarms.update(alarms, source):
+            label = "✅ FIN D'ALARME" if cleared else "⚠️ ALARME"
+            self.stream.write(f"{label}: {format_line(alarm, sources, cleared)}\n")
+
+    def log_event(self, message, event_type="INFO", show_timestamp=True):
+        """Même signature que HMIInterface.log_event"""
+        if show_timestamp:
+            current_time = self._time()
+            self.stream.write(f"[{current_time}] [{event_type}] {message}\n")
+        else:
+            self.stream.write(f"[{event_type}] {message}\n")
+
+
+class JsonLinesSink:
+    """Écrit chaque statut, alarme et événement sous forme de ligne JSON"""
+
+    def __init__(self, path, clock=None):
+        self.file = open(path, 'a', encoding='utf-8')
+        self.clock = clock if clock is not None else WALL_CLOCK
+        self.alarms = AlarmTracker(self.clock)
+
+    def _write(self, record):
+        record['timestamp'] = self.clock.time()
+        self.file.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+    def write_status(self, statuses):
+        self._write({'type': 'status', 'status': statuses})
+
+    def write_alarms(self, alarms, source=None):
+        """Une ligne par regroupement d'alarmes levées ou disparues"""
+        format_line = self.alarms.aggregator.format_line
+        for alarm, sources, cleared in self.alarms.update(alarms, source):
+            self._write({
+                'type': 'alarm',
+                'state': 'cleared' if cleared else 'raised',
+                'id': alarm.id,
+                'severity': alarm.severity,
+                'sources': len(sources),
+                'message': format_line(alarm, sources, cleared),
+            })
+
+    def log_event(self, message, event_type="INFO", show_timestamp=True):
+        self._write({'type': 'event', 'event_type': event_type, 'message': message})
+
+    def close(self):
+        self.file.close()
+
+
+class NullSink:
+    """Ignore toutes les sorties (mesures de performance, longues simulations)"""
+
+    def write_status(self, statuses):
+        pass
+
+    def write_alarms(self, alarms, source=None):
+        pass
+
+    def log_event(self, message, event_type="INFO", show_timestamp=True):
+        pass
@@ -0,0 +1,62 @@
+"""
+Instantanés immuables et versionnés de l'état de la simulation
+La boucle de simulation publie un instantané complet par cycle ; les lecteurs
+(HMI, exports, tests) récupèrent une simple référence au lieu d'interroger les
+modules pendant qu'ils sont modifiés par un autre thread.
+"""
+
+from collections import namedtuple
+from types import MappingProxyType
+
+
+class SimulationSnapshot(namedtuple('SimulationSnapshot', ['version', 'timestamp', 'status', 'alarms'])):
+    """État de tous les modules à un instant : status et alarms par nom de module"""
+
+    __slots__ = ()
+
+    def plain_status(self):
+        """Copie modifiable des statuts (pour la sérialisation JSON par exemple)"""
+        return {name: dict(status) for name, status in self.status.items()}
+
+    @property
+    def active_alarms(self):
+        """Toutes les alarmes structurées, dans l'ordre des modules"""
+        return [alarm for alarms in self.alarms.values() for alarm in alarms]
+
+    @property
+    def all_alarms(self):
+        """Texte de toutes les alarmes (formaté ici, au moment de l'export)"""
+        return [alarm.message for alarm in self.active_alarms]
+
+
+class SnapshotPublisher:
+    def __init__(self, modules, clock, history=None):
+        self.modules = modules
+        self.clock = clock
+        # Historique optionnel (timeseries.TimeSeriesStore) alimenté à chaque publication
+        self.history = history
+        self.version = 0
+        # Référence vers le dernier instantané, remplacée en une seule affectation
+        self._current = None
+
+    def publish(self):
+        """Construit un nouvel instantané puis le rend visible aux lecteurs"""
+        status = {}
+        alarms = {}
+        for name, module in self.modules.items():
+            status[name] = MappingProxyType(dict(module.get_status()))
+            alarms[name] = tuple(module.get_alarms())
+
+        snapshot = SimulationSnapshot(self.version + 1, self.clock.time(),
+                                      MappingProxyType(status), MappingProxyType(alarms))
+        # L'affectation d'une référence est atomique : un lecteur voit l'ancien
+        # ou le nouvel instantané, jamais un état partiellement mis à jour
+        self._current = snapshot
+        self.version = snapshot.version
+        if self.history is not None:
+            self.history.record(snapshot)
+        return snapshot
+
+    def latest(self):
+        """Retourne le dernier instantané publié (None avant la première publication)"""
+        return self._current
@@ -0,0 +1,48 @@
+"""
+Mémoïsation des vues get_status des modules
+Chaque module incrémente sa version d'état lorsqu'il est modifié (cycle capteurs,
+cycle de contrôle, scénario) ; tant que la version ne change pas, les lectures
+répétées (HMI, instantanés, sinks) réutilisent le résultat déjà construit.
+"""
+
+
+class StateCache:
+    def __init__(self):
+        self.version = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries = {}
+
+    def invalidate(self):
+        """Signale un changement d'état : les vues en cache deviennent obsolètes"""
+        self.version += 1
+
+    def get(self, name, build, key=None):
+        """Retourne la vue name, reconstruite par build() seulement si nécessaire
+
+        key complète la version pour les vues qui dépendent aussi du temps écoulé.
+        Le résultat est partagé entre les lecteurs : il ne doit pas être modifié.
+        """
+        cache_key = (self.version, key)
+        entry = self._entries.get(name)
+        if entry is not None and entry[0] == cache_key:
+            self.hits += 1
+            return entry[1]
+
+        self.misses += 1
+        value = build()
+        self._entries[name] = (cache_key, value)
+        return value
+
+    @property
+    def hit_rate(self):
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def as_dict(self):
+        return {
+            'version': self.version,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hit_rate, 3),
+        }
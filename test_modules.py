@@ -98,6 +98,1416 @@ def test_battery_module():
     print("✅ Module Battery testé\\n")
 
 
+class RecordingSink:
+    """Sink de test qui conserve tout ce qu'il reçoit"""
+    
+    def __init__(self):
+        self.statuses = []
+        self.alarms = []
+        self.sources = []
+        self.events = []
+    
+    def write_status(self, statuses):
+        self.statuses.append(statuses)
+    
+    def write_alarms(self, alarms, source=None):
+        self.alarms.append(alarms)
+        self.sources.append(source)
+    
+    def log_event(self, message, event_type="INFO", show_timestamp=True):
+        self.events.append((event_type, message))
+
+
+def test_headless_simulation():
+    """Test de la simulation sans interface graphique"""
+    print("🖥️ Test du mode headless...")
+    
+    from main import MonitoringSimulation
+    
+    sink = RecordingSink()
+    simulation = MonitoringSimulation(headless=True, sink=sink)
+    assert simulation.root is None
+    assert simulation.hmi_interface is None
+    assert simulation.scenario_manager.hmi_interface is sink
+    
+    # Un seul cycle : la durée nulle arrête la boucle après la première itération
+    simulation.running = True
+    simulation._simulation_loop(duration=0)
+    simulation.stop()
+    
+    assert len(sink.statuses) == 1
+    assert set(sink.statuses[0]) == {'climate', 'presence', 'battery'}
+    
+    simulation.scenario_manager.trigger_manual_scenario('high_co2')
+    simulation.scenario_manager._trigger_random_scenario()
+    assert sink.events
+    
+    print("✅ Mode headless testé\n")
+
+
+def test_virtual_clock():
+    """Test de l'horloge virtuelle : expiration des scénarios sans attendre"""
+    print("⏩ Test de l'horloge virtuelle...")
+    
+    from clock import VirtualClock
+    from scenario_manager import ScenarioManager
+    from config import PRESENCE_CONFIG, SCENARIO_DELAY
+    
+    clock = VirtualClock(start=0)
+    climate = ClimateModule(clock)
+    presence = PresenceModule(clock)
+    battery = BatteryModule(clock)
+    
+    # Expiration d'un scénario après 24h virtuelles, sans dormir
+    climate.force_scenario('high_temperature', 86400)
+    climate.update_sensors()
+    assert climate.scenario_active
+    clock.sleep(86400 + 1)
+    climate.update_sensors()
+    assert not climate.scenario_active
+    assert climate.forced_temp is None
+    
+    # Extinction des lampes après light_off_delay
+    presence.force_scenario('presence_detected', 1)
+    presence.update_sensors()
+    presence.update_control_logic()
+    assert presence.lights_on
+    presence.force_scenario('no_presence', 3600)
+    clock.advance(PRESENCE_CONFIG['light_off_delay'] + 1)
+    presence.update_sensors()
+    presence.update_control_logic()
+    assert not presence.lights_on
+    
+    # Planification des scénarios automatiques sur l'horloge virtuelle
+    manager = ScenarioManager(climate, presence, battery, clock=clock)
+    manager.check_scenarios()
+    assert len(manager.scenario_history) == 0
+    clock.advance(SCENARIO_DELAY)
+    manager.check_scenarios()
+    assert len(manager.scenario_history) == 1
+    assert manager.scenario_history[0]['timestamp'] == clock.time()
+    
+    # Sinks horodatés en temps virtuel : une heure simulée couvre une heure d'horodatages
+    import io
+    import json
+    import os
+    import tempfile
+    from main import MonitoringSimulation, create_sink
+    from sinks import ConsoleSink
+    
+    clock = VirtualClock(start=0)
+    path = os.path.join(tempfile.mkdtemp(), 'virtual.jsonl')
+    simulation = MonitoringSimulation(headless=True, sink=create_sink('jsonl', path, clock), clock=clock)
+    simulation.running = True
+    simulation._simulation_loop(duration=3600)
+    simulation.stop()
+    with open(path, encoding='utf-8') as f:
+        timestamps = [json.loads(line)['timestamp'] for line in f]
+    assert timestamps == sorted(timestamps)
+    assert timestamps[0] <= 2 and timestamps[-1] >= 3598
+    
+    stream = io.StringIO()
+    console = ConsoleSink(stream, VirtualClock(start=time.mktime((2026, 1, 1, 12, 34, 56, 0, 0, -1))))
+    console.log_event("test")
+    assert stream.getvalue() == "[12:34:56] [INFO] test\n"
+    
+    print("✅ Horloge virtuelle testée\n")
+
+
+def test_climate_fleet():
+    """Test du moteur Climate vectorisé multi-pièces"""
+    print("🏢 Test du parc ClimateFleet...")
+    
+    from clock import VirtualClock
+    from climate_fleet import ClimateFleet
+    from config import CLIMATE_CONFIG
+    
+    clock = VirtualClock(start=0)
+    fleet = ClimateFleet(500, clock=clock, seed=42)
+    
+    # Scénario sur les 100 premières pièces uniquement
+    fleet.force_scenario('high_temperature', 30, rooms=slice(0, 100))
+    for _ in range(50):
+        fleet.update_sensors()
+        fleet.update_control_logic()
+        clock.advance(0.5)
+    
+    temp_min, temp_max = CLIMATE_CONFIG['temp_range']
+    co2_min, co2_max = CLIMATE_CONFIG['co2_range']
+    assert ((fleet.temperature[100:] >= temp_min) & (fleet.temperature[100:] <= temp_max)).all()
+    assert ((fleet.co2 >= co2_min) & (fleet.co2 <= co2_max)).all()
+    assert fleet.ventilator_on[:100].all()
+    
+    # Vue par pièce compatible avec ClimateModule.get_status
+    status = fleet.get_status(0)
+    assert set(status) == set(ClimateModule().get_status())
+    assert status['scenario_active'] and status['ventilator_on']
+    alarm = fleet.get_alarms(0)[0]
+    assert alarm.id == 'climate.high_temperature' and alarm.message.startswith("Température élevée")
+    assert not fleet.get_alarms(150)
+    
+    # Fin du scénario : hystérésis (le ventilateur reste actif au-dessus du seuil bas)
+    clock.advance(30)
+    fleet.update_sensors()
+    assert not fleet.scenario_active.any()
+    fleet.temperature[:] = 27.0
+    fleet.update_control_logic()
+    assert fleet.ventilator_on[:100].all()
+    fleet.temperature[:] = 25.0
+    fleet.update_control_logic()
+    assert not fleet.ventilator_on.any()
+    
+    print("✅ Parc ClimateFleet testé\n")
+
+
+def test_battery_pack():
+    """Test du pack batterie cellule par cellule"""
+    print("🔋 Test du BatteryPack...")
+    
+    import numpy as np
+    from clock import VirtualClock
+    from battery_pack import BatteryPack
+    
+    clock = VirtualClock(start=0)
+    pack = BatteryPack(series=50, parallel=40, clock=clock, seed=7)
+    
+    start = time.perf_counter()
+    for _ in range(100):
+        pack.update_sensors()
+        pack.update_control_logic()
+        clock.advance(1)
+    per_tick = (time.perf_counter() - start) / 100
+    print(f"  {pack.cell_count} cellules: {per_tick * 1e6:.0f} µs/cycle")
+    
+    status = pack.get_status()
+    assert set(BatteryModule().get_status()) <= set(status)
+    assert status['battery_status'] == 'Normal'
+    assert status['weak_cells'] == 0
+    
+    # Une cellule défaillante est signalée avec le déséquilibre qu'elle provoque
+    pack.voltage[3, 5] = 3.0
+    pack.update_control_logic()
+    assert pack.get_weak_cells() == [(3, 5)]
+    assert pack.battery_status == 'Normal'
+    
+    pack.voltage[3, :] = 3.1
+    pack.update_control_logic()
+    assert pack.battery_status == 'Critical' and pack.power_save_mode
+    alarms = {alarm.id: alarm for alarm in pack.get_alarms()}
+    assert set(alarms) == {'battery_pack.critical', 'battery_pack.weak_cells', 'battery_pack.imbalance'}
+    assert alarms['battery_pack.weak_cells'].message == "40 cellule(s) faible(s) détectée(s)"
+    assert alarms['battery_pack.imbalance'].message.startswith("Déséquilibre du pack")
+    pack.temperature[0, 0] = 50.0
+    pack.update_control_logic()
+    assert 'battery_pack.high_temperature' in {alarm.id for alarm in pack.get_alarms()}
+    
+    # Scénario forcé puis expiration
+    pack.force_scenario('critical_battery', 15)
+    pack.update_sensors()
+    pack.update_control_logic()
+    assert pack.get_status()['battery_status'] == 'Critical'
+    clock.advance(16)
+    pack.update_sensors()
+    assert not pack.scenario_active
+    
+    # Scénarios superposés par groupe série / cellule, avec priorité et annulation
+    low = pack.force_scenario('low_battery', 60, cells=slice(0, 10))
+    critical = pack.force_scenario('critical_battery', 30, cells=(2, slice(0, 5)), priority=5)
+    assert pack.scenarios.active_count == 2
+    assert (pack.forced_cell_voltage[2, :5] == 3.1).all() and (pack.forced_cell_voltage[2, 5:] == 3.3).all()
+    assert np.isnan(pack.forced_cell_voltage[10:]).all() and not pack.scenario_cells[10:].any()
+    pack.update_sensors()
+    assert (np.abs(pack.voltage[2, :5] - 3.1) <= 0.03).all()
+    assert (np.abs(pack.voltage[0] - 3.3) <= 0.03).all()
+    pack.cancel_scenario(critical)
+    assert (pack.forced_cell_voltage[2] == 3.3).all()
+    
+    # Expiration par le tas, via la file de commandes
+    pack.commands.submit('force_scenario', 'critical_battery', 5, 40)
+    pack.update_sensors()
+    assert pack.scenarios.active_count == 2 and pack.scenario_cells[40].all()
+    clock.advance(6)
+    pack.update_sensors()
+    assert pack.scenarios.active_count == 1 and not pack.scenario_cells[40].any()
+    pack.cancel_scenario(low)
+    assert not pack.scenario_active and np.isnan(pack.forced_cell_current).all()
+    
+    print("✅ BatteryPack testé\n")
+
+
+def test_event_driven_presence():
+    """Test de la simulation Presence pilotée par événements"""
+    print("📅 Test de EventDrivenPresence...")
+    
+    from clock import VirtualClock
+    from presence_events import EventDrivenPresence
+    from config import PRESENCE_CONFIG, UPDATE_INTERVAL
+    
+    clock = VirtualClock(start=0)
+    presence = EventDrivenPresence(50, clock=clock, seed=3)
+    
+    # Une heure virtuelle : beaucoup moins d'événements que de cycles
+    presence.advance_to(3600)
+    ticks = 50 * 3600 / UPDATE_INTERVAL
+    print(f"  {presence.events_processed} événements pour {ticks:.0f} cycles équivalents")
+    assert 0 < presence.events_processed < ticks / 2
+    assert set(presence.get_status(0)) == set(PresenceModule().get_status())
+    
+    # Extinction programmée exactement light_off_delay après le dernier mouvement
+    presence.force_scenario(0, 'presence_detected', 10)
+    presence.advance_to(3610)
+    assert presence.get_status(0)['lights_on']
+    presence.force_scenario(0, 'no_presence', 600)
+    delay = PRESENCE_CONFIG['light_off_delay']
+    presence.advance_to(3610 + delay - 0.01)
+    assert presence.get_status(0)['lights_on']
+    presence.advance_to(3610 + delay)
+    assert not presence.get_status(0)['lights_on']
+    assert presence.get_status(0)['persons_count'] == 0
+    assert presence.get_alarms(0) == []
+    
+    # Lampes maintenues allumées sans personne : alarme structurée de PresenceModule
+    zone = presence.zones[0]
+    zone.lights_on = True
+    presence.advance_to(3610 + 3 * delay)
+    assert [alarm.id for alarm in presence.get_alarms(0)] == ['presence.lights_left_on']
+    
+    # Scénarios superposés par zone : le plus court ne remplace pas le plus long
+    presence = EventDrivenPresence(2, clock=clock, seed=3)
+    presence.advance_to(0)
+    presence.force_scenario(1, 'presence_detected', 600)
+    presence.force_scenario(1, 'no_presence', 10)
+    assert presence.get_status(1)['persons_count'] == 0
+    presence.advance_to(20)
+    status = presence.get_status(1)
+    assert status['scenario_active'] and status['persons_count'] == 3 and status['lights_on']
+    assert presence.zones[1].scenario_end_time == 600
+    
+    # Priorité : un scénario moins prioritaire ne masque pas le courant ; annulation
+    absence = presence.force_scenario(1, 'no_presence', 60, priority=-1)
+    assert presence.get_status(1)['persons_count'] == 3
+    presence.cancel_scenario(1, absence)
+    assert presence.zones[1].scenarios.active_count == 1
+    urgent = presence.force_scenario(1, 'no_presence', 60, priority=5)
+    assert presence.get_status(1)['persons_count'] == 0
+    presence.cancel_scenario(1, urgent)
+    assert presence.get_status(1)['persons_count'] == 3
+    presence.advance_to(600)
+    assert not presence.get_status(1)['scenario_active']
+    assert not presence.zones[0].scenario_active
+    
+    print("✅ EventDrivenPresence testé\n")
+
+
+def test_event_kernel():
+    """Test du noyau à événements discrets"""
+    print("🧮 Test du noyau EventKernel...")
+    
+    from clock import VirtualClock
+    from event_kernel import EventKernel
+    from config import PRESENCE_CONFIG
+    
+    clock = VirtualClock(start=0)
+    kernel = EventKernel(clock)
+    fired = []
+    
+    kernel.schedule_every(2, lambda: fired.append(('tick', clock.time())))
+    kernel.schedule(5, lambda: fired.append(('once', clock.time())))
+    kernel.schedule(3, lambda: fired.append(('cancelled', clock.time()))).cancel()
+    kernel.run(until=6)
+    
+    assert fired == [('tick', 0), ('tick', 2), ('tick', 4), ('once', 5), ('tick', 6)]
+    assert clock.time() == 6
+    
+    # Expiration de scénario et extinction des lampes programmées comme événements
+    presence = PresenceModule(clock)
+    presence.kernel = kernel
+    presence.force_scenario('presence_detected', 10)
+    presence.update_sensors()
+    presence.update_control_logic()
+    presence.forced_persons = 0
+    presence.persons_count = 0
+    presence.forced_movement = False
+    presence.update_control_logic()
+    assert presence.lights_on
+    
+    light_off_time = presence.last_movement_time + PRESENCE_CONFIG['light_off_delay']
+    kernel.run(until=light_off_time)
+    assert not presence.lights_on
+    kernel.run(until=clock.time() + 10)
+    assert not presence.scenario_active
+    
+    print("✅ Noyau EventKernel testé\n")
+
+
+def test_fixed_rate_overruns():
+    """Test des échéances absolues et de la politique de dépassement"""
+    print("⏱️ Test de l'ordonnanceur à cadence fixe...")
+    
+    from clock import VirtualClock
+    from event_kernel import EventKernel
+    
+    for policy, expected_starts, expected_skipped in (
+        ('skip', [0, 2, 8, 10], 2),
+        ('catch_up', [0, 2, 7, 7, 8, 10], 0),
+    ):
+        clock = VirtualClock(start=0)
+        kernel = EventKernel(clock)
+        starts = []
+        
+        def work():
+            starts.append(clock.time())
+            if len(starts) == 2:
+                clock.advance(5)  # Cycle trop long : dépasse deux échéances
+        
+        tick = kernel.schedule_every(2, work, policy=policy)
+        kernel.run(until=10)
+        
+        assert starts == expected_starts, (policy, starts)
+        assert tick.stats.overruns == 1 + (policy == 'catch_up')
+        assert tick.stats.skipped == expected_skipped
+        assert tick.stats.max_lateness == (3 if policy == 'catch_up' else 0)
+        print(f"  {policy}: {tick.stats.as_dict()}")
+    
+    print("✅ Ordonnanceur à cadence fixe testé\n")
+
+
+def test_multi_rate_scheduling():
+    """Test des cadences propres à chaque module"""
+    print("🎚️ Test de l'ordonnancement multi-cadence...")
+    
+    from main import MonitoringSimulation
+    from clock import VirtualClock
+    from config import MODULE_RATES
+    
+    simulation = MonitoringSimulation(headless=True, sink=RecordingSink(), clock=VirtualClock(start=0))
+    
+    # Le contrôle batterie doit toujours voir l'échantillon du même instant
+    battery = simulation.battery_module
+    control_sample_times = []
+    original_control = battery.update_control_logic
+    
+    def checked_control():
+        control_sample_times.append((battery.last_update, simulation.clock.time()))
+        original_control()
+    
+    battery.update_control_logic = checked_control
+    
+    simulation.running = True
+    simulation._simulation_loop(duration=60)
+    simulation.stop()
+    
+    for name, rates in MODULE_RATES.items():
+        assert simulation.tick_events[f'{name}.sensors'].stats.ticks == 60 // rates['sensor_interval'] + 1
+        assert simulation.tick_events[f'{name}.control'].stats.ticks == 60 // rates['control_interval'] + 1
+    assert all(sample == now for sample, now in control_sample_times)
+    
+    # La cadence change la finesse, pas la vitesse : même dérive moyenne sur 300s
+    import random
+    
+    def final_temperature(interval, seed):
+        random.seed(seed)
+        clock = VirtualClock(start=0)
+        module = BatteryModule(clock)
+        module.sensor_interval = interval
+        for _ in range(int(300 / interval)):
+            clock.advance(interval)
+            module.update_sensors()
+        return module.temperature
+    
+    fast = sum(final_temperature(0.5, seed) for seed in range(40)) / 40
+    slow = sum(final_temperature(2.0, seed) for seed in range(40)) / 40
+    assert abs(fast - slow) < 5, (fast, slow)
+    
+    print("✅ Ordonnancement multi-cadence testé\n")
+
+
+def test_asyncio_runtime():
+    """Test du runtime asyncio avec de nombreux sites et du pont tkinter"""
+    print("🌀 Test du runtime asyncio...")
+    
+    import asyncio
+    from async_runtime import AsyncSimulationRuntime, TkAsyncBridge
+    from simulation_site import Site
+    
+    sites = [Site(f"site-{i}") for i in range(200)]
+    sink = RecordingSink()
+    runtime = AsyncSimulationRuntime(sites, sinks=[sink], publish_interval=0.5)
+    
+    # Cadences réduites pour un test court
+    for site in sites:
+        for module in site.modules.values():
+            module.sensor_interval = module.control_interval = 0.25
+    
+    asyncio.run(runtime.run(duration=1.1))
+    assert not runtime.running
+    assert all(task.done() for task in runtime.tasks)
+    assert len(sink.statuses) >= 2 * len(sites)
+    assert set(sink.sources) == {site.name for site in sites}
+    assert sites[-1].battery_module.last_update > sites[-1].scenario_manager.start_time
+    
+    # Pont tkinter : la boucle asyncio avance à chaque rappel root.after()
+    class FakeRoot:
+        def __init__(self):
+            self.pending = []
+        
+        def after(self, delay_ms, callback):
+            self.pending.append(callback)
+    
+    loop = asyncio.new_event_loop()
+    calls = []
+    loop.call_soon(calls.append, 'ready')
+    root = FakeRoot()
+    bridge = TkAsyncBridge(root, loop)
+    bridge.start()
+    assert calls == ['ready']
+    assert root.pending == [bridge._pump]
+    bridge.stop()
+    loop.close()
+    
+    print("✅ Runtime asyncio testé\n")
+
+
+def test_multisite_runner():
+    """Test de la simulation multi-sites répartie sur des processus"""
+    print("🏭 Test du MultiSiteRunner...")
+    
+    from multisite import MultiSiteRunner, simulate_shard, merge_summaries
+    
+    runner = MultiSiteRunner(7, workers=2, seed=5)
+    assert sorted(len(shard) for shard in runner.shards()) == [3, 4]
+    
+    snapshots = runner.run(duration=20, interval=2)
+    assert len(snapshots) == 11
+    assert all(snapshot['sites'] == 7 for snapshot in snapshots)
+    assert sum(snapshots[-1]['battery_status'].values()) == 7
+    assert snapshots[-1]['time'] - snapshots[0]['time'] == 20
+    
+    # Un shard est reproductible à graine identique
+    first = simulate_shard(['a', 'b'], 10, 2, 11, 0)
+    second = simulate_shard(['a', 'b'], 10, 2, 11, 0)
+    assert merge_summaries([first[-1]]) == merge_summaries([second[-1]])
+    
+    print("✅ MultiSiteRunner testé\n")
+
+
+def test_state_snapshots():
+    """Test des instantanés immuables publiés à chaque cycle"""
+    print("📸 Test des instantanés de simulation...")
+    
+    from main import MonitoringSimulation
+    from clock import VirtualClock
+    from snapshot import SnapshotPublisher
+    
+    clock = VirtualClock(start=0)
+    modules = {'climate': ClimateModule(clock), 'battery': BatteryModule(clock)}
+    publisher = SnapshotPublisher(modules, clock)
+    assert publisher.latest() is None
+    
+    first = publisher.publish()
+    assert first.version == 1 and publisher.latest() is first
+    # Les lecteurs ne peuvent pas modifier un instantané publié
+    for mapping in (first.status, first.status['climate'], first.alarms):
+        try:
+            mapping['x'] = 1
+            assert False, "L'instantané devrait être immuable"
+        except TypeError:
+            pass
+    
+    # Un nouvel instantané ne modifie pas l'ancien
+    temperature = first.status['climate']['temperature']
+    modules['climate'].force_scenario('high_temperature', 30)
+    modules['climate'].update_sensors()
+    second = publisher.publish()
+    assert second.version == 2
+    assert first.status['climate']['temperature'] == temperature
+    assert second.status['climate']['temperature'] > 30
+    assert "Température élevée" in " ".join(second.all_alarms)
+    
+    # La simulation publie un instantané par cycle et le sink lit le dernier
+    sink = RecordingSink()
+    simulation = MonitoringSimulation(headless=True, sink=sink, clock=VirtualClock(start=0))
+    simulation.running = True
+    simulation._simulation_loop(duration=20)
+    simulation.stop()
+    
+    snapshot = simulation.snapshots.latest()
+    assert snapshot.version > 1
+    assert sink.statuses[-1] == snapshot.plain_status()
+    assert sink.alarms[-1] == snapshot.active_alarms
+    
+    print("✅ Instantanés testés\n")
+
+
+def test_state_cache():
+    """Test de la mise en cache de get_status / get_alarms par version d'état"""
+    print("🗃️ Test du cache d'état des modules...")
+    
+    from clock import VirtualClock
+    
+    clock = VirtualClock(start=1000)
+    climate = ClimateModule(clock)
+    climate.update_sensors()
+    climate.update_control_logic()
+    
+    # Lectures répétées sans cycle : même objet, une seule construction
+    status = climate.get_status()
+    assert climate.get_status() is status
+    assert climate.get_alarms() is climate.get_alarms()
+    assert climate.state_cache.misses == 1
+    assert climate.state_cache.hits == 1
+    
+    # Un cycle ou un scénario invalide le cache
+    climate.force_scenario('high_temperature', 30)
+    climate.update_sensors()
+    assert climate.get_status() is not status
+    assert climate.get_status()['temperature'] > 30
+    assert climate.get_alarms() and climate.state_cache.misses == 2
+    
+    # Presence : le temps écoulé depuis le dernier mouvement suit l'horloge
+    presence = PresenceModule(clock)
+    presence.force_scenario('presence_detected', 5)
+    presence.update_sensors()
+    presence.update_control_logic()
+    assert presence.get_status()['time_since_movement'] == 0
+    clock.advance(2)
+    assert presence.get_status()['time_since_movement'] == 2
+    assert presence.get_status() is presence.get_status()
+    
+    stats = climate.state_cache.as_dict()
+    assert stats['hit_rate'] == round(stats['hits'] / (stats['hits'] + stats['misses']), 3)
+    
+    print("✅ Cache d'état testé\n")
+
+
+def test_diff_renderer():
+    """Test du rendu différentiel de l'HMI (sans tkinter)"""
+    print("🖥️ Test du rendu différentiel...")
+    
+    from clock import VirtualClock
+    from hmi_render import DiffRenderer, display_values, system_indicator
+    
+    class FakeWidget:
+        """Remplace StringVar / Label : compte les mises à jour reçues"""
+        def __init__(self):
+            self.calls = 0
+        
+        def set(self, value):
+            self.calls += 1
+        
+        def configure(self, **options):
+            self.calls += 1
+    
+    clock = VirtualClock(start=0)
+    climate, presence, battery = ClimateModule(clock), PresenceModule(clock), BatteryModule(clock)
+    statuses = {'climate': climate.get_status(), 'presence': presence.get_status(),
+                'battery': battery.get_status()}
+    alarms = {'climate': [], 'presence': [], 'battery': []}
+    
+    values = display_values(statuses)
+    assert values['ventilator_status'] == "OFF"
+    assert values['battery_status_text'] == "NORMAL"
+    assert system_indicator(statuses, alarms) == ("🟢 SYSTÈME ACTIF", 'accent_green')
+    assert system_indicator(statuses, {'climate': ['a', 'b', 'c']})[1] == 'accent_red'
+    
+    renderer = DiffRenderer(clock)
+    widgets = {name: FakeWidget() for name in values}
+    for name, value in values.items():
+        renderer.set_var(name, widgets[name], value)
+    assert renderer.updates == len(values)
+    
+    # Même rendu : aucun widget retouché
+    for name, value in display_values(statuses).items():
+        renderer.set_var(name, widgets[name], value)
+    assert renderer.skipped == len(values)
+    
+    # Seules les valeurs modifiées sont appliquées
+    battery.force_scenario('critical_battery', 30)
+    battery.update_sensors()
+    battery.update_control_logic()
+    statuses['battery'] = battery.get_status()
+    for name, value in display_values(statuses).items():
+        renderer.set_var(name, widgets[name], value)
+    assert widgets['battery_status_text'].calls == 2
+    assert widgets['temp_display'].calls == 1
+    
+    status_label = FakeWidget()
+    assert renderer.configure('system_status', status_label, text="A", fg='red')
+    assert not renderer.configure('system_status', status_label, text="A", fg='red')
+    
+    clock.advance(10)
+    assert renderer.saved_per_second() == renderer.skipped / 10
+    
+    print("✅ Rendu différentiel testé\n")
+
+
+def test_event_journal():
+    """Test du journal des événements inséré par lots"""
+    print("📜 Test du journal des événements...")
+    
+    from event_journal import EventJournal
+    from benchmark_journal import MemoryText
+    
+    widget = MemoryText()
+    journal = EventJournal(max_lines=5)
+    for i in range(3):
+        journal.append(f"événement {i}\n", "INFO")
+    assert journal.flush(widget) == 3
+    assert widget.lines == ["événement 0", "événement 1", "événement 2", ""]
+    assert journal.flush(widget) == 0
+    
+    # La limite de lignes est appliquée à partir du compteur
+    for i in range(3, 9):
+        journal.append(f"événement {i}\n", "WARNING")
+    journal.flush(widget)
+    assert journal.line_count == 5
+    assert widget.lines[:-1] == [f"événement {i}" for i in range(4, 9)]
+    
+    # Rafale plus longue que le journal : seuls les derniers événements sont conservés
+    for i in range(20):
+        journal.append(f"rafale {i}\n", "ERROR")
+    assert journal.dropped == 1 + 15
+    journal.flush(widget)
+    assert widget.lines[:-1] == [f"rafale {i}" for i in range(15, 20)]
+    assert journal.flushes == 3
+    
+    print("✅ Journal des événements testé\n")
+
+
+def test_event_bus():
+    """Test du bus d'événements borné entre threads"""
+    print("📨 Test du bus d'événements...")
+    
+    import threading
+    from clock import VirtualClock
+    from event_bus import EventBus
+    from scenario_manager import ScenarioManager
+    
+    # Plusieurs threads producteurs publient sans jamais bloquer
+    bus = EventBus(max_events=10000)
+    def produce(worker):
+        for i in range(1000):
+            bus.publish(f"worker {worker} - {i}", "SENSOR")
+    threads = [threading.Thread(target=produce, args=(worker,)) for worker in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert bus.published == 4000 and bus.pending == 4000
+    
+    # Vidage par lots, dans l'ordre de publication de chaque producteur
+    first = bus.drain(100)
+    assert len(first) == 100 and bus.pending == 3900
+    rest = bus.drain()
+    worker_zero = [event.message for event in first + rest if event.message.startswith("worker 0")]
+    assert worker_zero == [f"worker 0 - {i}" for i in range(1000)]
+    assert bus.delivered == 4000 and bus.dropped == 0
+    
+    # Bus saturé : les plus anciens événements sont abandonnés et comptés
+    bus = EventBus(max_events=5)
+    for i in range(8):
+        bus.publish(f"alarme {i}", "WARNING")
+    assert [event.message for event in bus.drain()] == [f"alarme {i}" for i in range(3, 8)]
+    assert bus.dropped == 3 and bus.dropped_by_type == {'WARNING': 3}
+    assert bus.high_water == 5
+    
+    bus = EventBus(max_events=2, overflow_policy='drop_newest')
+    assert bus.publish("a") and bus.publish("b")
+    assert not bus.publish("c")
+    assert [event.message for event in bus.drain()] == ["a", "b"]
+    
+    # Le gestionnaire de scénarios publie sur le bus au lieu d'appeler l'HMI
+    clock = VirtualClock(start=0)
+    bus = EventBus()
+    manager = ScenarioManager(ClimateModule(clock), PresenceModule(clock), BatteryModule(clock), bus, clock)
+    manager._trigger_random_scenario()
+    events = bus.drain()
+    assert events[0].event_type == "SCENARIO"
+    assert events[-1].show_timestamp is False
+    
+    print("✅ Bus d'événements testé\n")
+
+
+def test_command_queue():
+    """Test des commandes appliquées au début du cycle capteurs"""
+    print("📬 Test de la file de commandes...")
+    
+    import threading
+    import numpy as np
+    from clock import VirtualClock
+    from climate_fleet import ClimateFleet
+    from scenario_manager import ScenarioManager
+    
+    clock = VirtualClock(start=0)
+    climate, presence, battery = ClimateModule(clock), PresenceModule(clock), BatteryModule(clock)
+    
+    # La commande n'est appliquée qu'au cycle suivant
+    manager = ScenarioManager(climate, presence, battery, RecordingSink(), clock)
+    assert manager.trigger_manual_scenario('critical_battery')
+    assert not battery.scenario_active and battery.commands.pending == 1
+    battery.update_sensors()
+    assert battery.scenario_active and battery.forced_voltage == 9.8
+    assert battery.commands.applied == 1 and battery.commands.pending == 0
+    
+    # Commandes de plusieurs threads, toutes appliquées en un seul lot
+    def submit_commands():
+        for _ in range(500):
+            climate.commands.submit('force_scenario', 'high_co2', 10)
+    threads = [threading.Thread(target=submit_commands) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    climate.update_sensors()
+    assert climate.commands.applied == 2000 and climate.commands.batches == 1
+    assert climate.forced_co2 == 1200
+    
+    # Commande invalide : comptée et ignorée, le cycle continue
+    climate.commands.submit('force_scenario')
+    climate.update_sensors()
+    assert climate.commands.failed == 1
+    
+    # Parc de pièces : des milliers de commandes fusionnées par type de scénario
+    fleet = ClimateFleet(1000, clock=clock, seed=3)
+    fleet.commands.submit_many(('force_scenario', ('high_temperature', 30, room)) for room in range(0, 1000, 2))
+    fleet.commands.submit_many(('force_scenario', ('high_co2', 30, [room])) for room in range(1, 1000, 2))
+    fleet.commands.submit('force_scenario', 'low_temperature', 60, np.arange(1000) >= 900)
+    assert not fleet.scenario_active.any()
+    fleet.update_sensors()
+    assert fleet.scenario_active.all()
+    assert (fleet.forced_temp[0:900:2] == 32.0).all()
+    assert (fleet.forced_temp[900:] == 22.0).all()
+    assert (fleet.forced_co2[1::2] == 1200).all()
+    assert fleet.commands.applied == 1001
+    
+    # Ordre respecté : une annulation après un force_scenario s'applique après lui ;
+    # une commande invalide est isolée sans perdre le reste du lot
+    fleet = ClimateFleet(10, clock=clock, seed=4)
+    fleet.commands.submit('force_scenario', 'high_temperature', 30, [0, 1])
+    fleet.commands.submit('cancel_scenario', 1)
+    fleet.commands.submit('force_scenario', 'high_co2', 30, [99])
+    fleet.commands.submit('inconnue')
+    fleet.commands.submit('force_scenario', 'high_co2', 30, [2])
+    fleet.update_sensors()
+    assert fleet.scenarios.active_count == 1 and not fleet.scenario_active[:2].any()
+    assert fleet.forced_co2[2] == 1200
+    assert fleet.commands.failed == 2 and fleet.commands.applied == 3
+    
+    print("✅ File de commandes testée\n")
+
+
+def test_stacked_scenarios():
+    """Test des scénarios superposés avec priorités et échéances en tas"""
+    print("🥞 Test des scénarios superposés...")
+    
+    import numpy as np
+    from clock import VirtualClock
+    from climate_fleet import ClimateFleet
+    from scenario_stack import ScenarioStack
+    
+    # Le tas rend les scénarios expirés dans l'ordre des échéances
+    stack = ScenarioStack()
+    for end_time in (30, 10, 20):
+        stack.push(f"s{end_time}", {}, end_time)
+    cancelled = stack.push("annulé", {}, 5)
+    assert stack.cancel(cancelled) and not stack.cancel(cancelled)
+    assert stack.next_expiry() == 10
+    assert [scenario.name for scenario in stack.expire(20)] == ["s10", "s20"]
+    assert stack.active_count == 1 and stack.end_time() == 30
+    
+    clock = VirtualClock(start=0)
+    climate = ClimateModule(clock)
+    
+    # Superposition : CO₂ et température forcés en même temps
+    climate.force_scenario('high_co2', 60)
+    heat = climate.force_scenario('high_temperature', 20)
+    assert climate.forced_co2 == 1200 and climate.forced_temp == 32.0
+    
+    # Priorité : un scénario prioritaire plus court masque le précédent puis le rend
+    climate.force_scenario('low_temperature', 10, priority=5)
+    climate.force_scenario('high_temperature', 15)
+    assert climate.forced_temp == 22.0
+    clock.advance(10)
+    climate.update_sensors()
+    assert climate.forced_temp == 32.0
+    
+    # Annulation et expiration progressive
+    climate.cancel_scenario(heat)
+    assert climate.forced_temp == 32.0
+    clock.advance(5)
+    climate.update_sensors()
+    assert climate.forced_temp is None and climate.forced_co2 == 1200
+    assert climate.scenario_active and climate.scenario_end_time == 60
+    clock.advance(45)
+    climate.update_sensors()
+    assert not climate.scenario_active and climate.forced_co2 is None
+    
+    # Parc : des dizaines de perturbations superposées sur des pièces différentes
+    fleet = ClimateFleet(1000, clock=clock, seed=1)
+    rng = np.random.default_rng(0)
+    for i in range(40):
+        rooms = rng.choice(1000, size=100, replace=False)
+        fleet.force_scenario('high_co2' if i % 2 else 'low_temperature', 10 + i, rooms=rooms)
+    fleet.force_scenario('high_temperature', 100, rooms=slice(0, 10), priority=9)
+    assert (fleet.forced_temp[:10] == 32.0).all()
+    assert fleet.scenarios.active_count == 41
+    
+    clock.advance(30)
+    fleet.update_sensors()
+    assert fleet.scenarios.active_count == 41 - 21
+    active_rooms = np.zeros(1000, dtype=bool)
+    for scenario in fleet.scenarios.active():
+        active_rooms[scenario.target] = True
+    assert (fleet.scenario_active == active_rooms).all()
+    
+    print("✅ Scénarios superposés testés\n")
+
+
+def test_scenario_registry():
+    """Test du registre de scénarios compilé depuis la configuration"""
+    print("📚 Test du registre de scénarios...")
+    
+    from clock import VirtualClock
+    from config import SCENARIOS
+    from scenario_manager import ScenarioManager
+    from scenario_registry import REGISTRY, ScenarioRegistry
+    
+    # Registre partagé : valeurs issues de config.SCENARIOS, sans littéraux dans les modules
+    assert REGISTRY.names() == tuple(SCENARIOS)
+    assert REGISTRY.module_for('high_co2') == 'climate'
+    assert REGISTRY.module_for('inconnu') == 'unknown'
+    assert dict(REGISTRY.values_for('low_battery')) == {'forced_voltage': 10.5, 'forced_current': 1.0}
+    assert not REGISTRY.values_for('low_battery', 'climate')
+    assert REGISTRY.names('presence') == ('presence_detected', 'no_presence')
+    
+    # Configuration invalide : refusée à la compilation
+    for config in ({'module': 'garage', 'duration': 5},
+                   {'module': 'climate', 'voltage': 3, 'duration': 5},
+                   {'module': 'climate', 'temp': 30}):
+        try:
+            ScenarioRegistry({'invalide': config})
+            assert False, "La configuration aurait dû être refusée"
+        except ValueError:
+            pass
+    
+    # Centaines de scénarios personnalisés, sans modifier le code
+    registry = ScenarioRegistry({
+        f'canicule_{i}': {'module': 'climate', 'temp': 30.0 + i / 100, 'duration': 60}
+        for i in range(500)
+    })
+    assert len(registry.names('climate')) == 500
+    assert registry.get('canicule_250').values['forced_temp'] == 32.5
+    assert registry.get('canicule_250').label == "Scénario canicule_250"
+    
+    # Libellés des journaux formatés depuis la configuration, jamais recopiés en dur
+    assert REGISTRY.get('high_co2').label == f"CO₂ dangereux ({SCENARIOS['high_co2']['co2']}ppm)"
+    custom = ScenarioRegistry({'canicule': {'module': 'climate', 'temp': 35.5, 'duration': 60, 'icon': '🔥',
+                                            'label': "Canicule ({temp:g}°C)"}})
+    assert custom.get('canicule').label == "Canicule (35.5°C)"
+    try:
+        ScenarioRegistry({'canicule': {'module': 'climate', 'temp': 35.5, 'duration': 60,
+                                       'label': "Canicule ({co2} ppm)"}})
+        assert False, "Le libellé aurait dû être refusé"
+    except ValueError:
+        pass
+    
+    # Scénario ajouté au registre partagé : déclenchable de bout en bout
+    clock = VirtualClock(start=0)
+    battery = BatteryModule(clock)
+    manager = ScenarioManager(ClimateModule(clock), PresenceModule(clock), battery, clock=clock)
+    REGISTRY.register('panne_secteur', {'module': 'battery', 'voltage': 11.0, 'current': 6.0,
+                                        'duration': 30, 'priority': 2})
+    sink = RecordingSink()
+    manager.hmi_interface = sink
+    try:
+        assert manager.trigger_manual_scenario('panne_secteur')
+        battery.update_sensors()
+        assert battery.forced_voltage == 11.0 and battery.forced_current == 6.0
+        assert manager.scenario_history[-1]['module'] == 'battery'
+        assert not manager.trigger_manual_scenario('inconnu')
+        
+        # Journal du déclenchement automatique construit depuis le registre
+        manager.scenario_history.append({'name': 'low_battery', 'module': 'battery', 'timestamp': 0.0,
+                                         'trigger_type': 'automatic'})
+        manager._trigger_random_scenario()
+        definition = REGISTRY.get(manager.scenario_history[-1]['name'])
+        assert sink.events[0] == ('SCENARIO', f"{definition.icon} SCÉNARIO AUTO: {definition.label} "
+                                              f"pendant {definition.duration}s")
+    finally:
+        REGISTRY.unregister('panne_secteur')
+    assert 'panne_secteur' not in REGISTRY
+    
+    print("✅ Registre de scénarios testé\n")
+
+
+def test_scenario_history():
+    """Test de l'historique de scénarios borné et indexé"""
+    print("🗂️ Test de l'historique des scénarios...")
+    
+    import json
+    import os
+    import tempfile
+    from clock import VirtualClock
+    from scenario_history import ScenarioHistory
+    from scenario_manager import ScenarioManager
+    
+    path = os.path.join(tempfile.mkdtemp(), 'audit.jsonl')
+    history = ScenarioHistory(capacity=100, spill_path=path)
+    names = ['high_temperature', 'high_co2', 'low_battery', 'no_presence']
+    modules = {'high_temperature': 'climate', 'high_co2': 'climate',
+               'low_battery': 'battery', 'no_presence': 'presence'}
+    for i in range(1000):
+        name = names[i % 4]
+        history.append({'name': name, 'module': modules[name], 'duration': 10,
+                        'timestamp': float(i), 'trigger_type': 'manual' if i % 10 == 0 else 'automatic'})
+    history.close()
+    
+    # Tampon circulaire : seuls les 100 derniers sont conservés, l'audit garde tout
+    assert len(history) == 100 and history.total == 1000
+    assert history[0]['timestamp'] == 900.0 and history[-1]['timestamp'] == 999.0
+    with open(path, encoding='utf-8') as audit:
+        records = [json.loads(line) for line in audit]
+    assert len(records) == 1000
+    assert records[0] == {'name': 'high_temperature', 'module': 'climate', 'duration': 10,
+                          'timestamp': 0.0, 'trigger_type': 'manual'}
+    assert records[-1]['timestamp'] == 999.0
+    
+    # Capacité nulle ou négative refusée dès la construction
+    for capacity in (0, -5):
+        try:
+            ScenarioHistory(capacity=capacity)
+            assert False, capacity
+        except ValueError:
+            pass
+    
+    # Derniers N par module / type de déclenchement
+    last_climate = history.last(3, module='climate')
+    assert [record['timestamp'] for record in last_climate] == [993.0, 996.0, 997.0]
+    manual = history.last(100, trigger_type='manual', module='climate')
+    assert [record['timestamp'] for record in manual] == [900.0, 920.0, 940.0, 960.0, 980.0]
+    assert history.last(5, name='inconnu') == []
+    
+    # Comptes par scénario sur une fenêtre de temps
+    assert history.counts('name', start=990) == {'high_temperature': 2, 'high_co2': 2,
+                                                 'low_battery': 3, 'no_presence': 3}
+    assert history.counts('module') == {'climate': 50, 'battery': 25, 'presence': 25}
+    assert history.counts('trigger_type', start=0, end=949.5) == {'manual': 5, 'automatic': 45}
+    
+    # Gestionnaire : manuels et automatiques bornés de la même façon
+    clock = VirtualClock(start=0)
+    manager = ScenarioManager(ClimateModule(clock), PresenceModule(clock), BatteryModule(clock), clock=clock)
+    for _ in range(200):
+        manager.trigger_manual_scenario('high_co2')
+        clock.advance(1)
+    assert len(manager.scenario_history) == manager.scenario_history.capacity
+    assert manager.get_status()['total_scenarios'] == 200
+    assert manager.get_scenario_counts(window=10) == {'high_co2': 10}
+    assert len(manager.get_scenario_history(5)) == 5
+    
+    print("✅ Historique des scénarios testé\n")
+
+
+def test_scenario_script():
+    """Test des scripts de scénarios rejoués de façon déterministe"""
+    print("📜 Test des scripts de scénarios...")
+    
+    import random
+    from main import MonitoringSimulation
+    from clock import VirtualClock
+    from scenario_script import compile_script
+    from config import UPDATE_INTERVAL
+    
+    timeline = compile_script("""
+        # Profil de perturbations
+        t=2m critical_battery for 600s, t=0 high_co2
+        t=1h high_temperature for 30m priority 5
+        t=0 no_presence
+    """)
+    assert [(event.time, event.name) for event in timeline.events] == [
+        (0, 'high_co2'), (0, 'no_presence'), (120, 'critical_battery'), (3600, 'high_temperature')]
+    assert timeline.events[2].duration == 600 and timeline.events[3].priority == 5
+    assert timeline.events[0].duration == 25    # Durée par défaut de config.SCENARIOS
+    assert timeline.end_time == 3600 + 1800
+    
+    for text in ("t=10 scenario_inconnu", "high_co2 à midi", "t=5 high_co2 for 10 jours"):
+        try:
+            compile_script(text)
+            assert False, "Le script aurait dû être refusé"
+        except ValueError:
+            pass
+    
+    def replay():
+        random.seed(7)
+        sink = RecordingSink()
+        simulation = MonitoringSimulation(headless=True, sink=sink, clock=VirtualClock(start=0),
+                                          timeline=timeline)
+        simulation.run_headless(duration=timeline.end_time)
+        return simulation, sink
+    
+    # Une journée de perturbations rejouée en temps virtuel, deux fois à l'identique
+    first, first_sink = replay()
+    second, second_sink = replay()
+    assert first_sink.statuses == second_sink.statuses
+    assert len(first_sink.statuses) == timeline.end_time / UPDATE_INTERVAL + 1
+    
+    history = first.scenario_manager.scenario_history
+    assert [record['name'] for record in history] == [event.name for event in timeline.events]
+    assert history.counts('trigger_type') == {'script': 4}
+    assert first.battery_module.battery_status == 'Normal'
+    assert any(status['battery']['battery_status'] == 'Critical' for status in first_sink.statuses)
+    
+    print("✅ Scripts de scénarios testés\n")
+
+
+def test_structured_alarms():
+    """Test des alarmes structurées (identifiants stables, différence d'ensembles)"""
+    print("🚨 Test des alarmes structurées...")
+    
+    from alarms import diff_alarms
+    from clock import VirtualClock
+    from snapshot import SnapshotPublisher
+    
+    clock = VirtualClock(start=1000)
+    climate = ClimateModule(clock)
+    climate.force_scenario('high_temperature', 60)
+    climate.update_sensors()
+    
+    alarm = climate.get_alarms()[0]
+    assert alarm.id == 'climate.high_temperature'
+    assert (alarm.module, alarm.severity, alarm.event_type) == ('climate', 'WARNING', 'WARNING')
+    assert alarm.message.startswith("Température élevée") and str(alarm) == alarm.message
+    assert alarm.display().startswith("🌡️ ")
+    
+    # Nouvelle valeur mesurée, même alarme : rien de nouveau à journaliser
+    new_alarms, cleared, ids = diff_alarms(set(), climate.get_alarms())
+    assert [a.id for a in new_alarms] == ['climate.high_temperature'] and not cleared
+    climate.update_sensors()
+    new_alarms, cleared, ids = diff_alarms(ids, climate.get_alarms())
+    assert new_alarms == [] and cleared == set()
+    
+    # Plus aucune alarme active : l'identifiant passe dans les alarmes disparues
+    new_alarms, cleared, ids = diff_alarms(ids, [])
+    assert new_alarms == [] and cleared == {'climate.high_temperature'} and ids == set()
+    
+    # Batterie à l'arrêt : sévérité critique -> événement ERROR
+    battery = BatteryModule(clock)
+    battery.voltage = 9.8
+    battery.battery_status = 'Shutdown'
+    shutdown = battery._evaluate_alarms()[0]
+    assert (shutdown.id, shutdown.event_type) == ('battery.shutdown', 'ERROR')
+    
+    # Les instantanés gardent les objets ; le texte n'est formaté qu'à l'export
+    snapshot = SnapshotPublisher({'climate': climate, 'battery': battery}, clock).publish()
+    assert [a.message for a in snapshot.active_alarms] == snapshot.all_alarms
+    
+    # Sinks : une ligne par alarme levée ou disparue, pas à chaque publication
+    import io
+    import json
+    import os
+    import tempfile
+    from sinks import ConsoleSink, JsonLinesSink
+    
+    stream = io.StringIO()
+    console = ConsoleSink(stream, clock)
+    path = os.path.join(tempfile.mkdtemp(), 'alarms.jsonl')
+    jsonl = JsonLinesSink(path, clock)
+    climate.force_scenario('high_temperature', 60)
+    for _ in range(3):
+        climate.update_sensors()
+        for sink in (console, jsonl):
+            sink.write_alarms(climate.get_alarms())
+    for sink in (console, jsonl):
+        sink.write_alarms([])
+        sink.write_alarms([])
+    jsonl.close()
+    
+    lines = stream.getvalue().splitlines()
+    assert len(lines) == 2
+    assert lines[0].startswith("⚠️ ALARME: 🌡️ Température élevée")
+    assert lines[1] == "✅ FIN D'ALARME: Température élevée"
+    with open(path, encoding='utf-8') as f:
+        records = [json.loads(line) for line in f]
+    assert [(r['state'], r['id']) for r in records] == [('raised', 'climate.high_temperature'),
+                                                         ('cleared', 'climate.high_temperature')]
+    
+    print("✅ Alarmes structurées testées\n")
+
+
+def test_alarm_rules():
+    """Test des règles d'alarme déclaratives (seuils, hystérésis, durée minimale, masques)"""
+    print("📐 Test des règles d'alarme...")
+    
+    import numpy as np
+    from types import SimpleNamespace
+    from alarm_rules import AlarmEvaluator, AlarmRuleSet, MaskEvaluator, compile_rule
+    from clock import VirtualClock
+    from config import CLIMATE_CONFIG
+    
+    rules = AlarmRuleSet({
+        'tank.high_level': {'module': 'tank', 'when': 'level > 80', 'hysteresis': 5, 'min_duration': 10,
+                            'severity': 'ERROR', 'message': "Niveau haut: {level:.0f}%"},
+        'tank.pump_off': {'module': 'tank', 'when': 'pump == "off"', 'message': "Pompe arrêtée"},
+        'tank.reference': {'module': 'tank', 'when': 'level >= CLIMATE_CONFIG.co2_normal', 'message': "Référence"},
+    })
+    level_rule, pump_rule, reference_rule = rules.for_module('tank')
+    assert reference_rule.trigger(CLIMATE_CONFIG['co2_normal']) and not reference_rule.trigger(0)
+    
+    clock = VirtualClock(start=0)
+    tank = SimpleNamespace(level=85.0, pump='off')
+    evaluator = AlarmEvaluator((level_rule, pump_rule), clock)
+    
+    # Durée minimale : seule la pompe est signalée tant que le niveau n'a pas tenu 10 s
+    assert [alarm.id for alarm in evaluator.evaluate(tank)] == ['tank.pump_off']
+    clock.advance(10)
+    alarm = evaluator.evaluate(tank)[0]
+    assert (alarm.id, alarm.severity, alarm.message) == ('tank.high_level', 'ERROR', "Niveau haut: 85%")
+    
+    # Hystérésis : l'alarme tient jusqu'à 75 %, puis doit de nouveau durer 10 s
+    tank.level, tank.pump = 78.0, 'on'
+    assert [alarm.id for alarm in evaluator.evaluate(tank)] == ['tank.high_level']
+    tank.level = 74.0
+    assert evaluator.evaluate(tank) == []
+    tank.level = 82.0
+    assert evaluator.evaluate(tank) == []
+    
+    # Même règle sur un parc : masques vectorisés, un état par entrée
+    tanks = SimpleNamespace(level=np.array([85.0, 78.0, 50.0]), pump=np.array(['off', 'on', 'on']))
+    masks = MaskEvaluator((level_rule, pump_rule), 3, clock)
+    assert not masks.evaluate(tanks)['tank.high_level'].any()
+    clock.advance(10)
+    tanks.level[1] = 81.0
+    masks.evaluate(tanks)
+    tanks.level[:] = 78.0
+    result = masks.evaluate(tanks)
+    assert result['tank.high_level'].tolist() == [True, False, False]
+    assert result['tank.pump_off'].tolist() == [True, False, False]
+    
+    # Modules : règles avancées à chaque échantillon, pas à chaque lecture
+    clock = VirtualClock(start=0)
+    battery = BatteryModule(clock)
+    battery.sensor_interval = 0.5
+    
+    def high_current(current_at, polled):
+        raised = []
+        for tick in range(20):
+            now = tick * 0.5
+            battery.forced_current = current_at(now)
+            battery.update_sensors()
+            if now in polled:
+                raised.append(any(a.id == 'battery.high_current' for a in battery.get_alarms()))
+            clock.advance(0.5)
+        return raised
+    
+    # Courant élevé aux seuls instants lus (0, 2 et 4 s) : jamais 4 s d'affilée
+    assert high_current(lambda now: 9.0 if now in (0, 2, 4) else 2.0, (0, 2, 4)) == [False] * 3
+    # Courant élevé en continu, lu une seule fois : la durée minimale compte depuis le premier échantillon
+    assert high_current(lambda now: 9.0, (4.5,)) == [True]
+    
+    # Règles invalides refusées à la compilation
+    for rule in ({'module': 'tank', 'when': 'level >> 3', 'message': ""},
+                 {'module': 'tank', 'when': 'pump == "off"', 'hysteresis': 1, 'message': ""},
+                 {'module': 'tank', 'when': 'level > NO_CONFIG.key', 'message': ""},
+                 {'module': 'tank', 'when': 'level > 3', 'severity': 'INFO', 'message': ""}):
+        try:
+            compile_rule('tank.invalid', rule)
+            assert False, rule
+        except ValueError:
+            pass
+    
+    print("✅ Règles d'alarme testées\n")
+
+
+def test_alarm_aggregation():
+    """Test de l'agrégation des alarmes (déduplication, limitation, synthèse)"""
+    print("🌩️ Test de l'agrégation des alarmes...")
+    
+    from alarm_aggregator import AlarmAggregator
+    from alarms import Alarm
+    from clock import VirtualClock
+    
+    def critical(voltage):
+        return Alarm('battery.critical', 'battery', 'ERROR', "Batterie critique - {voltage:.2f}V", '🔋', voltage=voltage)
+    
+    clock = VirtualClock(start=0)
+    aggregator = AlarmAggregator(clock, dedup_window=30, rate_limit=5, max_sources_listed=2)
+    
+    # Première alarme : écrite telle quelle, sans attendre
+    aggregator.submit([critical(9.9)], 'site-0')
+    assert aggregator.flush() == [("🔋 Batterie critique - 9.90V (site-0)", 'ERROR')]
+    
+    # Tempête sur 500 sites : une seule ligne de synthèse après la limitation
+    for i in range(1, 501):
+        aggregator.submit([critical(9.8)], f"site-{i}")
+    assert aggregator.flush() == [] and aggregator.pending == 500
+    clock.advance(5)
+    assert aggregator.flush() == [("🔋 500 sources: Batterie critique (site-1, site-2, …)", 'ERROR')]
+    
+    # Même alarme, même source dans la fenêtre : ignorée
+    aggregator.submit([critical(9.7)], 'site-0')
+    clock.advance(5)
+    assert aggregator.flush() == []
+    clock.advance(30)
+    aggregator.submit([critical(9.7)], 'site-0')
+    assert len(aggregator.flush()) == 1
+    assert aggregator.as_dict() == {'submitted': 503, 'deduplicated': 1, 'rolled_up': 500,
+                                    'emitted': 3, 'pending': 0}
+    
+    # Fins d'alarme : regroupées comme les levées, sans icône
+    aggregator.submit([critical(10.5)] * 3, 'site-9', cleared=True)
+    aggregator.submit([critical(10.5)], 'site-8', cleared=True)
+    assert aggregator.flush() == [("2 sources: Batterie critique (site-9, site-8)", 'SUCCESS')]
+    
+    # Alarme qui oscille dans la fenêtre de déduplication : chaque changement d'état est écrit
+    from sinks import AlarmTracker
+    
+    flapping_clock = VirtualClock(start=0)
+    tracker = AlarmTracker(flapping_clock)
+    states = []
+    for active in [True, False, True] + [True] * 45:
+        for alarm, sources, cleared in tracker.update([critical(9.5)] if active else [], 'site-0'):
+            states.append('cleared' if cleared else 'raised')
+        flapping_clock.advance(2)
+    assert states == ['raised', 'cleared', 'raised']
+    
+    # Fin retenue par la limitation puis nouvelle levée : les deux s'annulent
+    states = []
+    for active in [False, True, False, True, True, True, True, True]:
+        for alarm, sources, cleared in tracker.update([critical(9.5)] if active else [], 'site-0'):
+            states.append('cleared' if cleared else 'raised')
+        flapping_clock.advance(1)
+    assert states == ['cleared', 'raised']
+    assert tracker.aggregator.pending == 0
+    
+    # Sinks partagés par tous les sites : comparaison par site, puis agrégation
+    import io
+    from main import MonitoringSimulation
+    from sinks import ConsoleSink
+    
+    stream = io.StringIO()
+    sink = ConsoleSink(stream, clock)
+    for tick in range(10):
+        for i in range(300):
+            sink.write_alarms([critical(9.5 - tick / 100)] if tick < 6 else [], f"site-{i}")
+        clock.advance(2)
+    lines = stream.getvalue().splitlines()
+    assert lines == ["⚠️ ALARME: 🔋 Batterie critique - 9.50V (site-0)",
+                     "⚠️ ALARME: 🔋 299 sources: Batterie critique (site-1, site-2, site-3, …)",
+                     "✅ FIN D'ALARME: Batterie critique (site-0)",
+                     "✅ FIN D'ALARME: 299 sources: Batterie critique (site-1, site-2, site-3, …)"]
+    
+    # Mode headless (noyau à événements) : même chemin, une ligne par alarme et non par cycle
+    simulation_clock = VirtualClock(start=0)
+    stream = io.StringIO()
+    simulation = MonitoringSimulation(headless=True, sink=ConsoleSink(stream, simulation_clock),
+                                      clock=simulation_clock)
+    simulation.battery_module.force_scenario('critical_battery', 60)
+    simulation.running = True
+    simulation._simulation_loop(duration=40)
+    simulation.stop()
+    alarm_lines = [line for line in stream.getvalue().splitlines() if "ALARME" in line]
+    assert 1 <= len(alarm_lines) <= 4
+    
+    print("✅ Agrégation des alarmes testée\n")
+
+
+def test_async_logging():
+    """Test de la journalisation en file (thread d'écriture, niveaux par module)"""
+    print("📝 Test de la journalisation asynchrone...")
+    
+    import io
+    import sim_logging
+    
+    class CountingArg:
+        formatted = 0
+        
+        def __str__(self):
+            CountingArg.formatted += 1
+            return "valeur"
+    
+    stream = io.StringIO()
+    sim_logging.configure(stream=stream, level='INFO', levels={'presence': 'WARNING'})
+    try:
+        presence_log = sim_logging.get_logger('presence')
+        scenarios_log = sim_logging.get_logger('scenarios')
+        
+        # Niveau désactivé : l'argument n'est jamais formaté
+        presence_log.info("lampes %s", CountingArg())
+        scenarios_log.info("scénario %s", CountingArg())
+        sim_logging.set_level('DEBUG', 'presence')
+        presence_log.debug("détail %s", CountingArg())
+    finally:
+        sim_logging.shutdown()
+        sim_logging.set_level('NOTSET', 'presence')
+    
+    # Le formatage et l'écriture ont lieu dans le thread d'écriture
+    assert stream.getvalue() == "scénario valeur\ndétail valeur\n"
+    assert CountingArg.formatted == 2
+    assert sim_logging.dropped() == 0
+    
+    # Niveau explicite : les niveaux par module de la configuration ne le contournent pas ;
+    # le sink console passe par le thread d'écriture et n'est pas filtré par le niveau
+    import threading
+    from config import LOG_CONFIG
+    from sinks import ConsoleSink
+    
+    class ThreadStream(io.StringIO):
+        def write(self, text):
+            self.threads = getattr(self, 'threads', set()) | {threading.current_thread()}
+            return super().write(text)
+    
+    stream = ThreadStream()
+    LOG_CONFIG['levels']['presence'] = 'INFO'
+    sim_logging.configure(stream=stream, level='WARNING')
+    try:
+        sim_logging.get_logger('presence').info("lampes allumées")
+        sim_logging.get_logger('presence').warning("lampes oubliées")
+        ConsoleSink().log_event("100% chargé", "SYSTEM", show_timestamp=False)
+    finally:
+        sim_logging.shutdown()
+        del LOG_CONFIG['levels']['presence']
+    assert stream.getvalue() == "lampes oubliées\n[SYSTEM] 100% chargé\n"
+    assert threading.current_thread() not in stream.threads
+    
+    print("✅ Journalisation asynchrone testée\n")
+
+
+def test_timeseries_store():
+    """Test de l'historique des capteurs en tampons circulaires"""
+    print("📈 Test de l'historique des capteurs...")
+    
+    from clock import VirtualClock
+    from main import MonitoringSimulation
+    from snapshot import SimulationSnapshot
+    from timeseries import TimeSeriesStore
+    
+    store = TimeSeriesStore(capacity=4, signals={'climate': ('temperature', 'ventilator_on')})
+    assert store.latest('climate.temperature') is None and len(store) == 0
+    for i in range(6):
+        store.record(SimulationSnapshot(i + 1, float(i), {'climate': {'temperature': 20.0 + i,
+                                                                      'ventilator_on': i % 2 == 1}}, {}))
+    
+    # Mémoire fixe : seuls les 4 derniers points restent, dans l'ordre chronologique
+    times, values = store.window('climate.temperature')
+    assert list(times) == [2.0, 3.0, 4.0, 5.0] and list(values) == [22.0, 23.0, 24.0, 25.0]
+    assert list(store.window('climate.ventilator_on', last=2)[1]) == [0.0, 1.0]
+    assert list(store.window('climate.temperature', since=4.0)[1]) == [24.0, 25.0]
+    assert store.latest('climate.temperature') == 25.0 and store.total == 6
+    assert store.stats('climate.temperature', last=3) == {'count': 3, 'min': 23.0, 'max': 25.0, 'mean': 24.0}
+    
+    # Vue sans copie, en lecture seule, lisible directement par NumPy
+    import numpy as np
+    assert values.readonly and np.frombuffer(values).mean() == 23.5
+    
+    # Simulation : un point par instantané publié
+    simulation = MonitoringSimulation(headless=True, clock=VirtualClock(start=1000))
+    simulation.run_headless(duration=10)
+    history = simulation.history
+    assert len(history) == simulation.snapshots.version
+    assert history.latest('battery.voltage') == simulation.snapshots.latest().status['battery']['voltage']
+    
+    print("✅ Historique des capteurs testé\n")
+
+
 def test_all_modules():
     """Test complet de tous les modules"""
     print("🎯 TEST COMPLET - SIMULATION MONITORING INTELLIGENT")
@@ -0,0 +1,112 @@
+"""
+Historique des capteurs en tampons circulaires préalloués
+Une colonne array('d') par signal (ex. 'climate.temperature'), de taille fixe
+quelle que soit la durée de la simulation. Chaque point est écrit deux fois,
+en i et en i + capacité : les derniers points forment toujours une tranche
+contiguë, renvoyée comme vue memoryview sans copie (tendances, analyses,
+numpy.frombuffer). Les points sont relevés dans les instantanés publiés,
+sans interroger de nouveau les modules.
+"""
+
+import math
+from array import array
+from bisect import bisect_left
+from config import TIMESERIES_CONFIG
+
+
+class TimeSeriesStore:
+    def __init__(self, capacity=None, signals=None):
+        self.capacity = TIMESERIES_CONFIG['capacity'] if capacity is None else capacity
+        signals = TIMESERIES_CONFIG['signals'] if signals is None else signals
+        empty = array('d', [math.nan]) * (2 * self.capacity)
+
+        self._times = array('d', empty)
+        self.columns = {}
+        self._fields = []       # (colonne, module, champ) dans l'ordre d'écriture
+        for module, fields in signals.items():
+            for field in fields:
+                column = self.columns[f"{module}.{field}"] = array('d', empty)
+                self._fields.append((column, module, field))
+        self._count = 0
+
+    def record(self, snapshot):
+        """Ajoute un point à partir d'un instantané (SimulationSnapshot) en O(1)"""
+        i = self._count % self.capacity
+        mirror = i + self.capacity
+        status = snapshot.status
+        self._times[i] = self._times[mirror] = snapshot.timestamp
+        for column, module, field in self._fields:
+            value = status[module].get(field)
+            column[i] = column[mirror] = math.nan if value is None else value
+        self._count += 1
+
+    def append(self, timestamp, values):
+        """Ajoute un point à partir d'un dict signal -> valeur (signaux absents = NaN)"""
+        i = self._count % self.capacity
+        mirror = i + self.capacity
+        self._times[i] = self._times[mirror] = timestamp
+        for name, column in self.columns.items():
+            value = values.get(name)
+            column[i] = column[mirror] = math.nan if value is None else value
+        self._count += 1
+
+    @property
+    def total(self):
+        """Nombre de points enregistrés depuis le démarrage (y compris écrasés)"""
+        return self._count
+
+    def __len__(self):
+        return min(self._count, self.capacity)
+
+    def _end(self):
+        """Fin (exclue) de la tranche contiguë des points conservés"""
+        if self._count <= self.capacity:
+            return self._count
+        return self._count % self.capacity + self.capacity
+
+    def _start(self, last, since):
+        end = self._end()
+        start = end - len(self)
+        if last is not None:
+            start = max(start, end - last)
+        if since is not None:
+            start = bisect_left(memoryview(self._times)[:end], since, start)
+        return start, end
+
+    def window(self, signal, last=None, since=None):
+        """(instants, valeurs) des derniers points, en vues memoryview sans copie
+
+        last limite au n derniers points, since aux points postérieurs à un
+        instant. Les vues suivent le tampon : les copier (bytes, list,
+        numpy.array) pour les conserver au-delà des prochains enregistrements.
+        """
+        column = self.columns[signal]
+        start, end = self._start(last, since)
+        return (memoryview(self._times).toreadonly()[start:end],
+                memoryview(column).toreadonly()[start:end])
+
+    def latest(self, signal):
+        """Dernière valeur d'un signal (None si aucun point)"""
+        if not self._count:
+            return None
+        return self.columns[signal][self._end() - 1]
+
+    def stats(self, signal, last=None, since=None):
+        """Minimum, maximum et moyenne d'un signal sur une fenêtre (NaN ignorés)"""
+        values = [value for value in self.window(signal, last, since)[1] if value == value]
+        if not values:
+            return {'count': 0, 'min': None, 'max': None, 'mean': None}
+        return {
+            'count': len(values),
+            'min': min(values),
+            'max': max(values),
+            'mean': sum(values) / len(values),
+        }
+
+    def as_dict(self):
+        return {
+            'points': len(self),
+            'total': self._count,
+            'signals': len(self.columns),
+            'bytes': (len(self.columns) + 1) * self._times.itemsize * len(self._times),
+        }